@@ -0,0 +1,84 @@
+"""Холодный запуск сервера N раз с разными профилями JVM: медиана и p95 по этапам.
+
+Сервер запускается через тот же Supervisor, что и в менеджере, после готовности
+останавливается командой stop, и так runs раз на каждый профиль. Сохранённые
+в .msm/settings.json параметры сервера берутся за основу, меняется только профиль.
+
+Запуск: python benchmarks/bench_boot.py --server servers/my_server [--runs 5]
+        [--profiles default,aikar,zgc] [--java java] [--ram 5] [--timeout 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core import boot, launch
+from core.supervisor import Supervisor, build_launch_args
+
+
+def wait(supervisor, condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        supervisor.poll()
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run_profile(supervisor, server_path, profile, args, runs, timeout, pause):
+    runtime = supervisor.runtime(os.path.basename(server_path), server_path)
+    settings = launch.load_launch(server_path)
+    settings["profile"] = profile
+    command = build_launch_args(server_path, args.java, args.ram, settings)
+    records = []
+    for i in range(runs):
+        runtime.last_boot = None
+        runtime.start(command)
+        if not wait(supervisor, lambda: runtime.last_boot is not None, timeout):
+            print(f"  {profile} #{i + 1}: не запустился за {timeout} с", file=sys.stderr)
+        runtime.stop()
+        wait(supervisor, lambda: not runtime.is_running() and runtime.transition is None, timeout)
+        if runtime.last_boot is not None:
+            records.append(runtime.last_boot)
+            print(f"  {profile} #{i + 1}: {boot.format_record(runtime.last_boot)}")
+        time.sleep(pause)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", required=True, help="папка сервера")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--profiles", default=",".join(launch.PROFILES))
+    parser.add_argument("--java", default="java")
+    parser.add_argument("--ram", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--pause", type=float, default=2, help="пауза между запусками, с")
+    args = parser.parse_args()
+
+    server_path = os.path.abspath(args.server)
+    supervisor = Supervisor()
+    supervisor.set_watchdog(False, 0, 0)  # бенчмарку не нужны автоперезапуски и пробы
+    results = {}
+    for profile in args.profiles.split(","):
+        if profile not in launch.PROFILES:
+            print(f"неизвестный профиль: {profile}", file=sys.stderr)
+            continue
+        results[profile] = run_profile(supervisor, server_path, profile, args, args.runs, args.timeout, args.pause)
+
+    print()
+    print(f"{'профиль':<18} {'этап':<20} {'медиана, с':>10} {'p95, с':>8} {'успешно':>8}")
+    for profile, records in results.items():
+        summary = boot.summarize(records)
+        ok = sum(1 for r in records if r["ok"])
+        for phase in boot.PHASES:
+            if phase in summary:
+                median, p95, _ = summary[phase]
+                print(f"{profile:<18} {boot.PHASE_TITLES[phase]:<20} {median:>10.2f} {p95:>8.2f} {ok:>5}/{args.runs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Задержка добавления строки в консольный буфер после 10k, 1M и 10M строк.
+
+Запуск: python benchmarks/bench_console.py [--sizes 10000,1000000,10000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.console import ConsoleBuffer, DEFAULT_MAX_LINES, DEFAULT_MAX_BYTES
+
+SAMPLE_WINDOW = 10000
+
+
+def make_line(i):
+    return f"[12:{i // 60 % 60:02d}:{i % 60:02d}] [Server thread/INFO]: Player{i % 500} issued server command: /home {i}"
+
+
+def measure(total, max_lines, max_bytes):
+    buffer = ConsoleBuffer(max_lines, max_bytes)
+    warmup = max(0, total - SAMPLE_WINDOW)
+    append = buffer.append
+    for i in range(warmup):
+        append(make_line(i))
+    # Замеряем последние SAMPLE_WINDOW добавлений, когда через буфер уже прошло total строк
+    lines = [make_line(i) for i in range(warmup, total)]
+    samples = []
+    for line in lines:
+        start = time.perf_counter_ns()
+        append(line)
+        samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    return {
+        "mean": sum(samples) / len(samples),
+        "p50": samples[len(samples) // 2],
+        "p99": samples[int(len(samples) * 0.99)],
+        "kept": len(buffer),
+        "bytes": buffer.size_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,1000000,10000000")
+    parser.add_argument("--max-lines", type=int, default=DEFAULT_MAX_LINES)
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    args = parser.parse_args()
+
+    print(f"лимиты: {args.max_lines} строк, {args.max_bytes} байт")
+    print(f"{'строк':>12} {'mean, нс':>10} {'p50, нс':>9} {'p99, нс':>9} {'в буфере':>10} {'байт':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = measure(size, args.max_lines, args.max_bytes)
+        print(f"{size:>12} {r['mean']:>10.0f} {r['p50']:>9} {r['p99']:>9} {r['kept']:>10} {r['bytes']:>10}")
+
+
+if __name__ == "__main__":
+    main()
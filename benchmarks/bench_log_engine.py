@@ -0,0 +1,103 @@
+"""Скорость разбора лога: старые re.search на каждую строку против LogClassifier.
+
+Запуск: python benchmarks/bench_log_engine.py [--log latest.log] [--loader paper] [--lines 2000000]
+Без --log разбирается синтетический лог из --lines строк. Большие логи читаются
+пакетами, поэтому подходят и записанные логи на несколько гигабайт.
+"""
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.log_engine import get_classifier
+
+BATCH = 100000
+
+SYNTHETIC = [
+    "[12:00:01] [Server thread/INFO]: Preparing spawn area: 42%",
+    "[12:00:02] [Server thread/INFO]: Steve joined the game",
+    "[12:00:03] [Server thread/INFO]: <Steve> hello everyone",
+    "[12:00:04] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2034ms or 40 ticks behind",
+    "[12:00:05] [Server thread/INFO]: Steve issued server command: /home base",
+    "[12:00:06] [Server thread/INFO]: [WorldEdit] Saved 1234 blocks",
+    "[12:00:07] [Server thread/WARN]: Mismatch in destroy block pos: BlockPos{x=1, y=2, z=3}",
+    "[12:00:08] [Server thread/INFO]: Steve left the game",
+    "[12:00:09] [Server thread/INFO]: Done (12.345s)! For help, type \"help\"",
+    "[12:00:10] [Server thread/ERROR]: Could not pass event PlayerMoveEvent to Plugin v1.0",
+]
+
+
+def legacy_classify(line):
+    """Копия прежней логики handle_stdout: четыре re.search и проверка подстрок на каждую строку."""
+    if "Done (" in line or "For help, type \"help\"" in line:
+        return "ready"
+    join_match = re.search(r": (\w+) joined the game", line)
+    left_match = re.search(r": (\w+) left the game", line)
+    bedrock_join = re.search(r"Player connected: (\w+)", line)
+    bedrock_left = re.search(r"Player disconnected: (\w+)", line)
+    if join_match:
+        return "join"
+    elif left_match:
+        return "leave"
+    elif bedrock_join:
+        return "join"
+    elif bedrock_left:
+        return "leave"
+    return None
+
+
+def batches(args):
+    if args.log:
+        with open(args.log, encoding="utf-8", errors="replace") as f:
+            while True:
+                batch = [line.rstrip("\n") for line in itertools.islice(f, BATCH)]
+                if not batch:
+                    return
+                yield batch
+    else:
+        source = itertools.islice(itertools.cycle(SYNTHETIC), args.lines)
+        while True:
+            batch = list(itertools.islice(source, BATCH))
+            if not batch:
+                return
+            yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", help="путь к записанному логу сервера")
+    parser.add_argument("--loader", default="paper")
+    parser.add_argument("--lines", type=int, default=2000000, help="размер синтетического лога")
+    args = parser.parse_args()
+
+    classify = get_classifier(args.loader).classify
+    total = 0
+    legacy_time = 0.0
+    engine_time = 0.0
+    legacy_hits = 0
+    engine_hits = 0
+    for batch in batches(args):
+        total += len(batch)
+        start = time.perf_counter()
+        for line in batch:
+            if legacy_classify(line):
+                legacy_hits += 1
+        legacy_time += time.perf_counter() - start
+        start = time.perf_counter()
+        for line in batch:
+            if classify(line):
+                engine_hits += 1
+        engine_time += time.perf_counter() - start
+
+    print(f"строк: {total}")
+    print(f"до (re.search на строку): {total / legacy_time:>12,.0f} строк/с, событий {legacy_hits}")
+    print(f"после (LogClassifier):    {total / engine_time:>12,.0f} строк/с, событий {engine_hits}")
+    print(f"ускорение: x{legacy_time / engine_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
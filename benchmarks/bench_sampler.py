@@ -0,0 +1,66 @@
+"""Накладные расходы замеров ресурсов при N одновременно работающих серверах.
+
+Вместо серверов запускаются N процессов python, каждый с несколькими потоками,
+открытыми файлами и дочерним процессом. Цель — меньше 1% CPU при 20 серверах.
+
+Запуск: python benchmarks/bench_sampler.py [--servers 20] [--seconds 30] [--interval 2]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.metrics import ResourceSampler, SAMPLE_INTERVAL
+
+FAKE_SERVER = r"""
+import subprocess, sys, tempfile, threading, time
+files = [tempfile.TemporaryFile() for _ in range(20)]
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3600)"])
+def work():
+    while True:
+        sum(range(2000))
+        time.sleep(0.05)
+for _ in range(8):
+    threading.Thread(target=work, daemon=True).start()
+time.sleep(3600)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL)
+    args = parser.parse_args()
+
+    processes = [subprocess.Popen([sys.executable, "-c", FAKE_SERVER]) for _ in range(args.servers)]
+    try:
+        time.sleep(1)  # даём процессам запустить потоки и дочерние процессы
+        sampler = ResourceSampler(interval=args.interval)
+        sampler.set_targets({f"server{i}": (p.pid, ".") for i, p in enumerate(processes)})
+        sampler.start()
+        time.sleep(args.seconds)
+        sampler.stop()
+        samples = sampler.history("server0")
+        passes = len(samples)
+        print(f"серверов: {args.servers}, интервал: {args.interval} с, проходов: {passes}")
+        print(f"CPU потока замеров: {sampler.overhead():.3f}% одного ядра (цель < 1%)")
+        if passes:
+            print(f"на один проход: {sampler.cpu_spent / passes * 1000:.2f} мс CPU")
+            last = samples[-1]
+            print(f"пример замера: cpu {last.cpu:.1f}%, rss {last.rss / 1024 ** 2:.0f} МБ, "
+                  f"потоков {last.threads}, дескрипторов {last.handles}")
+    finally:
+        for p in processes:
+            for child in psutil.Process(p.pid).children(recursive=True):
+                child.kill()
+            p.kill()
+
+
+if __name__ == "__main__":
+    main()
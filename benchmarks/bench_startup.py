@@ -0,0 +1,119 @@
+"""Время запуска менеджера: импорт, создание окна, первый кадр, готовность; и что импортируется дольше всего.
+
+Каждый запуск — отдельный процесс (холодный импорт). «Первый кадр» — первая
+отрисовка окна, «готов» — когда фоновое сканирование папки серверов и сетей
+применено к списку. Нужен существующий config.json (иначе менеджер откроет
+окно первичной настройки).
+
+Запуск: python benchmarks/bench_startup.py [--runs 5] [--config config.json] [--offscreen] [--top 15]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def child(config):
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    from PyQt6 import QtCore, QtWidgets
+    import core.config
+    if config:
+        main.config_path = core.config.config_path = os.path.abspath(config)
+    app = QtWidgets.QApplication(sys.argv[:1])
+    times = {"import": imported - started}
+
+    class PaintWatcher(QtCore.QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QtCore.QEvent.Type.Paint and "first_paint" not in times:
+                times["first_paint"] = time.perf_counter() - started
+            return False
+
+    window = main.ServerManager()
+    times["window"] = time.perf_counter() - started
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+
+    def check_ready():
+        if window._startup_scan is None and window.sampler is not None and "first_paint" in times:
+            times["ready"] = time.perf_counter() - started
+            app.quit()
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(check_ready)
+    timer.start(1)
+    QtCore.QTimer.singleShot(30000, app.quit)
+    window.show()
+    app.exec()
+    window.sampler.stop()
+    window.supervisor.detach_all()
+    print(json.dumps(times))
+
+
+def import_breakdown(top):
+    """Самые долгие импорты при загрузке main.py (python -X importtime), по суммарному времени."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match and len(match.group(3)) <= 3:  # только импорты верхнего уровня и их прямые зависимости
+            rows.append((int(match.group(2)) / 1000, len(match.group(3)) // 2, match.group(4)))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--config", help="config.json для запуска (по умолчанию — рядом с программой)")
+    parser.add_argument("--offscreen", action="store_true", help="без настоящего окна (QT_QPA_PLATFORM=offscreen)")
+    parser.add_argument("--top", type=int, default=15, help="сколько самых долгих импортов показать")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.config)
+
+    from core import boot
+    env = dict(os.environ)
+    if args.offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    command = [sys.executable, os.path.abspath(__file__), "--child"]
+    if args.config:
+        command += ["--config", os.path.abspath(args.config)]
+    runs = []
+    for i in range(args.runs):
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+        if result.returncode != 0 or not result.stdout.strip():
+            print(result.stderr, file=sys.stderr)
+            return 1
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        print(f"  #{i + 1}: " + ", ".join(f"{key} {value * 1000:.0f} мс" for key, value in runs[-1].items()))
+
+    print()
+    print(f"{'этап':<14} {'медиана, мс':>12} {'p95, мс':>9}")
+    titles = {"import": "импорт", "window": "окно создано", "first_paint": "первый кадр", "ready": "готов"}
+    for key, title in titles.items():
+        values = [run[key] * 1000 for run in runs if key in run]
+        if values:
+            print(f"{title:<14} {statistics.median(values):>12.0f} {boot.percentile(values, 0.95):>9.0f}")
+
+    print()
+    print("Самые долгие импорты (суммарно, мс):")
+    for cumulative, level, name in import_breakdown(args.top):
+        print(f"  {cumulative:8.1f}  {'  ' * level}{name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Логика менеджера серверов, не зависящая от виджетов."""
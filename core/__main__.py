@@ -0,0 +1,453 @@
+"""Менеджер серверов без окна: python -m core <команда> (или main.py --cli <команда>).
+
+Команды работают с той же папкой серверов и config.json, что и окно, и с теми
+же процессами-посредниками: запущенный отсюда сервер виден в окне и наоборот.
+daemon держит серверы под присмотром (автоперезапуск, пинг) без Qt.
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+
+from core import installer, network, players, properties, registry, sessions, watchdog
+from core.config import load_config, servers_dir
+from core.ingest import FLUSH_INTERVAL_MS
+from core.supervisor import Supervisor, build_launch_args
+
+RESCAN_SECONDS = 10  # как часто daemon проверяет папку серверов и ищет запущенные не им серверы
+
+
+class Output:
+    """Печатает строки консолей серверов, появившиеся с прошлого вызова."""
+
+    def __init__(self, prefix=False):
+        self.prefix = prefix
+        self._seen = {}
+
+    def skip(self, runtime):
+        self._seen[runtime.name] = runtime.console.total
+
+    def flush(self, runtime):
+        console = runtime.console
+        first = console.first_index
+        seen = max(self._seen.get(runtime.name, first), first)
+        for line in console.lines(seen - first, console.total - seen):
+            print(f"[{runtime.name}] {line}" if self.prefix else line, flush=True)
+        self._seen[runtime.name] = console.total
+
+
+class Manager:
+    """Supervisor с настройками из config.json и серверами из папки серверов."""
+
+    def __init__(self, config):
+        self.config = config
+        self.servers_dir = servers_dir(config)
+        self.registry = registry.ServerRegistry(self.servers_dir)
+        self.supervisor = Supervisor()
+        self.supervisor.configure(config)
+
+    def servers(self):
+        """(имя, папка) известных серверов; папка перечитывается через кэш реестра."""
+        self.registry.scan()
+        return [(info.name, info.path) for info in self.registry.servers()]
+
+    def runtime(self, name):
+        """Состояние сервера с подключением к нему, если он уже работает."""
+        path = registry.server_path(self.servers_dir, name)
+        if not registry.is_server_dir(path):
+            raise SystemExit(f"Сервер не найден: {name}")
+        if self.supervisor.discover([(name, path)]):
+            self.settle()
+        return self.supervisor.runtime(name, path)
+
+    def settle(self, quiet=0.15, timeout=2):
+        """Ждёт, пока после подключения дойдёт последний вывод серверов, чтобы не печатать его как новый."""
+        deadline = time.monotonic() + timeout
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline and time.monotonic() - quiet_since < quiet:
+            if any(update.lines for _, update in self.supervisor.poll()):
+                quiet_since = time.monotonic()
+            time.sleep(FLUSH_INTERVAL_MS / 1000)
+
+    def launch_args(self, runtime):
+        java_path, max_ram_gb, profile = self.config.launch_defaults(runtime.name)
+        return build_launch_args(runtime.path, java_path, max_ram_gb, profile=profile)
+
+    def start(self, runtime):
+        if runtime.is_running():
+            return False
+        runtime.start(self.launch_args(runtime))
+        return True
+
+    def run_until(self, condition, output=None, timeout=None):
+        """Крутит poll() с частотой окна, пока condition() не станет истинным; False — по таймауту."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while not condition():
+            if deadline and time.monotonic() > deadline:
+                return False
+            for runtime, update in self.supervisor.poll():
+                if output and update.lines:
+                    output.flush(runtime)
+            time.sleep(FLUSH_INTERVAL_MS / 1000)
+        return True
+
+
+def cmd_list(manager, args):
+    manager.supervisor.discover(manager.servers())
+    for name, path in manager.servers():
+        runtime = manager.supervisor.runtime(name, path)
+        players = f", игроков {len(runtime.players)}" if runtime.is_running() else ""
+        print(f"{name:<24} {runtime.status}{players}")
+    return 0
+
+
+def cmd_start(manager, args):
+    runtime = manager.runtime(args.name)
+    if not manager.start(runtime):
+        print(f"{args.name}: уже запущен")
+        return 0
+    if args.follow:
+        return cmd_console(manager, args, runtime)
+    output = Output()
+    # Дожидаемся готовности, чтобы сообщить об ошибке запуска; сервер останется работать
+    manager.run_until(lambda: runtime.status != "starting", output if args.verbose else None, args.timeout)
+    print(f"{args.name}: {runtime.status}")
+    return 0 if runtime.status in ("starting", "running") else 1
+
+
+def cmd_stop(manager, args):
+    runtime = manager.runtime(args.name)
+    if not runtime.is_running():
+        print(f"{args.name}: не запущен")
+        return 0
+    output = Output()
+    output.skip(runtime)
+    runtime.stop()
+    manager.run_until(lambda: runtime.transition is None and not runtime.is_running(), output)
+    return 0
+
+
+def cmd_restart(manager, args):
+    runtime = manager.runtime(args.name)
+    output = Output()
+    output.skip(runtime)
+    if not runtime.is_running():
+        manager.start(runtime)
+    else:
+        runtime.restart(manager.launch_args(runtime))
+    manager.run_until(lambda: runtime.transition is None and runtime.status != "starting", output, args.timeout)
+    print(f"{args.name}: {runtime.status}")
+    return 0 if runtime.status == "running" else 1
+
+
+def cmd_send(manager, args):
+    runtime = manager.runtime(args.name)
+    if not runtime.is_running():
+        print(f"{args.name}: не запущен", file=sys.stderr)
+        return 1
+    commands = [" ".join(args.command)] if args.command else [line.rstrip("\n") for line in sys.stdin]
+    output = Output()
+    output.skip(runtime)
+    batch = runtime.commands.submit([c for c in commands if c.strip()], "консоль")
+    manager.run_until(lambda: batch.finished, output)
+    # Ответ на команды без RCON приходит обычным выводом сервера — даём ему появиться
+    end = time.monotonic() + args.wait
+    manager.run_until(lambda: time.monotonic() > end, output)
+    return 1 if batch.failed else 0
+
+
+def cmd_console(manager, args, runtime=None):
+    runtime = runtime or manager.runtime(args.name)
+    output = Output()
+    output.flush(runtime)
+    try:
+        manager.run_until(lambda: not runtime.is_running() and runtime.transition is None, output)
+    except KeyboardInterrupt:
+        pass  # сервер продолжает работать
+    return 0
+
+
+def cmd_port(manager, args):
+    runtime = manager.runtime(args.name)
+    if registry.server_executable(runtime.path) == registry.BEDROCK_EXECUTABLE:
+        print("Bedrock-сервер работает по UDP — проверка недоступна", file=sys.stderr)
+        return 2
+    service = network.NetworkService()
+    port = network.server_port(runtime.path, 25565)
+    test = network.self_test(port, service.addresses() + service.addresses(ipv6=True))
+    print(network.describe_test(test))
+    return 0 if all(ok for ok, _ in test.reachable.values()) else 1
+
+
+def cmd_props(manager, args):
+    """Показать server.properties сервера или записать ключ=значение в несколько серверов."""
+    known = dict(manager.servers())
+    names = list(known) if args.servers == "all" else [n for n in args.servers.split(",") if n]
+    missing = [name for name in names if name not in known]
+    if missing:
+        raise SystemExit(f"Сервер не найден: {', '.join(missing)}")
+    if not args.assignments:
+        for name in names:
+            props = properties.load(known[name])
+            if len(names) > 1:
+                print(f"=== {name}")
+            for key, value in props.as_dict().items():
+                print(f"{key}={value}")
+            for problem in props.problems():
+                print(f"! {problem}", file=sys.stderr)
+        return 0
+    updates = {}
+    for assignment in args.assignments:
+        key, sep, value = assignment.partition("=")
+        if not sep or not key:
+            print(f"Ожидается ключ=значение: {assignment}", file=sys.stderr)
+            return 2
+        updates[key.strip()] = value.strip()
+    changes, errors = properties.plan_changes([known[name] for name in names], updates)
+    if errors:
+        print("\n".join(errors), file=sys.stderr)
+        return 2
+    if not changes:
+        print("Ничего не изменится")
+        return 0
+    print(properties.format_diff(changes))
+    if args.dry_run:
+        return 0
+    failed = properties.apply_changes(changes)
+    for path, error in failed.items():
+        print(f"Не изменён {os.path.basename(path)}: {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_players(manager, args):
+    """Синхронизировать белый список или баны нескольких серверов со списком из файла (или stdin)."""
+    known = dict(manager.servers())
+    names = list(known) if args.servers == "all" else [n for n in args.servers.split(",") if n]
+    missing = [name for name in names if name not in known]
+    if missing:
+        raise SystemExit(f"Сервер не найден: {', '.join(missing)}")
+    if args.file and args.file != "-":
+        entries, problems = players.read_import(args.file)
+    else:
+        entries, problems = players.parse_import(sys.stdin.read())
+    for problem in problems:
+        print(f"! {problem}", file=sys.stderr)
+    plans, errors = players.plan_sync([known[name] for name in names], entries, args.list,
+                                      "replace" if args.replace else "add", args.reason)
+    if errors:
+        print("\n".join(errors), file=sys.stderr)
+    if not plans:
+        print("Ничего не изменится")
+        return 1 if errors else 0
+    print(players.format_plans(plans))
+    if args.dry_run:
+        return 0
+    failed = 0
+    batches = []
+    for plan in plans:
+        name = os.path.basename(plan.server_path)
+        try:
+            batch = players.apply_sync(plan, manager.runtime(name))
+        except Exception as e:
+            print(f"Не обновлён {name}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        if batch is not None:
+            batches.append(batch)
+    # Запущенные серверы получают команды через очередь — дожидаемся её
+    manager.run_until(lambda: all(batch.finished for batch in batches))
+    for batch in batches:
+        for command, reason in batch.failed[:5]:
+            print(f"! {command}: {reason}", file=sys.stderr)
+    return 1 if failed or errors or any(batch.failed for batch in batches) else 0
+
+
+def cmd_sessions(manager, args):
+    """Сводка по сессиям игроков сервера за последние дни (или отдельные сессии игрока)."""
+    path = registry.server_path(manager.servers_dir, args.name)
+    if not registry.is_server_dir(path):
+        raise SystemExit(f"Сервер не найден: {args.name}")
+    until = time.time()
+    since = until - args.days * 86400 if args.days else None
+    found = sessions.read_sessions(path, since, until, args.player)
+    if not found:
+        print("Сессий нет")
+        return 0
+    if args.player:
+        for session in found:
+            left = time.strftime("%H:%M", time.localtime(session.left)) if session.left else "онлайн"
+            duration = (session.left or until) - session.joined
+            print(f"{time.strftime('%d.%m.%Y %H:%M', time.localtime(session.joined))} – {left}"
+                  f"  {watchdog.format_duration(duration)}")
+    summary = sessions.summarize(found, since, until)
+    print(f"Сессий: {summary.sessions}, игроков: {summary.players}, всего {watchdog.format_duration(summary.total)}, "
+          f"в среднем {watchdog.format_duration(summary.average)}")
+    print(f"Пик онлайна: {summary.peak} ({time.strftime('%d.%m.%Y %H:%M', time.localtime(summary.peak_time))})")
+    if not args.player:
+        print("\nСамые активные:")
+        for player, seconds, count in sessions.top_players(found, since, until, args.top):
+            print(f"  {player:<16} {watchdog.format_duration(seconds):>12}  сессий: {count}")
+    if args.heatmap:
+        print("\nСреднее онлайн по часам:")
+        print("    " + "".join(f"{hour:>5}" for hour in range(24)))
+        for day, row in zip(("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"), sessions.heatmap(found, since, until)):
+            print(f"{day:<4}" + "".join(f"{value:5.1f}" for value in row))
+    return 0
+
+
+def cmd_install(manager, args):
+    if args.loader != "Bedrock" and not args.version:
+        print("Укажите версию Minecraft: --version 1.21.1", file=sys.stderr)
+        return 2
+
+    def progress(text, percent=None):
+        print(f"{text}" if percent is None else f"[{percent:3d}%] {text}", flush=True)
+
+    java_path = manager.config.get("java_path", "java")
+    path = installer.install_server(
+        manager.servers_dir, args.name, args.loader, args.version or "latest", java_path, progress)
+    print(path)
+    return 0
+
+
+def cmd_daemon(manager, args):
+    """Держит серверы под присмотром: сторож, пинг, очередь команд; вывод — в stdout."""
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+    supervisor = manager.supervisor
+    supervisor.start_probing(manager.config.get("ping_interval_seconds"))
+    if manager.config.get("player_sessions"):
+        supervisor.start_sessions()
+    output = Output(prefix=True)
+    attached = supervisor.discover(manager.servers())
+    manager.settle()
+    for runtime in attached:
+        output.skip(runtime)
+        print(f"[{runtime.name}] подключён ({runtime.status})", flush=True)
+    # Серверы из --autostart и с автозапуском в config.json
+    known = {name for name, _ in manager.servers()}
+    for name in dict.fromkeys(args.autostart + [n for n in manager.config.autostart() if n in known]):
+        runtime = manager.runtime(name)
+        if manager.start(runtime):
+            print(f"[{name}] запуск", flush=True)
+    last_scan = time.monotonic()
+    try:
+        while not stop:
+            if time.monotonic() - last_scan > RESCAN_SECONDS:
+                last_scan = time.monotonic()
+                changes = manager.registry.scan()
+                for name in changes.added:
+                    print(f"[{name}] новый сервер", flush=True)
+                for name in changes.removed:
+                    print(f"[{name}] папка сервера удалена", flush=True)
+                attached = supervisor.discover([(info.name, info.path) for info in manager.registry.servers()])
+                if attached:
+                    manager.settle()
+                for runtime in attached:
+                    output.skip(runtime)
+                    print(f"[{runtime.name}] подключён ({runtime.status})", flush=True)
+            for runtime, update in supervisor.poll():
+                if update.lines:
+                    output.flush(runtime)
+            time.sleep(FLUSH_INTERVAL_MS / 1000)
+    except KeyboardInterrupt:
+        pass
+    if args.stop_on_exit:
+        supervisor.stop_all()
+        manager.run_until(lambda: not supervisor.running() and all(
+            runtime.transition is None for runtime in supervisor.runtimes.values()), output)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core", description="Менеджер серверов Minecraft без окна")
+    parser.add_argument("--config", help="путь к config.json (по умолчанию рядом с программой)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="серверы и их статус").set_defaults(func=cmd_list)
+
+    p = sub.add_parser("start", help="запустить сервер (он продолжит работать после выхода)")
+    p.add_argument("name")
+    p.add_argument("--follow", action="store_true", help="показывать консоль до остановки сервера")
+    p.add_argument("--verbose", action="store_true", help="показывать вывод до готовности")
+    p.add_argument("--timeout", type=float, default=300, help="сколько ждать готовности, с")
+    p.set_defaults(func=cmd_start)
+
+    p = sub.add_parser("stop", help="остановить сервер (stop → terminate → kill)")
+    p.add_argument("name")
+    p.set_defaults(func=cmd_stop)
+
+    p = sub.add_parser("restart", help="перезапустить сервер")
+    p.add_argument("name")
+    p.add_argument("--timeout", type=float, default=300)
+    p.set_defaults(func=cmd_restart)
+
+    p = sub.add_parser("send", help="выполнить команду (без команды — строки из stdin)")
+    p.add_argument("name")
+    p.add_argument("command", nargs="*")
+    p.add_argument("--wait", type=float, default=1, help="сколько ещё показывать вывод после отправки, с")
+    p.set_defaults(func=cmd_send)
+
+    p = sub.add_parser("console", help="показывать консоль сервера (Ctrl+C — отключиться)")
+    p.add_argument("name")
+    p.set_defaults(func=cmd_console)
+
+    p = sub.add_parser("port", help="проверить порт сервера: занят ли он и доступен ли по адресам компьютера")
+    p.add_argument("name")
+    p.set_defaults(func=cmd_port)
+
+    p = sub.add_parser("props", help="показать или изменить server.properties одного или нескольких серверов")
+    p.add_argument("servers", help="имя, имена через запятую или all")
+    p.add_argument("assignments", nargs="*", metavar="ключ=значение")
+    p.add_argument("--dry-run", action="store_true", help="только показать, что изменится")
+    p.set_defaults(func=cmd_props)
+
+    p = sub.add_parser("players", help="синхронизировать белый список или баны серверов со списком игроков")
+    p.add_argument("servers", help="имя, имена через запятую или all")
+    p.add_argument("--from", dest="file", help="txt, csv (name,uuid) или json (whitelist.json и т.п.); без него — stdin")
+    p.add_argument("--list", choices=players.LISTS, default="whitelist")
+    p.add_argument("--replace", action="store_true", help="убрать из списка тех, кого нет в файле")
+    p.add_argument("--reason", default=players.BAN_REASON, help="причина бана")
+    p.add_argument("--dry-run", action="store_true", help="только показать, что изменится")
+    p.set_defaults(func=cmd_players)
+
+    p = sub.add_parser("sessions", help="статистика игроков сервера: сессии, пик онлайна, активные игроки")
+    p.add_argument("name")
+    p.add_argument("--days", type=float, default=7, help="за сколько последних дней (0 — за всё время)")
+    p.add_argument("--player", help="сессии одного игрока")
+    p.add_argument("--top", type=int, default=10, help="сколько самых активных игроков показать")
+    p.add_argument("--heatmap", action="store_true", help="среднее онлайн по дням недели и часам")
+    p.set_defaults(func=cmd_sessions)
+
+    p = sub.add_parser("install", help="установить новый сервер")
+    p.add_argument("name")
+    p.add_argument("--loader", choices=installer.LOADERS, default="Paper")
+    p.add_argument("--version", help="версия Minecraft (для Bedrock не нужна — ставится последняя)")
+    p.set_defaults(func=cmd_install)
+
+    p = sub.add_parser("daemon", help="присматривать за серверами без окна")
+    p.add_argument("--autostart", type=lambda s: [n for n in s.split(",") if n], default=[],
+                   help="серверы через запятую, которые запустить, если они не работают")
+    p.add_argument("--stop-on-exit", action="store_true", help="останавливать серверы при завершении")
+    p.set_defaults(func=cmd_daemon)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    manager = Manager(load_config(args.config))
+    for problem in manager.config.problems:
+        print(f"Настройки: {problem}", file=sys.stderr)
+    try:
+        return args.func(manager, args)
+    except Exception as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        manager.supervisor.detach_all()
+        manager.config.flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
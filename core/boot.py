@@ -0,0 +1,72 @@
+"""Время запуска сервера по этапам и его история.
+
+Отсчёт идёт от нажатия «Старт» (вызова ServerRuntime.start): процесс создан,
+первая строка вывода, загрузка мира, подготовка точки спавна, готовность.
+Каждый запуск дописывается в <сервер>/.msm/boots.jsonl.
+"""
+import math
+import os
+
+from core import bridge
+from core.config import append_jsonl, read_jsonl
+
+# Этапы в порядке наступления и их названия для интерфейса
+PHASES = ("spawned", "first_output", "loading", "spawn", "ready")
+PHASE_TITLES = {
+    "spawned": "процесс создан",
+    "first_output": "первый вывод",
+    "loading": "загрузка мира",
+    "spawn": "подготовка спавна",
+    "ready": "готов",
+}
+BOOTS_FILE = "boots.jsonl"
+BOOTS_MAX_BYTES = 256 * 1024
+
+
+def boots_path(server_path):
+    return os.path.join(server_path, bridge.STATE_DIR, BOOTS_FILE)
+
+
+def make_record(launched_at, phases, args=None):
+    """Запись о запуске: этапы в секундах от launched_at; без "ready" запуск не удался."""
+    return {
+        "launched_at": launched_at,
+        "phases": {
+            phase: round(phases[phase] - launched_at, 3)
+            for phase in PHASES if phases.get(phase) is not None
+        },
+        "ok": phases.get("ready") is not None,
+        "args": args,
+    }
+
+
+def append_record(server_path, record):
+    append_jsonl(boots_path(server_path), record, BOOTS_MAX_BYTES)
+
+
+def read_records(server_path):
+    return read_jsonl(boots_path(server_path))
+
+
+def percentile(values, fraction):
+    """Значение, ниже которого лежит указанная доля (ближайший ранг); None для пустого списка."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summarize(records):
+    """Медиана и p95 каждого этапа по успешным запускам: {этап: (медиана, p95, число)}."""
+    import statistics  # нужен только окну информации и бенчмарку — не при запуске менеджера
+    summary = {}
+    for phase in PHASES:
+        values = [r["phases"][phase] for r in records if r.get("ok") and phase in r.get("phases", {})]
+        if values:
+            summary[phase] = (statistics.median(values), percentile(values, 0.95), len(values))
+    return summary
+
+
+def format_record(record):
+    parts = [f"{PHASE_TITLES[phase]} {record['phases'][phase]:.1f} с" for phase in PHASES if phase in record["phases"]]
+    return ", ".join(parts) + ("" if record.get("ok") else " — не запустился")
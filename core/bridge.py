@@ -0,0 +1,390 @@
+"""Процесс-посредник сервера, живущий отдельно от менеджера.
+
+Менеджер запускает посредника отсоединённым, а тот уже запускает сам сервер
+и держит его stdin/stdout. Консоль раздаётся клиентам по локальному TCP-сокету,
+адрес и токен записываются в <сервер>/.msm/bridge.json. Поэтому закрытие или
+обновление менеджера не останавливает серверы: при следующем запуске он
+находит файл состояния, подключается заново и получает хвост последнего вывода.
+
+Запуск вручную: python -m core.bridge <папка сервера> -- <команда сервера...>
+"""
+import json
+import os
+import secrets
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+STATE_DIR = ".msm"
+STATE_FILE = "bridge.json"
+LOG_FILE = "bridge.log"
+TAIL_BYTES = 256 * 1024  # сколько последнего вывода отдаётся при переподключении
+CLIENT_BACKLOG_BYTES = 8 * 1024 * 1024  # клиент, отставший больше чем на столько, отключается
+LINGER_SECONDS = 5  # после завершения сервера посредник ещё немного ждёт клиентов
+
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+DETACHED_PROCESS = getattr(subprocess, "DETACHED_PROCESS", 0)
+CREATE_NEW_PROCESS_GROUP = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+
+# --- Кадры протокола: тип (1 байт), длина (4 байта), данные ---
+# посредник -> клиент
+HELLO = b"h"
+STDOUT = b"o"
+STDERR = b"e"
+EXIT = b"x"
+# клиент -> посредник
+INPUT = b"i"
+TERMINATE = b"t"
+KILL = b"k"
+META = b"m"
+
+_HEADER = struct.Struct(">cI")
+
+
+def send_frame(sock, kind, payload=b""):
+    sock.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """Читает один кадр; возвращает (тип, данные) или None, если соединение закрыто."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    kind, length = _HEADER.unpack(header)
+    payload = _recv_exact(sock, length) if length else b""
+    if payload is None:
+        return None
+    return kind, payload
+
+
+# --- Файл состояния ---
+def state_path(server_path):
+    return os.path.join(server_path, STATE_DIR, STATE_FILE)
+
+
+def read_state(server_path):
+    try:
+        with open(state_path(server_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_state(server_path, state):
+    path = state_path(server_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def clear_state(server_path):
+    try:
+        os.remove(state_path(server_path))
+    except OSError:
+        pass
+
+
+# --- Запуск посредника ---
+def bridge_command(server_path, args):
+    if getattr(sys, "frozen", False):
+        # Собранный exe запускает сам себя в режиме посредника
+        return [sys.executable, "--bridge", server_path, "--", *args]
+    return [sys.executable, "-m", "core.bridge", server_path, "--", *args]
+
+
+def launch(server_path, args):
+    """Запускает посредника отсоединённым от менеджера и возвращает его Popen."""
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = root + os.pathsep + env.get("PYTHONPATH", "")
+    return subprocess.Popen(
+        bridge_command(server_path, args),
+        cwd=server_path,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        env=env,
+        **kwargs,
+    )
+
+
+# --- Сторона посредника ---
+class _Client:
+    """Подключённый клиент с собственной очередью отправки.
+
+    Медленный клиент не должен тормозить чтение вывода сервера: иначе java
+    упрётся в заполненный pipe и встанет.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+        self._frames = deque()
+        self._bytes = 0
+        self._cond = threading.Condition()
+        threading.Thread(target=self._send_loop, daemon=True).start()
+
+    def send(self, kind, payload=b""):
+        with self._cond:
+            if self.closed:
+                return
+            if self._bytes + len(payload) > CLIENT_BACKLOG_BYTES:
+                self._close_locked()
+                return
+            self._frames.append((kind, payload))
+            self._bytes += len(payload)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._close_locked()
+
+    def _close_locked(self):
+        if not self.closed:
+            self.closed = True
+            self._cond.notify()
+            try:
+                self.conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.conn.close()
+
+    def _send_loop(self):
+        while True:
+            with self._cond:
+                while not self._frames and not self.closed:
+                    self._cond.wait()
+                if self.closed:
+                    return
+                kind, payload = self._frames.popleft()
+                self._bytes -= len(payload)
+            try:
+                send_frame(self.conn, kind, payload)
+            except OSError:
+                self.close()
+                return
+
+
+class BridgeHost:
+    def __init__(self, server_path, args):
+        self.server_path = server_path
+        self.args = args
+        self.token = secrets.token_hex(16)
+        self.started_at = time.time()
+        self.child = None
+        self.spawned_at = None
+        self.port = None
+        self.exit_code = None
+        self.meta = {}
+        self._lock = threading.Lock()
+        self._stdin_lock = threading.Lock()
+        self._clients = []
+        self._tail = deque()
+        self._tail_bytes = 0
+        self._tail_trimmed = False
+
+    def run(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(8)
+        try:
+            self.child = subprocess.Popen(
+                self.args,
+                cwd=self.server_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                creationflags=CREATE_NO_WINDOW,
+            )
+        except OSError as e:
+            write_state(self.server_path, {"pid": os.getpid(), "error": str(e)})
+            return 1
+        self.spawned_at = time.time()
+        self.port = listener.getsockname()[1]
+        write_state(self.server_path, self._state())
+        threading.Thread(target=self._accept, args=(listener,), daemon=True).start()
+        pumps = [
+            threading.Thread(target=self._pump, args=(self.child.stdout, STDOUT), daemon=True),
+            threading.Thread(target=self._pump, args=(self.child.stderr, STDERR), daemon=True),
+        ]
+        for pump in pumps:
+            pump.start()
+        for pump in pumps:
+            pump.join()
+        code = self.child.wait()
+        # Сначала файл состояния, потом кадр: менеджер не должен переподключиться к завершённому серверу
+        write_state(self.server_path, self._state(exit_code=code, exited_at=time.time()))
+        with self._lock:
+            self.exit_code = code
+            for client in self._clients:
+                client.send(EXIT, str(code).encode())
+        time.sleep(LINGER_SECONDS)
+        return 0
+
+    def _state(self, **extra):
+        state = {
+            "pid": os.getpid(),
+            "child_pid": self.child.pid,
+            "started_at": self.started_at,
+            "spawned_at": self.spawned_at,
+            "args": self.args,
+            # Адрес остаётся и после выхода: запустивший клиент ещё успевает забрать вывод
+            "port": self.port,
+            "token": self.token,
+        }
+        state.update(extra)
+        return state
+
+    def _hello(self):
+        return json.dumps({
+            "pid": os.getpid(),
+            "child_pid": self.child.pid,
+            "started_at": self.started_at,
+            "spawned_at": self.spawned_at,
+            "exit_code": self.exit_code,
+            "meta": self.meta,
+        }).encode()
+
+    def _pump(self, pipe, kind):
+        while True:
+            try:
+                data = pipe.read1(65536)
+            except (OSError, ValueError):
+                break
+            if not data:
+                break
+            with self._lock:
+                self._tail.append((kind, data))
+                self._tail_bytes += len(data)
+                while self._tail_bytes > TAIL_BYTES and len(self._tail) > 1:
+                    _, old = self._tail.popleft()
+                    self._tail_bytes -= len(old)
+                    self._tail_trimmed = True
+                for client in self._clients:
+                    client.send(kind, data)
+                self._clients = [client for client in self._clients if not client.closed]
+
+    def _replay(self):
+        """Хвост вывода; если начало обрезано, первая неполная строка каждого потока отбрасывается."""
+        cut = {STDOUT, STDERR} if self._tail_trimmed else set()
+        for kind, data in self._tail:
+            if kind in cut:
+                newline = data.find(b"\n")
+                if newline < 0:
+                    continue
+                cut.discard(kind)
+                data = data[newline + 1:]
+            if data:
+                yield kind, data
+
+    def _accept(self, listener):
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _read_token(self, conn):
+        conn.settimeout(5)
+        data = b""
+        while not data.endswith(b"\n") and len(data) < 128:
+            chunk = conn.recv(1)
+            if not chunk:
+                return None
+            data += chunk
+        conn.settimeout(None)
+        return data.strip().decode("ascii", "replace")
+
+    def _serve(self, conn):
+        try:
+            if self._read_token(conn) != self.token:
+                conn.close()
+                return
+        except OSError:
+            conn.close()
+            return
+        client = _Client(conn)
+        with self._lock:
+            client.send(HELLO, self._hello())
+            for kind, data in self._replay():
+                client.send(kind, data)
+            if self.exit_code is not None:
+                client.send(EXIT, str(self.exit_code).encode())
+            self._clients.append(client)
+        try:
+            while True:
+                frame = recv_frame(conn)
+                if frame is None:
+                    break
+                kind, payload = frame
+                if kind == INPUT:
+                    self._write_input(payload)
+                elif kind == TERMINATE:
+                    self._signal(self.child.terminate)
+                elif kind == KILL:
+                    self._signal(self.child.kill)
+                elif kind == META:
+                    with self._lock:
+                        self.meta.update(json.loads(payload.decode("utf-8")))
+        except (OSError, ValueError):
+            pass
+        client.close()
+
+    def _write_input(self, data):
+        with self._stdin_lock:
+            try:
+                self.child.stdin.write(data)
+                self.child.stdin.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _signal(self, method):
+        if self.child.poll() is None:
+            try:
+                method()
+            except OSError:
+                pass
+
+
+def main(argv):
+    if "--" not in argv or argv.index("--") != 1:
+        print("использование: python -m core.bridge <папка сервера> -- <команда сервера...>", file=sys.stderr)
+        return 2
+    server_path = os.path.abspath(argv[0])
+    args = argv[2:]
+    try:
+        return BridgeHost(server_path, args).run()
+    except Exception:
+        os.makedirs(os.path.join(server_path, STATE_DIR), exist_ok=True)
+        with open(os.path.join(server_path, STATE_DIR, LOG_FILE), "a", encoding="utf-8") as f:
+            f.write(traceback.format_exc())
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
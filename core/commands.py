@@ -0,0 +1,173 @@
+"""Очередь команд сервера: пакеты, макросы и ограничение частоты.
+
+Команды уходят не быстрее заданной частоты (корзина токенов), чтобы пакет
+из сотен команд не отнимал у сервера тики. Очередь продвигается из
+ServerRuntime.poll(); если включён RCON, готовые к отправке команды уходят
+одним заданием фонового потока и по ответам видно, какие из них не выполнились.
+"""
+import re
+import threading
+import time
+from collections import deque
+
+DEFAULT_RATE = 20  # команд в секунду
+FAILURE_MARKERS = re.compile(r"Unknown or incomplete command|Unknown command|Incorrect argument|Expected ")
+WAIT_COMMAND = re.compile(r"wait\s+(\d+(?:\.\d+)?)$")  # псевдокоманда макроса: пауза в секундах
+
+# Встроенные макросы; пользовательские задаются в config.json, ключ "macros"
+MACROS = {
+    "Включить белый список": ["whitelist on"],
+    "Перезагрузка датапаков": ["reload"],
+    "Заморозить время": ["tick freeze"],
+    "Сохранить мир": ["save-all flush"],
+}
+
+
+def expand_macro(lines, **params):
+    """Подставляет параметры вида {player} и выбрасывает пустые строки и комментарии."""
+    commands = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        commands.append(line.format_map(params) if params else line)
+    return commands
+
+
+class CommandBatch:
+    """Пакет команд и его прогресс."""
+
+    def __init__(self, commands, name=None, callback=None):
+        self.name = name or (commands[0] if len(commands) == 1 else f"{len(commands)} команд")
+        self.commands = list(commands)
+        self.callback = callback  # вызывается из poll() по завершении, аргумент — сам пакет
+        self.total = sum(1 for command in self.commands if not WAIT_COMMAND.match(command))
+        self.sent = 0
+        self.done = 0
+        self.failed = []  # (команда, причина)
+        self.results = {}  # индекс команды -> ответ RCON
+        self.cancelled = False
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+        self._position = 0
+        self._in_flight = 0
+
+    @property
+    def finished(self):
+        return self.cancelled or (self._position >= len(self.commands) and self._in_flight == 0)
+
+    def progress(self):
+        return f"{self.done + len(self.failed)}/{self.total}"
+
+    def abort(self, reason):
+        """Отмечает неотправленные команды как невыполненные и завершает пакет."""
+        with self._lock:
+            for command in self.commands[self._position:]:
+                if not WAIT_COMMAND.match(command):
+                    self.failed.append((command, reason))
+            self._position = len(self.commands)
+
+    def _complete(self, indexes, results):
+        """Ответы RCON на отправленные команды (results=None — соединение не удалось)."""
+        with self._lock:
+            self._in_flight -= len(indexes)
+            for i, index in enumerate(indexes):
+                command = self.commands[index]
+                if results is None:
+                    self.failed.append((command, "нет ответа по RCON"))
+                    continue
+                self.results[index] = results[i]
+                if FAILURE_MARKERS.search(results[i]):
+                    self.failed.append((command, results[i].strip()))
+                else:
+                    self.done += 1
+
+
+class CommandQueue:
+    """Очередь пакетов одного сервера; выполняется по одному пакету за раз в порядке поступления."""
+
+    def __init__(self, runtime, rate=DEFAULT_RATE):
+        self.runtime = runtime
+        self.rate = rate
+        self.batches = deque()
+        self._tokens = float(rate)
+        self._last = time.monotonic()
+        self._resume_at = 0.0
+
+    def submit(self, commands, name=None, callback=None):
+        """Ставит команды в очередь и возвращает CommandBatch для отслеживания."""
+        batch = CommandBatch(commands, name, callback)
+        self.batches.append(batch)
+        return batch
+
+    def cancel_all(self):
+        """Отменяет все пакеты; уже отправленные команды не отзываются."""
+        for batch in self.batches:
+            batch.cancelled = True
+
+    def is_active(self):
+        return bool(self.batches)
+
+    def pending(self):
+        return sum(batch.total - batch.sent for batch in self.batches)
+
+    def tick(self):
+        """Отправляет команды, на которые хватает токенов; возвращает строку для консоли или None."""
+        now = time.monotonic()
+        self._tokens = min(float(self.rate), self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if not self.batches:
+            return None
+        batch = self.batches[0]
+        if not self.runtime.is_running():
+            batch.abort("сервер не запущен")
+        elif self.runtime.transition is not None or self.runtime.status == "starting":
+            pass  # пакет ждёт, пока сервер загрузится или перезапустится
+        elif not batch.cancelled and now >= self._resume_at:
+            self._send(batch, now)
+        if batch.finished:
+            self.batches.popleft()
+            if batch.callback:
+                batch.callback(batch)
+            return self._summary(batch)
+        return None
+
+    def _send(self, batch, now):
+        indexes = []
+        while batch._position < len(batch.commands) and self._tokens >= 1:
+            command = batch.commands[batch._position]
+            wait = WAIT_COMMAND.match(command)
+            if wait:
+                batch._position += 1
+                self._resume_at = now + float(wait.group(1))
+                break
+            indexes.append(batch._position)
+            batch._position += 1
+            batch.sent += 1
+            self._tokens -= 1
+        if not indexes:
+            return
+        commands = [batch.commands[i] for i in indexes]
+        if self.runtime.rcon_client() is None:
+            # Через консоль ответа нет: выполненными считаются команды, которые удалось записать
+            for command in commands:
+                ok = self.runtime.send(command)
+                with batch._lock:
+                    if ok:
+                        batch.done += 1
+                    else:
+                        batch.failed.append((command, "сервер не принимает команды"))
+            return
+        with batch._lock:
+            batch._in_flight += len(indexes)
+        self.runtime.execute(commands, lambda results: batch._complete(indexes, results))
+
+    def _summary(self, batch):
+        if batch.total <= 1 and not batch.failed and not batch.cancelled:
+            return None
+        text = f"[Менеджер] Пакет «{batch.name}»: выполнено {batch.done} из {batch.total}"
+        if batch.failed:
+            text += f", ошибок {len(batch.failed)} (первая: {batch.failed[0][0]} — {batch.failed[0][1]})"
+        if batch.cancelled:
+            text += ", отменён"
+        return text
@@ -0,0 +1,389 @@
+"""Общие настройки менеджера: config.json рядом с программой.
+
+Настройки загружаются один раз (load_config отдаёт общий ConfigStore на
+файл) и разделяются окном, Supervisor и командной строкой. Изменения
+сохраняются в фоне не чаще раза в SAVE_DELAY секунд; файл пишется во
+временный и подменяется атомарно, поэтому сбой посреди записи оставляет
+прежний config.json целым.
+
+Тот же файл может держать открытым и другой процесс (окно и daemon
+`python -m core`). Поэтому перед записью файл перечитывается и в него
+переносятся только ключи (и разделы серверов), изменённые этим процессом, —
+изменения другого процесса не затираются, а подхватываются в память.
+get() отдаёт копии списков и словарей: правка на месте без set() не
+сохранилась бы.
+
+Кроме общих настроек есть разделы серверов ("servers": {имя: {...}}) —
+память, java, профиль JVM и автозапуск для отдельного сервера. Параметры
+запуска из папки сервера (.msm/settings.json) важнее раздела, раздел —
+важнее общих настроек.
+"""
+import atexit
+import copy
+import json
+import os
+import sys
+import threading
+
+CONFIG_FILE = "config.json"
+SAVE_DELAY = 1.0
+
+# Ключ -> (значение по умолчанию, допустимые типы); None по умолчанию — «не задано,
+# берётся значение по умолчанию того модуля, который читает настройку»
+SCHEMA = {
+    "servers_dir": (None, str),
+    "java_path": ("java", str),
+    "max_ram_gb": (5, int),
+    "launch_profile": ("default", str),
+    "advanced_option": (False, bool),
+    "selected_network": (None, str),
+    "selected_ip": (None, str),
+    "known_servers": ([], list),
+    "macros": ({}, dict),
+    "metrics_history": (False, bool),
+    "ping_interval_seconds": (None, (int, float)),
+    "console_max_lines": (None, int),
+    "console_max_bytes": (None, int),
+    "stop_grace_seconds": (None, (int, float)),
+    "terminate_grace_seconds": (None, (int, float)),
+    "auto_restart": (True, bool),
+    "hang_probe_interval_seconds": (None, (int, float)),
+    "hang_probe_timeout_seconds": (None, (int, float)),
+    "command_rate": (None, (int, float)),
+    "player_sessions": (True, bool),
+    "servers": ({}, dict),
+}
+
+# Раздел сервера; None — как в общих настройках
+SERVER_SCHEMA = {
+    "java_path": (None, str),
+    "max_ram_gb": (None, int),
+    "launch_profile": (None, str),
+    "autostart": (False, bool),
+}
+
+
+def app_path(relative_path):
+    """Путь к файлу рядом с программой — и для собранного exe (PyInstaller), и для исходников."""
+    if hasattr(sys, "_MEIPASS"):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, relative_path)
+
+
+config_path = app_path(CONFIG_FILE)
+
+
+def default_servers_dir():
+    return os.path.abspath("servers")
+
+
+def _valid(value, types):
+    if value is None:
+        return True
+    if isinstance(value, bool) and bool not in (types if isinstance(types, tuple) else (types,)):
+        return False  # bool — подкласс int, но True вместо числа — ошибка в файле
+    return isinstance(value, types)
+
+
+def check_value(key, value, schema=SCHEMA):
+    """Исключение, если значение не подходит ключу схемы; неизвестные ключи не проверяются."""
+    if key in schema and not _valid(value, schema[key][1]):
+        raise Exception(f"Неверное значение настройки {key}: {value!r}")
+
+
+def write_json(path, data, indent=2):
+    """Атомарная запись: временный файл на том же диске, fsync и подмена.
+
+    indent=None пишет одной строкой — во много раз быстрее для больших списков.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, ensure_ascii=False, indent=indent))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def append_jsonl(path, record, max_bytes):
+    """Дописывает запись строкой JSON в журнал; ошибки записи молча пропускаются.
+
+    Если файл вырос больше max_bytes, в нём остаётся вторая половина (с целой
+    первой строкой) — так история не растёт бесконечно, а последние записи целы.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if os.path.getsize(path) > max_bytes:
+            with open(path, "rb") as f:
+                f.seek(-(max_bytes // 2), os.SEEK_END)
+                tail = f.read()
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(tail[tail.find(b"\n") + 1:])
+            os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def read_jsonl(path):
+    """Записи журнала append_jsonl(); испорченные строки пропускаются, нет файла — пустой список."""
+    records = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records
+
+
+def _detached(value):
+    """Копия списка или словаря: изменения в ней не попадают в настройки без set()."""
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+class ConfigStore:
+    """config.json в памяти: get/[]/set как у словаря, сохранение — отложенное и атомарное."""
+
+    def __init__(self, path=None):
+        self.path = path or config_path
+        self.exists = False
+        self.problems = []  # что пришлось исправить при загрузке
+        self._data = {}
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # запись файла — вне _lock, чтобы не задерживать set()
+        self._timer = None
+        self._dirty = False
+        self._changed = set()  # ключи, изменённые с последней записи
+        self._changed_servers = set()  # разделы серверов, изменённые с последней записи
+        self.writes = 0
+        self.load()
+
+    def _read(self):
+        """Проверенное содержимое файла и список исправлений; исключение, если файл не прочитать."""
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("ожидался объект JSON")
+        problems = []
+        for key, value in list(data.items()):
+            try:
+                check_value(key, value)
+            except Exception as e:
+                problems.append(str(e))
+                del data[key]
+        for name, section in list(data.get("servers", {}).items()):
+            if not isinstance(section, dict):
+                problems.append(f"Неверный раздел сервера {name}")
+                del data["servers"][name]
+                continue
+            for key, value in list(section.items()):
+                try:
+                    check_value(key, value, SERVER_SCHEMA)
+                except Exception as e:
+                    problems.append(f"{name}: {e}")
+                    del section[key]
+        return data, problems
+
+    def load(self):
+        data = {}
+        self.problems = []
+        self.exists = os.path.exists(self.path)
+        if self.exists:
+            try:
+                data, self.problems = self._read()
+            except (OSError, ValueError) as e:
+                # Испорченный файл не затираем молча — откладываем рядом и начинаем с настроек по умолчанию
+                broken = self.path + ".broken"
+                try:
+                    os.replace(self.path, broken)
+                except OSError:
+                    pass
+                self.problems.append(f"{os.path.basename(self.path)} не прочитан ({e}), сохранён как {broken}")
+                data = {}
+        data.setdefault("servers_dir", default_servers_dir())
+        with self._lock:
+            self._data = data
+
+    # --- Как словарь ---
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                return _detached(self._data[key])
+        if default is None and key in SCHEMA:
+            return copy.copy(SCHEMA[key][0])
+        return default
+
+    def __getitem__(self, key):
+        with self._lock:
+            return _detached(self._data[key])
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def set(self, key, value):
+        check_value(key, value)
+        with self._lock:
+            self._data[key] = _detached(value)
+            self._changed.add(key)
+        self.save()
+
+    def update(self, values=(), **kwargs):
+        values = dict(values, **kwargs)
+        for key, value in values.items():
+            check_value(key, value)
+        with self._lock:
+            self._data.update({key: _detached(value) for key, value in values.items()})
+            self._changed.update(values)
+        self.save()
+
+    def to_dict(self):
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    # --- Разделы серверов ---
+    def server(self, name):
+        """Раздел сервера, дополненный значениями по умолчанию (None — как в общих настройках)."""
+        settings = {key: default for key, (default, _) in SERVER_SCHEMA.items()}
+        with self._lock:
+            settings.update(self._data.get("servers", {}).get(name, {}))
+        return settings
+
+    def set_server(self, name, **values):
+        """Меняет раздел сервера; None удаляет переопределение."""
+        for key, value in values.items():
+            check_value(key, value, SERVER_SCHEMA)
+        with self._lock:
+            servers = self._data.setdefault("servers", {})
+            section = dict(servers.get(name, {}))
+            for key, value in values.items():
+                if value is None or value == SERVER_SCHEMA.get(key, (None,))[0]:
+                    section.pop(key, None)
+                else:
+                    section[key] = value
+            if section:
+                servers[name] = section
+            else:
+                servers.pop(name, None)
+            self._changed_servers.add(name)
+        self.save()
+
+    def launch_defaults(self, name):
+        """(java, память в ГБ, профиль JVM) сервера: раздел сервера или общие настройки."""
+        section = self.server(name)
+        return (
+            section["java_path"] or self.get("java_path") or "java",
+            section["max_ram_gb"] or self.get("max_ram_gb") or 5,
+            section["launch_profile"] or self.get("launch_profile") or "default",
+        )
+
+    def autostart(self):
+        """Имена серверов с автозапуском."""
+        with self._lock:
+            return [name for name, section in self._data.get("servers", {}).items() if section.get("autostart")]
+
+    # --- Сохранение ---
+    def save(self):
+        """Запланировать запись; серия изменений за SAVE_DELAY секунд — одна запись файла."""
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(SAVE_DELAY, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Записать сейчас, если есть несохранённые изменения (и при выходе)."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                data = copy.deepcopy(self._data)
+                changed, self._changed = self._changed, set()
+                changed_servers, self._changed_servers = self._changed_servers, set()
+                self._dirty = False
+            try:
+                data = self._merge(data, changed, changed_servers)
+                write_json(self.path, data)
+            except OSError:
+                with self._lock:
+                    self._dirty = True  # попробуем при следующем сохранении
+                    self._changed |= changed
+                    self._changed_servers |= changed_servers
+                raise
+            with self._lock:
+                # Изменения другого процесса — в память; то, что успели поменять во время записи, не трогаем
+                for key, value in data.items():
+                    if key == "servers" and key not in self._changed:
+                        servers = self._data.setdefault("servers", {})
+                        for name, section in value.items():
+                            if name not in self._changed_servers:
+                                servers[name] = section
+                        for name in list(servers):
+                            if name not in value and name not in self._changed_servers:
+                                del servers[name]
+                    elif key != "servers" and key not in self._changed:
+                        self._data[key] = value
+            self.exists = True
+            self.writes += 1
+
+    def _merge(self, data, changed, changed_servers):
+        """Файл на диске с изменениями этого процесса поверх; без файла — вся память."""
+        try:
+            merged, _ = self._read()
+        except (OSError, ValueError):
+            return data  # файла нет или он испорчен — пишем своё целиком
+        for key in changed:
+            if key in data:
+                merged[key] = data[key]
+        if changed_servers:
+            servers = merged.setdefault("servers", {})
+            for name in changed_servers:
+                section = data.get("servers", {}).get(name)
+                if section:
+                    servers[name] = section
+                else:
+                    servers.pop(name, None)
+        for key, value in data.items():
+            merged.setdefault(key, value)  # ключи, которых в файле ещё нет (значения по умолчанию)
+        return merged
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def load_config(path=None):
+    """Общий ConfigStore файла настроек: загружается при первом обращении."""
+    path = os.path.abspath(path or config_path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ConfigStore(path)
+            atexit.register(store.flush)
+        return store
+
+
+def save_config(config, path=None):
+    """Сохранить настройки: ConfigStore — отложенно, словарь — сразу (атомарно)."""
+    if isinstance(config, ConfigStore):
+        config.save()
+    else:
+        write_json(path or config_path, config)
+
+
+def servers_dir(config):
+    return config.get("servers_dir", default_servers_dir())
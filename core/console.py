@@ -0,0 +1,100 @@
+"""Кольцевой буфер строк консоли сервера."""
+
+DEFAULT_MAX_LINES = 10000
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _line_size(line):
+    return len(line.encode("utf-8", "replace")) + 1
+
+
+class ConsoleBuffer:
+    """Хранит последние строки вывода с ограничением по числу строк и по объёму.
+
+    Строки лежат в заранее выделенном кольце, поэтому добавление и доступ по
+    индексу стоят O(1) независимо от того, сколько строк уже прошло через буфер.
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_lines = max(1, int(max_lines))
+        self.max_bytes = max(1, int(max_bytes))
+        self._ring = [None] * self.max_lines
+        self._start = 0
+        self._count = 0
+        self._bytes = 0
+        # Сколько строк добавлено за всё время (абсолютный номер следующей строки)
+        self.total = 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("индекс строки вне буфера")
+        return self._ring[(self._start + index) % self.max_lines]
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._ring[(self._start + i) % self.max_lines]
+
+    @property
+    def first_index(self):
+        """Абсолютный номер самой старой строки, которая ещё хранится в буфере."""
+        return self.total - self._count
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def append(self, line):
+        if self._count == self.max_lines:
+            self._evict()
+        self._ring[(self._start + self._count) % self.max_lines] = line
+        self._count += 1
+        self._bytes += _line_size(line)
+        self.total += 1
+        # Самую новую строку оставляем всегда, даже если она одна больше лимита
+        while self._bytes > self.max_bytes and self._count > 1:
+            self._evict()
+
+    def extend(self, lines):
+        # Строки, которые всё равно вытеснятся этой же пачкой, не копируем — только учитываем
+        skipped = len(lines) - self.max_lines
+        if skipped > 0:
+            self.total += skipped
+            lines = lines[skipped:]
+        for line in lines:
+            self.append(line)
+
+    def lines(self, start, count):
+        """Возвращает до count строк начиная с относительного индекса start."""
+        start = max(0, start)
+        stop = min(self._count, start + count)
+        return [self._ring[(self._start + i) % self.max_lines] for i in range(start, stop)]
+
+    def clear(self):
+        self._ring = [None] * self.max_lines
+        self._start = 0
+        self._count = 0
+        self._bytes = 0
+
+    def set_limits(self, max_lines=None, max_bytes=None):
+        """Меняет лимиты, сохраняя самые новые строки."""
+        lines = list(self)
+        total = self.total
+        if max_lines is not None:
+            self.max_lines = max(1, int(max_lines))
+        if max_bytes is not None:
+            self.max_bytes = max(1, int(max_bytes))
+        self.clear()
+        self.extend(lines[-self.max_lines:])
+        self.total = total
+
+    def _evict(self):
+        line = self._ring[self._start]
+        self._ring[self._start] = None
+        self._start = (self._start + 1) % self.max_lines
+        self._count -= 1
+        self._bytes -= _line_size(line)
@@ -0,0 +1,377 @@
+"""Фоновые загрузки: части файла параллельно, докачка, повторы и проверка суммы.
+
+DownloadManager скачивает в фоновых потоках; каждая загрузка сначала
+запрашивает первый байт (Range: bytes=0-0), чтобы узнать размер и умеет ли
+сервер отдавать части. Большой файл делится на SEGMENTS частей, которые
+качаются одновременно прямо в <файл>.part; что уже скачано, записывается в
+<файл>.part.json, поэтому оборванная загрузка (и повторная после перезапуска)
+продолжается с того же места. Сетевые ошибки повторяются с нарастающей паузой.
+Готовый файл сверяется с SHA-256 или SHA-1 и только после этого получает
+своё имя.
+
+fetch() — то же самое для кода, которому нужно дождаться файла: он ждёт
+загрузку и сообщает прогресс через progress(текст, процент) из своего потока.
+"""
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+USER_AGENT = {"User-Agent": "Mozilla/5.0"}
+CHUNK_SIZE = 256 * 1024
+SEGMENTS = 4
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024  # файлы меньше качаются одним потоком
+RETRIES = 4
+BACKOFF_SECONDS = 1.0  # пауза перед повтором: 1, 2, 4, 8 с
+TIMEOUT = 30
+MAX_ACTIVE = 3  # загрузок одновременно; остальные ждут в очереди
+STATE_SAVE_SECONDS = 1.0
+
+
+class DownloadError(Exception):
+    """Ошибка, которую повтор не исправит (404, не та контрольная сумма)."""
+
+
+def _retryable(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code in (408, 429)
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+class Download:
+    """Одна загрузка и её состояние; создаётся DownloadManager.submit()."""
+
+    def __init__(self, url, path, sha256=None, sha1=None, segments=SEGMENTS):
+        self.url = url
+        self.path = path
+        self.sha256 = sha256.lower() if sha256 else None
+        self.sha1 = sha1.lower() if sha1 else None
+        self.segments = segments
+        self.status = "queued"  # queued, running, verifying, done, failed, cancelled
+        self.error = None
+        self.total = None  # байт; None — сервер не сообщил размер
+        self.received = 0
+        self.resumed = 0  # сколько байт взято из прошлой попытки
+        self.retries = 0
+        self.started_at = None
+        self.finished_at = None
+        self._parts = []  # [начало, конец или None, скачано]
+        self._ranged = False
+        self._validator = None  # ETag или Last-Modified — по ним понятно, что файл на сервере тот же
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()  # останавливает все части: отмена или ошибка одной из них
+        self._cancelled = False  # отменил пользователь
+        self._done = threading.Event()
+
+    @property
+    def part_path(self):
+        return self.path + ".part"
+
+    @property
+    def state_path(self):
+        return self.path + ".part.json"
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def percent(self):
+        """Процент готовности или None, если размер неизвестен."""
+        return int(self.received * 100 / self.total) if self.total else None
+
+    def speed(self):
+        """Средняя скорость, байт/с."""
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return (self.received - self.resumed) / elapsed if elapsed > 0 else 0.0
+
+    def cancel(self):
+        self._cancelled = True
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """True, если загрузка завершилась (успешно или нет)."""
+        return self._done.wait(timeout)
+
+    # --- Выполнение (в потоке DownloadManager) ---
+    def run(self):
+        self.status = "running"
+        self.started_at = time.monotonic()
+        try:
+            self._prepare()
+            self._fetch_parts()
+            self.status = "verifying"
+            self._verify()
+            os.replace(self.part_path, self.path)
+            self._remove(self.state_path)
+            self.status = "done"
+        except Exception as e:
+            if self._cancelled:
+                self.status = "cancelled"
+                self.error = "загрузка отменена"
+            else:
+                self.status = "failed"
+                self.error = str(e)
+        finally:
+            self.finished_at = time.monotonic()
+            self._done.set()
+
+    def _open(self, headers=None):
+        request = urllib.request.Request(self.url, headers=dict(USER_AGENT, **(headers or {})))
+        return urllib.request.urlopen(request, timeout=TIMEOUT)
+
+    def _probe(self):
+        """Размер файла, умеет ли сервер отдавать части и признак версии файла."""
+        for attempt in range(RETRIES + 1):
+            try:
+                with self._open({"Range": "bytes=0-0"}) as resp:
+                    validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+                    if resp.status == 206:
+                        total = (resp.headers.get("Content-Range") or "").rpartition("/")[2]
+                        return (int(total) if total.isdigit() else None), True, validator
+                    length = resp.headers.get("Content-Length")
+                    return (int(length) if length and length.isdigit() else None), False, validator
+            except Exception as e:
+                if not _retryable(e) or attempt == RETRIES:
+                    raise
+                self._backoff(attempt)
+
+    def _prepare(self):
+        total, ranged, validator = self._probe()
+        self.total = total
+        self._ranged = ranged and total is not None
+        self._validator = validator
+        if self._ranged and self._resume():
+            return
+        if self._ranged:
+            count = self.segments if total >= PARALLEL_MIN_BYTES else 1
+            size = -(-total // count)
+            self._parts = [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+        else:
+            self._parts = [[0, None, 0]]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.part_path, "wb") as f:
+            if self._ranged:
+                f.truncate(total)  # части пишутся каждая на своё место
+        self._save_state()
+
+    def _resume(self):
+        """Продолжает прошлую загрузку того же файла; False, если продолжать нечего."""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if (state.get("url") != self.url or state.get("total") != self.total
+                    or state.get("validator") != self._validator
+                    or os.path.getsize(self.part_path) != self.total):
+                return False
+            self._parts = [[int(start), int(end), int(done)] for start, end, done in state["parts"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self.received = self.resumed = sum(part[2] for part in self._parts)
+        return True
+
+    def _save_state(self):
+        if not self._ranged:
+            return  # без частей продолжить нельзя — и сохранять нечего
+        with self._lock:
+            state = {"url": self.url, "total": self.total, "validator": self._validator,
+                     "parts": [list(part) for part in self._parts]}
+        try:
+            with open(self.state_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+        except OSError:
+            pass
+
+    def _fetch_parts(self):
+        errors = []
+
+        def worker(part):
+            try:
+                self._fetch_part(part)
+            except Exception as e:
+                errors.append(e)
+                self._cancel.set()  # остальные части останавливаются, скачанное сохранится для докачки
+
+        threads = [threading.Thread(target=worker, args=(part,), daemon=True) for part in self._parts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(STATE_SAVE_SECONDS)
+                self._save_state()
+        self._save_state()
+        if errors:
+            raise errors[0]
+        if self._cancel.is_set():
+            raise DownloadError("загрузка отменена")
+        if self.total is not None and self.received != self.total:
+            raise DownloadError(f"скачано {self.received} байт из {self.total}")
+
+    def _fetch_part(self, part):
+        attempt = 0
+        while not self._cancel.is_set():
+            start, end, done = part
+            offset = start + done
+            if end is not None and offset > end:
+                return
+            if not self._ranged and done:
+                # Сервер не отдаёт части — после обрыва начинаем файл заново
+                with self._lock:
+                    self.received -= done
+                    part[2] = 0
+                offset = start
+            headers = {"Range": f"bytes={offset}-{end}"} if self._ranged else {}
+            try:
+                with self._open(headers) as resp, open(self.part_path, "r+b") as f:
+                    if self._ranged and resp.status != 206:
+                        raise DownloadError("сервер перестал отдавать файл частями")
+                    f.seek(offset)
+                    while not self._cancel.is_set():
+                        chunk = resp.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        if end is not None:
+                            chunk = chunk[:end + 1 - (start + part[2])]
+                        f.write(chunk)
+                        with self._lock:
+                            part[2] += len(chunk)
+                            self.received += len(chunk)
+                        attempt = 0  # данные идут — счётчик повторов с начала
+                last = end if end is not None else (self.total - 1 if self.total is not None else None)
+                if last is not None and start + part[2] <= last and not self._cancel.is_set():
+                    raise ConnectionError("соединение оборвалось")
+                return
+            except DownloadError:
+                raise
+            except Exception as e:
+                if not _retryable(e):
+                    raise DownloadError(f"{e}") from e
+                if attempt == RETRIES:
+                    raise DownloadError(f"не удалось скачать после {RETRIES} повторов: {e}") from e
+                self._backoff(attempt)
+                attempt += 1
+
+    def _backoff(self, attempt):
+        with self._lock:
+            self.retries += 1
+        self._cancel.wait(BACKOFF_SECONDS * 2 ** attempt)
+
+    def _verify(self):
+        if not (self.sha256 or self.sha1):
+            return
+        digest = hashlib.sha256() if self.sha256 else hashlib.sha1()
+        with open(self.part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        expected = self.sha256 or self.sha1
+        if digest.hexdigest() != expected:
+            # Испорченный файл не докачиваем — следующая попытка начнёт заново
+            self._remove(self.part_path)
+            self._remove(self.state_path)
+            raise DownloadError(f"контрольная сумма не совпала (ожидалась {expected}, получена {digest.hexdigest()})")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class DownloadManager:
+    """Очередь загрузок: не больше max_active одновременно, каждая — в своём потоке."""
+
+    def __init__(self, max_active=MAX_ACTIVE):
+        self._slots = threading.Semaphore(max_active)
+        self._lock = threading.Lock()
+        self._downloads = []
+
+    def submit(self, url, path, sha256=None, sha1=None, segments=SEGMENTS):
+        """Ставит загрузку в очередь и сразу возвращает Download для отслеживания."""
+        download = Download(url, path, sha256, sha1, segments)
+        with self._lock:
+            self._downloads = [d for d in self._downloads if not d.finished] + [download]
+        threading.Thread(target=self._run, args=(download,), daemon=True).start()
+        return download
+
+    def _run(self, download):
+        with self._slots:
+            if download._cancelled:
+                download.status = "cancelled"
+                download.error = "загрузка отменена"
+                download._done.set()
+                return
+            download.run()
+
+    def downloads(self):
+        """Загрузки, которые ещё идут или ждут очереди."""
+        with self._lock:
+            return [d for d in self._downloads if not d.finished]
+
+    def cancel_all(self):
+        for download in self.downloads():
+            download.cancel()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def manager():
+    """Общий DownloadManager программы."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DownloadManager()
+        return _manager
+
+
+def format_size(size):
+    return f"{size / (1024 * 1024):.1f} МБ"
+
+
+def fetch(url, path, progress=None, text="Скачивание...", sha256=None, sha1=None):
+    """Скачивает файл через общий менеджер и ждёт его; progress(текст, процент) — из этого потока.
+
+    Исключение из progress отменяет загрузку и пробрасывается дальше.
+    """
+    download = manager().submit(url, path, sha256, sha1)
+    reported = None
+    try:
+        while not download.wait(0.1):
+            if progress is not None and download.status == "running":
+                percent = download.percent()
+                # Сообщаем, только когда сдвинулся процент (или мегабайт при неизвестном размере)
+                step = percent if percent is not None else download.received // (1024 * 1024)
+                if step == reported:
+                    continue
+                reported = step
+                if percent is None:
+                    progress(f"{text} ({format_size(download.received)})")
+                else:
+                    progress(f"{text} ({percent}%, {format_size(download.received)} из "
+                             f"{format_size(download.total)}, {format_size(download.speed())}/с)", percent)
+    except BaseException:
+        download.cancel()
+        download.wait()
+        raise
+    if download.status != "done":
+        raise Exception(f"Не удалось скачать {os.path.basename(path)}: {download.error}")
+    if progress is not None:
+        progress(f"{text} (100%)", 100)
+    return download
+
+
+def read_checksum(url):
+    """Контрольная сумма из файла рядом с артефактом (Maven публикует .sha1 и .sha256); None, если её нет."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=USER_AGENT), timeout=TIMEOUT) as resp:
+            text = resp.read(1024).decode("ascii", "replace").split()
+    except (OSError, http.client.HTTPException):
+        return None
+    return text[0].lower() if text else None
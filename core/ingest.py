@@ -0,0 +1,39 @@
+"""Приём вывода процесса: сборка целых строк из кусков байт."""
+import codecs
+
+# Частота, с которой накопленные строки отдаются в консоль и парсеры (~30 Гц)
+FLUSH_INTERVAL_MS = 33
+
+
+class LineAssembler:
+    """Собирает целые строки из произвольно нарезанных кусков байт.
+
+    UTF-8 декодируется инкрементально, поэтому символ, разрезанный границей
+    куска, не теряется; незавершённая строка ждёт следующего куска.
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._tail = ""
+
+    def feed(self, data):
+        """Принимает кусок байт и возвращает список завершённых строк."""
+        text = self._tail + self._decoder.decode(data)
+        if not text:
+            return []
+        # "\r" в конце может оказаться половиной "\r\n" — дожидаемся следующего куска
+        held = ""
+        if text.endswith("\r"):
+            text, held = text[:-1], "\r"
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        lines = text.split("\n")
+        self._tail = lines.pop() + held
+        return lines
+
+    def flush(self):
+        """Возвращает остаток без перевода строки (при завершении процесса)."""
+        text = self._tail + self._decoder.decode(b"", final=True)
+        self._tail = ""
+        text = text.rstrip("\r")
+        return [text] if text else []
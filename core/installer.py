@@ -0,0 +1,166 @@
+"""Установка новых серверов: Paper, Fabric, Forge и Bedrock.
+
+Сервер ставится во временную папку <имя>_tmp и переименовывается только после
+успешной установки. Ход установки сообщается через progress(текст, процент);
+исключение из progress прерывает установку (так интерфейс отменяет её).
+Файлы скачиваются через core/downloads.py и сверяются с контрольными суммами,
+которые публикуют Paper API и Maven.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import urllib.request
+import zipfile
+
+from core import downloads
+
+LOADERS = ("Forge", "Fabric", "Paper", "Bedrock")
+JAVA_VERSIONS = ["1.21.1", "1.20.4", "1.20.1", "1.19.4", "1.18.2", "1.17.1", "1.16.5", "1.14.4", "1.12.2", "1.10.2", "1.8.9"]
+USER_AGENT = downloads.USER_AGENT
+FABRIC_INSTALLER_URL = "https://maven.fabricmc.net/net/fabricmc/fabric-installer/0.11.2/fabric-installer-0.11.2.jar"
+
+
+def get_latest_bedrock_url():
+    req = urllib.request.Request("https://www.minecraft.net/en-us/download/server/bedrock", headers=USER_AGENT)
+    with urllib.request.urlopen(req, timeout=downloads.TIMEOUT) as resp:
+        html = resp.read().decode("utf-8")
+    # Универсальный паттерн для поиска .zip
+    match = re.search(r'https://[^\s"\']*bedrock-server-[\d\.]+\.zip', html)
+    if match:
+        return match.group(0)
+    raise Exception("Не удалось найти актуальную ссылку на Bedrock Dedicated Server")
+
+
+def _no_progress(text, percent=None):
+    pass
+
+
+def download(url, path, progress=_no_progress, text="Скачивание...", sha256=None, sha1=None):
+    """Скачивает файл в фоне (частями, с докачкой и повторами), сообщая настоящий прогресс.
+
+    sha256/sha1 — ожидаемая контрольная сумма; при несовпадении файл не сохраняется.
+    """
+    downloads.fetch(url, path, progress, text, sha256=sha256, sha1=sha1)
+
+
+def maven_sha1(url):
+    """SHA-1 артефакта Maven из соседнего файла .sha1 или None."""
+    return downloads.read_checksum(url + ".sha1")
+
+
+def _install_paper(folder, version, java_path, progress):
+    progress("Получение информации о версиях Paper...")
+    api_url = f"https://api.papermc.io/v2/projects/paper/versions/{version}"
+    with urllib.request.urlopen(api_url, timeout=downloads.TIMEOUT) as resp:
+        data = json.load(resp)
+    builds = data.get("builds", [])
+    if not builds:
+        raise Exception("Не найдены билды Paper для этой версии")
+    build = builds[-1]
+    # Имя файла и SHA-256 сборки — из описания билда
+    with urllib.request.urlopen(f"{api_url}/builds/{build}", timeout=downloads.TIMEOUT) as resp:
+        application = json.load(resp).get("downloads", {}).get("application", {})
+    jar_name = application.get("name") or f"paper-{version}-{build}.jar"
+    jar_url = f"{api_url}/builds/{build}/downloads/{jar_name}"
+    download(jar_url, os.path.join(folder, "server.jar"), progress, "Скачивание Paper сервера...",
+             sha256=application.get("sha256"))
+    return "server.jar"
+
+
+def _install_fabric(folder, version, java_path, progress):
+    progress("Получение информации о Fabric версиях...")
+    installer_path = os.path.join(folder, "fabric-installer.jar")
+    download(FABRIC_INSTALLER_URL, installer_path, progress, "Скачивание установщика Fabric...",
+             sha1=maven_sha1(FABRIC_INSTALLER_URL))
+    progress("Установка Fabric...", 50)
+    result = subprocess.run(
+        [java_path, "-jar", installer_path, "server", "-mcversion", version, "-downloadMinecraft"],
+        cwd=folder, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise Exception(f"Ошибка при установке Fabric:\n{result.stderr}\n{result.stdout}")
+    progress("Установка Fabric...", 100)
+    return "fabric-server-launch.jar"
+
+
+def _install_forge(folder, version, java_path, progress):
+    progress("Получение информации о Forge версиях...", 0)
+    req = urllib.request.Request(
+        "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json", headers=USER_AGENT)
+    with urllib.request.urlopen(req, timeout=downloads.TIMEOUT) as resp:
+        meta = json.load(resp)
+    key = f"{version}-latest"
+    if key not in meta["promos"]:
+        raise Exception(f"Forge не найден для версии {version}")
+    full_version = f"{version}-{meta['promos'][key]}"
+    installer_url = (f"https://maven.minecraftforge.net/net/minecraftforge/forge/{full_version}/"
+                     f"forge-{full_version}-installer.jar")
+    installer_path = os.path.join(folder, "forge-installer.jar")
+    download(installer_url, installer_path, progress, "Скачивание Forge установщика...",
+             sha1=maven_sha1(installer_url))
+    progress("Установка Forge...", 60)
+    subprocess.check_call([java_path, "-jar", installer_path, "--installServer"], cwd=folder)
+    jar_candidates = [
+        f for f in os.listdir(folder)
+        if f.startswith("forge-") and f.endswith(".jar") and "installer" not in f
+    ]
+    if not jar_candidates:
+        raise Exception("Не найден forge-jar после установки")
+    progress("Установка Forge...", 100)
+    return jar_candidates[0]
+
+
+def _install_bedrock(folder, version, java_path, progress):
+    progress("Скачивание Bedrock Server...", 0)
+    zip_path = os.path.join(folder, "bedrock-server.zip")
+    download(get_latest_bedrock_url(), zip_path, progress, "Скачивание Bedrock Server...")
+    progress("Распаковка файлов сервера...", 0)
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        files = zip_ref.namelist()
+        for i, file in enumerate(files):
+            progress(f"Распаковка: {file}", int(i * 100 / len(files)))
+            zip_ref.extract(file, folder)
+    os.remove(zip_path)
+    return "bedrock_server.exe"
+
+
+INSTALLERS = {
+    "Paper": _install_paper,
+    "Fabric": _install_fabric,
+    "Forge": _install_forge,
+    "Bedrock": _install_bedrock,
+}
+
+
+def check_new_server(servers_dir, name):
+    """Сообщение об ошибке, если сервер с таким именем создать нельзя, иначе None."""
+    if not name:
+        return "Введите название сервера."
+    server_path = os.path.join(servers_dir, name)
+    if os.path.exists(server_path):
+        return "Сервер с таким именем уже существует."
+    if os.path.exists(server_path + "_tmp"):
+        return "Временная папка для установки уже существует. Удалите её вручную."
+    return None
+
+
+def install_server(servers_dir, name, loader, version="latest", java_path="java", progress=_no_progress):
+    """Устанавливает сервер и возвращает путь к его папке; при ошибке временная папка удаляется."""
+    if loader not in INSTALLERS:
+        raise Exception(f"Неизвестный загрузчик: {loader}")
+    error = check_new_server(servers_dir, name)
+    if error:
+        raise Exception(error)
+    server_path = os.path.join(servers_dir, name)
+    tmp_server_path = server_path + "_tmp"
+    os.makedirs(tmp_server_path, exist_ok=False)
+    try:
+        INSTALLERS[loader](tmp_server_path, version, java_path, progress)
+        os.rename(tmp_server_path, server_path)
+    except BaseException:
+        shutil.rmtree(tmp_server_path, ignore_errors=True)
+        raise
+    progress("Установка завершена", 100)
+    return server_path
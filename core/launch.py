@@ -0,0 +1,125 @@
+"""Профили запуска JVM и параметры запуска отдельного сервера.
+
+Параметры хранятся рядом с сервером, в <сервер>/.msm/settings.json (ключ
+"launch"), поэтому переезжают вместе с папкой. Пустые значения означают
+«как в общих настройках менеджера».
+"""
+import json
+import os
+import shlex
+import subprocess
+
+from core import bridge
+
+SETTINGS_FILE = "settings.json"
+
+DEFAULT_LAUNCH = {
+    "profile": "",  # пусто — профиль из раздела сервера или общих настроек
+    "ram_gb": 0,  # 0 — взять max_ram_gb из настроек менеджера
+    "java_path": "",  # пусто — java из настроек менеджера
+    "large_pages": False,
+    "active_processor_count": 0,  # 0 — JVM видит все ядра
+    "extra_args": "",
+}
+
+
+def _aikar_flags(ram_gb):
+    # https://docs.papermc.io/paper/aikars-flags — для кучи больше 12 ГБ другие размеры поколений
+    big = ram_gb >= 12
+    return [
+        "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200",
+        "-XX:+UnlockExperimentalVMOptions", "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch",
+        f"-XX:G1NewSizePercent={40 if big else 30}", f"-XX:G1MaxNewSizePercent={50 if big else 40}",
+        f"-XX:G1HeapRegionSize={'16M' if big else '8M'}", f"-XX:G1ReservePercent={15 if big else 20}",
+        "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4",
+        f"-XX:InitiatingHeapOccupancyPercent={20 if big else 15}",
+        "-XX:G1MixedGCLiveThresholdPercent=90", "-XX:G1RSetUpdatingPauseTimePercent=5",
+        "-XX:SurvivorRatio=32", "-XX:+PerfDisableSharedMem", "-XX:MaxTenuringThreshold=1",
+        "-Dusing.aikars.flags=https://mcflags.emc.gs", "-Daikars.new.flags=true",
+    ]
+
+
+def _zgc_flags(ram_gb):
+    return ["-XX:+UseZGC", "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"]
+
+
+def _generational_zgc_flags(ram_gb):
+    # Java 21+; начиная с Java 23 ZGC поколенческий по умолчанию и флаг лишь выдаёт предупреждение
+    return _zgc_flags(ram_gb) + ["-XX:+ZGenerational"]
+
+
+# Имя профиля -> (название для интерфейса, функция: объём памяти в ГБ -> флаги)
+PROFILES = {
+    "default": ("Без настроек (по умолчанию JVM)", lambda ram_gb: []),
+    "aikar": ("Aikar's flags (G1)", _aikar_flags),
+    "zgc": ("ZGC", _zgc_flags),
+    "zgc_generational": ("Generational ZGC (Java 21+)", _generational_zgc_flags),
+}
+
+
+def register_profile(name, title, flags):
+    """Добавляет или заменяет профиль; flags — функция ram_gb -> список флагов."""
+    PROFILES[name] = (title, flags)
+
+
+# --- Файл настроек сервера ---
+def settings_path(server_path):
+    return os.path.join(server_path, bridge.STATE_DIR, SETTINGS_FILE)
+
+
+def load_settings(server_path):
+    try:
+        with open(settings_path(server_path), encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(server_path, settings):
+    path = settings_path(server_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def load_launch(server_path):
+    """Параметры запуска сервера, дополненные значениями по умолчанию."""
+    launch = dict(DEFAULT_LAUNCH)
+    launch.update(load_settings(server_path).get("launch", {}))
+    return launch
+
+
+def save_launch(server_path, launch):
+    settings = load_settings(server_path)
+    settings["launch"] = {key: launch.get(key, value) for key, value in DEFAULT_LAUNCH.items()}
+    save_settings(server_path, settings)
+
+
+# --- Командная строка ---
+def java_command(launch, jar, java_path="java", max_ram_gb=5, profile="default"):
+    """Аргументы запуска java-сервера по параметрам launch; исключение, если extra_args не разбираются.
+
+    java_path, max_ram_gb и profile — значения из настроек менеджера для пустых полей launch.
+    """
+    ram_gb = launch.get("ram_gb") or max_ram_gb
+    args = [launch.get("java_path") or java_path, f"-Xms{ram_gb}G", f"-Xmx{ram_gb}G"]
+    args += PROFILES.get(launch.get("profile") or profile, PROFILES["default"])[1](ram_gb)
+    if launch.get("large_pages"):
+        args.append("-XX:+UseLargePages")
+    if launch.get("active_processor_count"):
+        args.append(f"-XX:ActiveProcessorCount={int(launch['active_processor_count'])}")
+    extra = launch.get("extra_args", "").strip()
+    if extra:
+        try:
+            args += shlex.split(extra, posix=os.name != "nt")
+        except ValueError as e:
+            raise Exception(f"Не удалось разобрать дополнительные аргументы: {e}")
+    return args + ["-jar", jar, "nogui"]
+
+
+def format_command(args):
+    """Командная строка так, как её можно вставить в терминал."""
+    return subprocess.list2cmdline(args) if os.name == "nt" else shlex.join(args)
@@ -0,0 +1,120 @@
+"""Остановка и перезапуск сервера как конечный автомат."""
+import time
+
+STOP_GRACE_SECONDS = 60  # сколько ждать выхода после команды stop (сохранение мира)
+TERMINATE_GRACE_SECONDS = 10  # сколько ждать после terminate, прежде чем убивать
+
+STOP_PHASES = ("stop", "terminate", "kill")
+
+
+class Transition:
+    """Остановка или перезапуск одного сервера.
+
+    Фазы: stop (отправлена команда stop) -> terminate -> kill — пока процесс не
+    завершится; при перезапуске сервер запускается сразу после выхода, и переход
+    заканчивается, когда в логе появилась строка готовности. Автомат продвигается
+    из ServerRuntime.poll() и сам не создаёт ни потоков, ни таймеров.
+    """
+
+    def __init__(self, runtime, restart_args=None,
+                 grace=STOP_GRACE_SECONDS, terminate_grace=TERMINATE_GRACE_SECONDS):
+        self.runtime = runtime
+        self.restart_args = restart_args
+        self.grace = grace
+        self.terminate_grace = terminate_grace
+        self.phase = None
+        self.escalation = None
+        self.error = None
+        self.timings = {}
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self._phase_started = self._started
+        self._deadline = None
+
+    @property
+    def kind(self):
+        return "restart" if self.restart_args is not None else "stop"
+
+    def begin(self):
+        """Запускает переход; возвращает True, если он уже завершён."""
+        process = self.runtime.process
+        if process is None or not process.is_running():
+            self.timings["stop"] = 0.0
+            return self._after_stop()
+        process.stop_requested = True
+        process.write("stop\n")
+        self._enter("stop", self.grace)
+        self.runtime.status = "stopping"
+        return False
+
+    def advance(self, exited=False):
+        """Продвигает автомат; возвращает True, когда переход завершён."""
+        now = time.monotonic()
+        if self.phase in STOP_PHASES:
+            if exited or not self.runtime.is_running():
+                self.timings["stop"] = now - self._started
+                return self._after_stop()
+            self.runtime.status = "stopping"
+            if now >= self._deadline:
+                process = self.runtime.process
+                if self.phase == "stop":
+                    process.terminate()
+                    self.escalation = "terminate"
+                    self._enter("terminate", self.terminate_grace)
+                elif self.phase == "terminate":
+                    process.kill()
+                    self.escalation = "kill"
+                    self._enter("kill", self.terminate_grace)
+            return False
+        if self.phase == "boot":
+            if self.runtime.status == "running":
+                self.timings["boot"] = now - self._phase_started
+                return self._finish()
+            if not self.runtime.is_running():
+                self.error = "сервер завершился, не успев запуститься"
+                return self._finish()
+        return False
+
+    def _enter(self, phase, timeout=None):
+        self.phase = phase
+        self._phase_started = time.monotonic()
+        self._deadline = self._phase_started + timeout if timeout is not None else None
+
+    def _after_stop(self):
+        if self.restart_args is None:
+            return self._finish()
+        start = time.monotonic()
+        try:
+            self.runtime.start(self.restart_args, clear_console=False)
+        except Exception as e:
+            self.error = str(e)
+            self.runtime.status = "error"
+            return self._finish()
+        self.timings["spawn"] = time.monotonic() - start
+        self._enter("boot")
+        return False
+
+    def _finish(self):
+        self.phase = "done"
+        self.timings["total"] = time.monotonic() - self._started
+        return True
+
+    def summary(self):
+        """Строка для консоли: сколько заняла каждая фаза."""
+        names = (("stop", "остановка"), ("spawn", "запуск процесса"), ("boot", "загрузка"), ("total", "всего"))
+        parts = [f"{title} {self.timings[key]:.1f} с" for key, title in names if key in self.timings]
+        text = ("Перезапуск" if self.kind == "restart" else "Остановка") + ": " + ", ".join(parts)
+        if self.escalation:
+            text += f" (сервер не остановился сам, применён {self.escalation})"
+        if self.error:
+            text += f" — ошибка: {self.error}"
+        return text
+
+    def record(self):
+        return {
+            "kind": self.kind,
+            "at": self.started_at,
+            "timings": dict(self.timings),
+            "escalation": self.escalation,
+            "error": self.error,
+        }
@@ -0,0 +1,167 @@
+"""Классификация строк лога сервера в типизированные события.
+
+Для каждого загрузчика задаётся регулярка заголовка строки (время, поток,
+уровень) и список шаблонов сообщений. Шаблоны сообщений склеиваются в одно
+предкомпилированное выражение, якорённое на начало сообщения, поэтому каждая
+строка проверяется один раз, а не отдельным re.search на каждое событие.
+"""
+import os
+import re
+from collections import namedtuple
+
+# --- Типы событий ---
+READY = "ready"
+JOIN = "join"
+LEAVE = "leave"
+CHAT = "chat"
+WARN = "warn"
+ERROR = "error"
+CRASH = "crash"
+TPS = "tps"
+LIST = "list"  # ответ на команду list — по нему сторож проверяет, что сервер не завис
+# Этапы загрузки, по которым замеряется время старта
+LOADING = "loading"
+SPAWN = "spawn"
+
+LogEvent = namedtuple("LogEvent", "kind line player value stream")
+LogEvent.__new__.__defaults__ = (None, None, "stdout")
+
+# Заголовок Java-серверов: Paper "[12:00:00 INFO]: ", vanilla/Fabric "[12:00:00] [Server thread/INFO]: ",
+# Forge "[14Jan2024 12:00:00.000] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: "
+JAVA_HEADER = r"\[[^\]]*\](?: \[[^\]]*\])*(?: \([^)]*\))?:? "
+# Bedrock: "[2024-01-14 12:00:00:123 INFO] ", в старых версиях с префиксом "NO LOG FILE! - ".
+# Дата и время разобраны по отдельности: в классе вроде [\d :]+ пробел перед уровнем тоже съедался бы
+BEDROCK_HEADER = r"(?:NO LOG FILE! - )?\[[\d\-]+ [\d:.]+ [A-Z]+\] "
+
+# Повторяемые классы не пересекаются с символом после них ([^>]+>, \w+ и пробел), поэтому откат
+# линейный и без захватывающих квантификаторов (их нет в Python 3.10)
+JAVA_MESSAGES = [
+    (READY, r'Done \([\d.,]+s\)! For help, type "help"'),
+    (LOADING, r'Preparing level "'),
+    (SPAWN, r"(?:Preparing spawn area|Preparing start region for dimension minecraft:overworld)"),
+    (JOIN, r"(?P<player>\w+) joined the game"),
+    (LEAVE, r"(?P<player>\w+) left the game"),
+    (CHAT, r"(?:\[Not Secure\] )?<(?P<player>[^>]+)> (?P<value>.*)"),
+    (TPS, r"Can't keep up! Is the server overloaded\? Running (?P<value>\d+)ms"),
+    (CRASH, r"(?:Encountered an unexpected exception|This crash report has been saved to"
+            r"|---- Minecraft Crash Report ----|Considering it to be crashed)"),
+    (LIST, r"There are (?P<value>\d+)(?: of a max of |/)\d+ players online"),
+]
+BEDROCK_MESSAGES = [
+    (READY, r"Server started\."),
+    (LOADING, r"(?:Opening level|Level Name:)"),
+    (JOIN, r"Player connected: (?P<player>[^,]+)"),
+    (LEAVE, r"Player disconnected: (?P<player>[^,]+)"),
+    (CRASH, r"(?:Crash|Segmentation fault)"),
+    (LIST, r"There are (?P<value>\d+)/\d+ players online"),
+]
+
+# Уровень берётся из текста заголовка: "[... WARN]" или "[.../WARN]"
+LEVEL_MARKER = re.compile(r"(WARN|WARNING|ERROR|FATAL|SEVERE)\]")
+LEVEL_EVENTS = {"WARN": WARN, "WARNING": WARN, "ERROR": ERROR, "FATAL": ERROR, "SEVERE": ERROR}
+# Строки stderr без заголовка (стектрейсы) считаются ошибкой по этим словам
+STDERR_ERROR_HINT = re.compile(r"Exception|Error|FAILED|Caused by")
+
+
+class LoaderPatterns:
+    """Набор шаблонов одного загрузчика: заголовок строки и сообщения по типам событий."""
+
+    def __init__(self, header, messages):
+        self.header = header
+        self.messages = list(messages)
+
+    def extend(self, messages):
+        """Возвращает копию с дополнительными шаблонами (проверяются раньше базовых)."""
+        return LoaderPatterns(self.header, list(messages) + self.messages)
+
+
+LOADERS = {
+    "paper": LoaderPatterns(JAVA_HEADER, JAVA_MESSAGES),
+    "fabric": LoaderPatterns(JAVA_HEADER, JAVA_MESSAGES).extend([
+        (CRASH, r"Mixin apply for mod \S+ failed"),
+    ]),
+    "forge": LoaderPatterns(JAVA_HEADER, JAVA_MESSAGES).extend([
+        (CRASH, r"Preparing crash report with UUID"),
+    ]),
+    "bedrock": LoaderPatterns(BEDROCK_HEADER, BEDROCK_MESSAGES),
+}
+
+_classifiers = {}
+
+
+def register_loader(name, patterns):
+    """Добавляет или заменяет шаблоны загрузчика."""
+    LOADERS[name] = patterns
+    _classifiers.pop(name, None)
+
+
+def get_classifier(loader):
+    """Возвращает (и кэширует) классификатор для загрузчика; неизвестный считается paper."""
+    if loader not in LOADERS:
+        loader = "paper"
+    classifier = _classifiers.get(loader)
+    if classifier is None:
+        classifier = _classifiers[loader] = LogClassifier(LOADERS[loader])
+    return classifier
+
+
+class LogClassifier:
+    """Однопроходный классификатор строк лога."""
+
+    def __init__(self, patterns):
+        self._header = re.compile(patterns.header)
+        parts = []
+        self._groups = {}  # имя внешней группы -> (тип события, группа игрока, группа значения)
+        for i, (kind, pattern) in enumerate(patterns.messages):
+            name = f"e{i}"
+            # Внутренние имена групп должны быть уникальны в общем выражении
+            player = value = None
+            if "(?P<player>" in pattern:
+                player = f"{name}_player"
+                pattern = pattern.replace("(?P<player>", f"(?P<{player}>")
+            if "(?P<value>" in pattern:
+                value = f"{name}_value"
+                pattern = pattern.replace("(?P<value>", f"(?P<{value}>")
+            parts.append(f"(?P<{name}>{pattern})")
+            self._groups[name] = (kind, player, value)
+        self._messages = re.compile("|".join(parts))
+
+    def classify(self, line, stream="stdout"):
+        """Возвращает LogEvent или None, если строка ничего не означает."""
+        header = self._header.match(line)
+        match = self._messages.match(line, header.end() if header else 0)
+        if match:
+            kind, player, value = self._groups[match.lastgroup]
+            return LogEvent(
+                kind, line,
+                match.group(player) if player else None,
+                match.group(value) if value else None,
+                stream,
+            )
+        if header:
+            level = LEVEL_MARKER.search(line, 0, header.end())
+            if level:
+                return LogEvent(LEVEL_EVENTS[level.group(1)], line, None, None, stream)
+        elif stream == "stderr" and STDERR_ERROR_HINT.search(line):
+            return LogEvent(ERROR, line, None, None, stream)
+        return None
+
+    def classify_lines(self, lines, stream="stdout"):
+        classify = self.classify
+        return [event for event in (classify(line, stream) for line in lines) if event]
+
+
+def detect_loader(server_path):
+    """Определяет загрузчик по содержимому папки сервера."""
+    try:
+        names = os.listdir(server_path)
+    except OSError:
+        return "paper"
+    if "bedrock_server.exe" in names or "bedrock_server" in names:
+        return "bedrock"
+    if os.path.isdir(os.path.join(server_path, "libraries", "net", "minecraftforge")):
+        return "forge"
+    if "fabric-server-launch.jar" in names or \
+            os.path.isdir(os.path.join(server_path, "libraries", "net", "fabricmc")):
+        return "fabric"
+    return "paper"
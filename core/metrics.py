@@ -0,0 +1,212 @@
+"""Замеры ресурсов серверов: CPU, память, потоки, дескрипторы и диск.
+
+Один фоновый поток раз в SAMPLE_INTERVAL опрашивает дерево процессов каждого
+сервера (java и её дочерние процессы) и складывает замеры в кольцо
+фиксированного размера. По желанию раз в минуту усреднённый замер
+дописывается в <сервер>/.msm/metrics.jsonl. Поток сам считает, сколько CPU
+уходит на замеры (overhead()).
+"""
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import psutil
+
+from core import bridge
+from core.config import append_jsonl, read_jsonl
+
+SAMPLE_INTERVAL = 2.0
+HISTORY_SAMPLES = 300  # в памяти — последние 10 минут при замере раз в 2 с
+CHILDREN_REFRESH = 5  # список дочерних процессов обновляется раз в столько замеров
+HISTORY_FILE = "metrics.jsonl"
+HISTORY_BUCKET_SECONDS = 60
+HISTORY_MAX_BYTES = 2 * 1024 * 1024
+
+# cpu — % от всех ядер машины, rss — байты, read_rate/write_rate — байт/с
+Sample = namedtuple("Sample", "time cpu rss threads handles read_rate write_rate")
+
+
+class _Tree:
+    """Дерево процессов одного сервера; psutil.Process хранятся между замерами ради cpu_percent."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.root = psutil.Process(pid)
+        self.children = []
+        self.io = {}  # pid -> (read_bytes, write_bytes) прошлого замера
+        self.ticks = 0
+        self.last_time = None
+
+    def processes(self):
+        if self.ticks % CHILDREN_REFRESH == 0:
+            known = {proc.pid: proc for proc in self.children}
+            try:
+                # Уже известные объекты переиспользуются, иначе cpu_percent начнёт отсчёт заново
+                self.children = [known.get(proc.pid, proc) for proc in self.root.children(recursive=True)]
+            except psutil.Error:
+                self.children = []
+        self.ticks += 1
+        return [self.root] + self.children
+
+    def sample(self, cpu_count):
+        now = time.monotonic()
+        cpu = 0.0
+        rss = threads = handles = 0
+        read = write = 0
+        io = {}
+        for proc in self.processes():
+            try:
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(None)
+                    rss += proc.memory_info().rss
+                    threads += proc.num_threads()
+                    handles += proc.num_handles() if os.name == "nt" else proc.num_fds()
+                    try:
+                        counters = proc.io_counters()
+                    except (psutil.AccessDenied, AttributeError):
+                        counters = None
+            except psutil.NoSuchProcess:
+                if proc is self.root:
+                    raise
+                continue
+            except psutil.AccessDenied:
+                continue
+            if counters is not None:
+                io[proc.pid] = (counters.read_bytes, counters.write_bytes)
+                previous = self.io.get(proc.pid)
+                if previous:
+                    read += counters.read_bytes - previous[0]
+                    write += counters.write_bytes - previous[1]
+        elapsed = now - self.last_time if self.last_time else 0
+        self.io = io
+        self.last_time = now
+        return Sample(
+            time.time(), cpu / cpu_count, rss, threads, handles,
+            read / elapsed if elapsed else 0.0, write / elapsed if elapsed else 0.0,
+        )
+
+
+class _HistoryWriter:
+    """Усредняет замеры по минутам и дописывает их в .msm/metrics.jsonl."""
+
+    def __init__(self, server_path):
+        self.path = os.path.join(server_path, bridge.STATE_DIR, HISTORY_FILE)
+        self.bucket = []
+
+    def add(self, sample):
+        if self.bucket and sample.time - self.bucket[0].time >= HISTORY_BUCKET_SECONDS:
+            self.flush()
+        self.bucket.append(sample)
+
+    def flush(self):
+        if not self.bucket:
+            return
+        n = len(self.bucket)
+        record = {
+            "time": round(self.bucket[0].time),
+            "cpu": round(sum(s.cpu for s in self.bucket) / n, 2),
+            "rss": max(s.rss for s in self.bucket),
+            "threads": max(s.threads for s in self.bucket),
+            "handles": max(s.handles for s in self.bucket),
+            "read_rate": round(sum(s.read_rate for s in self.bucket) / n),
+            "write_rate": round(sum(s.write_rate for s in self.bucket) / n),
+        }
+        self.bucket = []
+        append_jsonl(self.path, record, HISTORY_MAX_BYTES)
+
+
+def read_history(server_path):
+    """Сохранённая поминутная история сервера: список словарей по времени."""
+    return read_jsonl(os.path.join(server_path, bridge.STATE_DIR, HISTORY_FILE))
+
+
+class ResourceSampler:
+    """Фоновый опрос ресурсов всех запущенных серверов."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, capacity=HISTORY_SAMPLES, write_history=False):
+        self.interval = interval
+        self.capacity = capacity
+        self.write_history = write_history
+        self._lock = threading.Lock()
+        self._targets = {}  # имя -> (pid, папка сервера)
+        self._trees = {}
+        self._rings = {}
+        self._writers = {}
+        self._cpu_count = psutil.cpu_count() or 1
+        self.cpu_spent = 0.0
+        self._started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._started = time.monotonic()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def set_targets(self, targets):
+        """Задаёт опрашиваемые серверы: словарь имя -> (pid, папка сервера)."""
+        with self._lock:
+            self._targets = dict(targets)
+
+    def history(self, name):
+        """Замеры сервера в памяти, от старых к новым."""
+        with self._lock:
+            ring = self._rings.get(name)
+            return list(ring) if ring else []
+
+    def latest(self, name):
+        with self._lock:
+            ring = self._rings.get(name)
+            return ring[-1] if ring else None
+
+    def overhead(self):
+        """Доля одного ядра (%), которую поток замеров потратил с момента запуска."""
+        if self._started is None:
+            return 0.0
+        elapsed = time.monotonic() - self._started
+        return self.cpu_spent / elapsed * 100 if elapsed > 0 else 0.0
+
+    def sample_once(self):
+        """Один проход по всем серверам; вызывается потоком, но годится и для бенчмарка."""
+        start = time.thread_time()
+        with self._lock:
+            targets = dict(self._targets)
+        for name, (pid, server_path) in targets.items():
+            tree = self._trees.get(name)
+            if tree is None or tree.pid != pid:
+                try:
+                    tree = self._trees[name] = _Tree(pid)
+                except psutil.Error:
+                    continue
+            try:
+                sample = tree.sample(self._cpu_count)
+            except psutil.Error:
+                del self._trees[name]
+                continue
+            with self._lock:
+                ring = self._rings.get(name)
+                if ring is None:
+                    ring = self._rings[name] = deque(maxlen=self.capacity)
+                ring.append(sample)
+            if self.write_history:
+                writer = self._writers.get(name)
+                if writer is None:
+                    writer = self._writers[name] = _HistoryWriter(server_path)
+                writer.add(sample)
+        # Серверы, которые больше не опрашиваются
+        for name in [name for name in self._trees if name not in targets]:
+            del self._trees[name]
+        for name in [name for name in self._writers if name not in targets]:
+            self._writers.pop(name).flush()
+        self.cpu_spent += time.thread_time() - start
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+        for writer in self._writers.values():
+            writer.flush()
@@ -0,0 +1,171 @@
+"""Сетевые интерфейсы компьютера, их адреса и проверка порта сервера.
+
+Опрос интерфейсов (psutil) идёт в фоновом потоке раз в REFRESH_SECONDS:
+переносимого уведомления ОС о смене адресов нет, а сравнение снимков дёшево.
+Интерфейс читает только кэш NetworkService и узнаёт об изменениях через
+take_changed() — так же, как забирает вывод серверов.
+"""
+import socket
+import threading
+from collections import namedtuple
+
+from core import properties
+
+REFRESH_SECONDS = 30
+CHECK_TIMEOUT = 0.5  # адреса свои — отвечают сразу, дольше ждёт только фаервол
+
+# ipv4/ipv6 — адреса без loopback и link-local; speed — Мбит/с (0 — неизвестно)
+Interface = namedtuple("Interface", "name ipv4 ipv6 is_up speed mtu")
+# in_use — порт на этом компьютере уже занят (сервером или другой программой);
+# reachable — адрес -> (удалось ли подключиться, пояснение)
+PortTest = namedtuple("PortTest", "port in_use reachable")
+
+LOCALHOST = {"localhost": Interface("localhost", ["127.0.0.1"], [], True, 0, 0)}
+
+
+def scan_interfaces():
+    """Словарь имя -> Interface для интерфейсов с адресами; LOCALHOST, если сетей нет."""
+    import psutil  # менеджер вызывает это уже после показа окна — не задерживаем запуск
+    try:
+        stats = psutil.net_if_stats()
+    except OSError:
+        stats = {}
+    interfaces = {}
+    for iface, addrs in psutil.net_if_addrs().items():
+        ipv4 = [addr.address for addr in addrs
+                if addr.family == socket.AF_INET and not addr.address.startswith("127.")]
+        ipv6 = [addr.address for addr in addrs
+                if addr.family == socket.AF_INET6 and addr.address != "::1"
+                and not addr.address.lower().startswith("fe80")]
+        if not ipv4 and not ipv6:
+            continue
+        stat = stats.get(iface)
+        interfaces[iface] = Interface(
+            iface, ipv4, ipv6,
+            stat.isup if stat else True,
+            stat.speed if stat else 0,
+            stat.mtu if stat else 0,
+        )
+    return interfaces or dict(LOCALHOST)
+
+
+def interface_addresses():
+    """Словарь интерфейс -> IPv4-адреса без loopback; {"localhost": ["127.0.0.1"]}, если сетей нет."""
+    return {name: iface.ipv4 for name, iface in scan_interfaces().items() if iface.ipv4} or {"localhost": ["127.0.0.1"]}
+
+
+def all_addresses():
+    """Все IPv4-адреса компьютера без loopback; ["127.0.0.1"], если сетей нет."""
+    return [ip for ip_list in interface_addresses().values() for ip in ip_list]
+
+
+class NetworkService:
+    """Кэш интерфейсов с фоновым обновлением; изменения забираются take_changed()."""
+
+    def __init__(self, interval=REFRESH_SECONDS):
+        self.interval = interval
+        self._interfaces = None  # None — ещё ни разу не опрашивали
+        self._changed = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self._interfaces is not None
+
+    def refresh(self):
+        """Опрашивает интерфейсы сейчас; True, если адреса изменились."""
+        interfaces = scan_interfaces()
+        with self._lock:
+            changed = interfaces != self._interfaces
+            self._interfaces = interfaces
+            self._changed = self._changed or changed
+        return changed
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                pass  # интерфейс пропал во время опроса — повторим в следующий раз
+
+    def take_changed(self):
+        """True один раз после каждого изменения адресов."""
+        with self._lock:
+            changed, self._changed = self._changed, False
+        return changed
+
+    def interfaces(self):
+        """Словарь имя -> Interface; при первом обращении до фонового опроса — опрашивает сам."""
+        if self._interfaces is None:
+            self.refresh()
+        with self._lock:
+            return dict(self._interfaces)
+
+    def interface_addresses(self):
+        """Как interface_addresses(), но из кэша."""
+        return {name: iface.ipv4 for name, iface in self.interfaces().items() if iface.ipv4} \
+            or {"localhost": ["127.0.0.1"]}
+
+    def addresses(self, ipv6=False):
+        """Все адреса компьютера из кэша: IPv4 (по умолчанию) или IPv6."""
+        return [ip for iface in self.interfaces().values() for ip in (iface.ipv6 if ipv6 else iface.ipv4)] \
+            or ([] if ipv6 else ["127.0.0.1"])
+
+
+# --- Порт сервера ---
+def server_port(server_path, default=None):
+    """server-port из server.properties (через кэш разобранных файлов)."""
+    value = properties.load(server_path).get("server-port", "").strip()
+    return int(value) if value.isdigit() else default
+
+
+def port_in_use(port, host=""):
+    """Занят ли TCP-порт на этом компьютере: пробуем сами его занять."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return True
+    return False
+
+
+def check_address(address, port, timeout=CHECK_TIMEOUT):
+    """(удалось ли подключиться к address:port, пояснение)."""
+    try:
+        with socket.create_connection((address, port), timeout=timeout):
+            return True, "подключение есть"
+    except socket.timeout:
+        return False, "нет ответа (фаервол?)"
+    except ConnectionRefusedError:
+        return False, "соединение отклонено (порт никто не слушает)"
+    except OSError as e:
+        return False, e.strerror or str(e)
+
+
+def self_test(port, addresses, timeout=CHECK_TIMEOUT):
+    """Проверка порта сервера: занят ли он здесь и отвечает ли по каждому из адресов компьютера."""
+    reachable = {}
+    for address in ["127.0.0.1", *addresses]:
+        if address not in reachable:
+            reachable[address] = check_address(address, port, timeout)
+    return PortTest(port, port_in_use(port), reachable)
+
+
+def describe_test(test):
+    """Текст результата self_test для окна и консоли."""
+    lines = [f"Порт {test.port}: " + ("занят — его слушает сервер или другая программа"
+                                      if test.in_use else "свободен — сервер его не слушает")]
+    for address, (ok, detail) in test.reachable.items():
+        lines.append(f"{'✓' if ok else '✗'} {address}:{test.port} — {detail}")
+    return "\n".join(lines)
@@ -0,0 +1,231 @@
+"""Опрос серверов по сети: Server List Ping (Java) и unconnected ping (Bedrock).
+
+Пинг показывает, что сервер действительно принимает игроков, сколько их
+онлайн и с какой задержкой отвечает — независимо от того, кто его запустил
+и не пропущена ли строка в логе. Все серверы опрашиваются одновременно в
+отдельном потоке с собственным циклом asyncio, интерфейс только забирает
+готовые результаты через take().
+"""
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from core import properties
+
+PING_INTERVAL = 5
+PING_TIMEOUT = 2
+JAVA_DEFAULT_PORT = 25565
+BEDROCK_DEFAULT_PORT = 19132
+ANONYMOUS_UUID = "00000000-0000-0000-0000-000000000000"  # «Anonymous Player» при скрытом списке
+RAKNET_MAGIC = bytes.fromhex("00ffff00fefefefefdfdfdfd12345678")
+
+# players — имена из ответа (у Java не больше 12, у Bedrock их нет — None)
+PingResult = namedtuple("PingResult", "ok latency online max players motd version error")
+
+
+def _failed(error):
+    return PingResult(False, None, None, None, None, None, None, error)
+
+
+# --- Java: Server List Ping ---
+def _varint(value):
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _packet(packet_id, payload=b""):
+    data = _varint(packet_id) + payload
+    return _varint(len(data)) + data
+
+
+def _unpack_varint(data, pos=0):
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+    raise ValueError("Слишком длинный VarInt")
+
+
+async def _read_varint(reader):
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result
+    raise ValueError("Слишком длинный VarInt")
+
+
+async def _read_packet(reader):
+    length = await _read_varint(reader)
+    data = await reader.readexactly(length)
+    packet_id = data[0]  # id пакетов статуса помещаются в один байт
+    return packet_id, data[1:]
+
+
+def _motd_text(description):
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        return description.get("text", "") + "".join(_motd_text(part) for part in description.get("extra", []))
+    return ""
+
+
+async def java_ping(host, port, timeout=PING_TIMEOUT):
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        address = host.encode("utf-8")
+        handshake = _varint(-1) + _varint(len(address)) + address + struct.pack(">H", port) + _varint(1)
+        writer.write(_packet(0x00, handshake) + _packet(0x00))
+        packet_id, data = await asyncio.wait_for(_read_packet(reader), timeout)
+        if packet_id != 0x00:
+            return _failed("неожиданный ответ")
+        length, pos = _unpack_varint(data)
+        status = json.loads(data[pos:pos + length].decode("utf-8"))
+        start = time.perf_counter()
+        writer.write(_packet(0x01, struct.pack(">q", int(time.time() * 1000))))
+        await asyncio.wait_for(_read_packet(reader), timeout)
+        latency = (time.perf_counter() - start) * 1000
+        players = status.get("players", {})
+        sample = [
+            entry["name"] for entry in players.get("sample", []) or []
+            if entry.get("name") and entry.get("id") != ANONYMOUS_UUID
+        ]
+        return PingResult(
+            True, latency, players.get("online"), players.get("max"), sample,
+            _motd_text(status.get("description")), status.get("version", {}).get("name"), None,
+        )
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError,
+            IndexError, AttributeError, TypeError, KeyError) as e:
+        # Пустой или испорченный пакет, статус не того вида (не объект, players не словарь)
+        return _failed(str(e) or type(e).__name__)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# --- Bedrock: RakNet unconnected ping ---
+class _BedrockProtocol(asyncio.DatagramProtocol):
+    def __init__(self, future):
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def bedrock_ping(host, port, timeout=PING_TIMEOUT):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    transport = None
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _BedrockProtocol(future), remote_addr=(host, port))
+        start = time.perf_counter()
+        transport.sendto(b"\x01" + struct.pack(">q", int(time.time() * 1000)) + RAKNET_MAGIC + os.urandom(8))
+        data = await asyncio.wait_for(future, timeout)
+        latency = (time.perf_counter() - start) * 1000
+        if not data or data[0] != 0x1C or len(data) < 35:
+            return _failed("неожиданный ответ")
+        (length,) = struct.unpack_from(">H", data, 33)
+        # MCPE;motd;протокол;версия;онлайн;максимум;id сервера;...
+        fields = data[35:35 + length].decode("utf-8", "replace").split(";")
+        return PingResult(
+            True, latency, int(fields[4]), int(fields[5]), None, fields[1], fields[3], None,
+        )
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+        return _failed(str(e) or type(e).__name__)
+    finally:
+        if transport is not None:
+            transport.close()
+
+
+def ping_target(server_path):
+    """(вид, хост, порт) сервера по его server.properties."""
+    bedrock = os.path.exists(os.path.join(server_path, "bedrock_server.exe"))
+    props = properties.read_properties(server_path)
+    try:
+        port = int(props.get("server-port") or 0)
+    except ValueError:
+        port = 0
+    port = port or (BEDROCK_DEFAULT_PORT if bedrock else JAVA_DEFAULT_PORT)
+    host = props.get("server-ip", "")
+    if host in ("", "0.0.0.0", "::"):
+        host = "127.0.0.1"
+    return ("bedrock" if bedrock else "java"), host, port
+
+
+class ServerProber:
+    """Периодически пингует все известные серверы в фоновом потоке."""
+
+    def __init__(self, interval=PING_INTERVAL, timeout=PING_TIMEOUT):
+        self.interval = interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._servers = {}  # имя -> папка сервера
+        self._results = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def set_servers(self, servers):
+        """Задаёт опрашиваемые серверы: словарь имя -> папка сервера."""
+        with self._lock:
+            self._servers = dict(servers)
+
+    def take(self):
+        """Результаты, пришедшие с прошлого вызова: словарь имя -> PingResult."""
+        with self._lock:
+            results, self._results = self._results, {}
+        return results
+
+    async def probe(self, server_path):
+        kind, host, port = ping_target(server_path)
+        if kind == "bedrock":
+            return await bedrock_ping(host, port, self.timeout)
+        return await java_ping(host, port, self.timeout)
+
+    async def _main(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            with self._lock:
+                servers = dict(self._servers)
+            names = list(servers)
+            # Неожиданное исключение одного пинга не должно останавливать поток
+            results = await asyncio.gather(*(self.probe(servers[name]) for name in names),
+                                           return_exceptions=True)
+            results = [_failed(str(result) or type(result).__name__) if isinstance(result, BaseException) else result
+                       for result in results]
+            with self._lock:
+                self._results.update(zip(names, results))
+            delay = self.interval - (time.monotonic() - started)
+            while delay > 0 and not self._stop.is_set():
+                await asyncio.sleep(min(delay, 0.5))
+                delay -= 0.5
@@ -0,0 +1,475 @@
+"""Игроки сервера из его json-файлов: операторы, белый список, баны, кэш имён.
+
+Каждый файл читается один раз и перечитывается, только если у него
+изменились время изменения или размер; по нему строятся словари по имени
+(без учёта регистра) и по UUID, так что вопросы «оператор ли», «в белом
+списке ли», «забанен ли» и «когда заходил» — это поиск в словаре, даже если
+в белом списке десятки тысяч записей. Файлы проверяются не чаще раза в
+CHECK_INTERVAL секунд.
+
+Массовые изменения (импорт списка и синхронизация белого списка или банов
+на многих серверах) пишут json-файлы остановленных серверов напрямую,
+атомарной подменой. Запущенный сервер держит списки в памяти и сам сохраняет
+их, поэтому его файлы не трогаются: изменения уходят командами whitelist
+add/remove и ban/pardon через очередь команд.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid as uuidlib
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from core import properties
+from core.config import write_json
+
+CHECK_INTERVAL = 1.0
+USERCACHE_TTL = timedelta(days=30)  # сервер пишет expiresOn = последний вход + месяц
+
+# Файлы Java-сервера; у Bedrock белый список — allowlist.json
+OPS, WHITELIST, BANNED, BANNED_IPS, USERCACHE = (
+    "ops.json", "whitelist.json", "banned-players.json", "banned-ips.json", "usercache.json")
+BEDROCK_ALLOWLIST = "allowlist.json"
+
+# Сводка по игроку; op_level — 0, если не оператор; last_seen — datetime или None
+PlayerStatus = namedtuple("PlayerStatus", "name uuid op op_level whitelisted banned ban_reason last_seen")
+
+# Что показывать в списке игроков
+SCOPES = {
+    "online": "Онлайн",
+    "known": "Все известные",
+    "whitelist": "Белый список",
+    "ops": "Операторы",
+    "banned": "Забаненные",
+}
+
+
+def parse_time(text):
+    """Время из файлов сервера («2024-05-01 12:00:00 +0000»); None для forever и непонятного."""
+    if not text or text == "forever":
+        return None
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M:%S %z")
+    except ValueError:
+        return None
+
+
+def _uuid_key(uuid):
+    return uuid.replace("-", "").lower() if uuid else None
+
+
+class _JsonIndex:
+    """Один json-файл со списком записей и словари по имени и UUID."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = None
+        self.entries = []
+        self.by_name = {}
+        self.by_uuid = {}
+
+    def refresh(self):
+        """Перечитывает файл, если он изменился; True, если содержимое могло измениться."""
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        entries = []
+        if stamp is not None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                entries = [entry for entry in data if isinstance(entry, dict)] if isinstance(data, list) else []
+            except (OSError, ValueError):
+                entries = []  # файл пишется сервером прямо сейчас — перечитаем при следующей проверке
+                self.stamp = None
+        by_name = {}
+        by_uuid = {}
+        for entry in entries:
+            name = entry.get("name")
+            if isinstance(name, str):
+                by_name[name.lower()] = entry
+            uuid = entry.get("uuid") or entry.get("xuid")
+            if isinstance(uuid, str):
+                by_uuid[_uuid_key(uuid)] = entry
+        # Читатели без блокировки видят либо старые словари, либо новые целиком
+        self.entries, self.by_name, self.by_uuid = entries, by_name, by_uuid
+        return True
+
+    def find(self, player):
+        """Запись по имени или UUID игрока."""
+        return self.by_name.get(player.lower()) or self.by_uuid.get(_uuid_key(player))
+
+    def names(self):
+        return [entry["name"] for entry in self.entries if isinstance(entry.get("name"), str)]
+
+
+class PlayerRegistry:
+    """Операторы, белый список, баны и кэш имён одного сервера."""
+
+    def __init__(self, server_path):
+        self.server_path = server_path
+        self.ops = _JsonIndex(os.path.join(server_path, OPS))
+        whitelist = WHITELIST
+        if not os.path.exists(os.path.join(server_path, WHITELIST)) and \
+                os.path.exists(os.path.join(server_path, BEDROCK_ALLOWLIST)):
+            whitelist = BEDROCK_ALLOWLIST
+        self.whitelist = _JsonIndex(os.path.join(server_path, whitelist))
+        self.banned = _JsonIndex(os.path.join(server_path, BANNED))
+        self.banned_ips = _JsonIndex(os.path.join(server_path, BANNED_IPS))
+        self.usercache = _JsonIndex(os.path.join(server_path, USERCACHE))
+        self.version = 0  # растёт при каждом изменении файлов — для перерисовки списков
+        self._checked = None
+        self._lock = threading.Lock()
+        self._ip_index = {}
+
+    def _indexes(self):
+        return self.ops, self.whitelist, self.banned, self.banned_ips, self.usercache
+
+    def refresh(self, force=False):
+        """Проверяет файлы (не чаще CHECK_INTERVAL, если не force); True, если что-то изменилось."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._checked is not None and now - self._checked < CHECK_INTERVAL:
+                return False
+            self._checked = now
+            changed = False
+            for index in self._indexes():
+                changed = index.refresh() or changed
+            if changed:
+                self._ip_index = {entry.get("ip"): entry for entry in self.banned_ips.entries if entry.get("ip")}
+                self.version += 1
+            return changed
+
+    # --- Вопросы об игроке (имя или UUID) ---
+    def is_op(self, player):
+        self.refresh()
+        return self.ops.find(player) is not None
+
+    def op_level(self, player):
+        self.refresh()
+        entry = self.ops.find(player)
+        return int(entry.get("level", 4)) if entry else 0
+
+    def is_whitelisted(self, player):
+        self.refresh()
+        return self.whitelist.find(player) is not None
+
+    def ban(self, player, now=None):
+        """Действующая запись бана игрока или None (истёкшие баны не считаются)."""
+        self.refresh()
+        entry = self.banned.find(player)
+        if entry is None:
+            return None
+        expires = parse_time(entry.get("expires"))
+        if expires is not None and expires <= (now or datetime.now(timezone.utc)):
+            return None
+        return entry
+
+    def is_banned(self, player):
+        return self.ban(player) is not None
+
+    def is_ip_banned(self, ip):
+        self.refresh()
+        return ip in self._ip_index
+
+    def uuid(self, player):
+        """UUID игрока по любому из файлов или None."""
+        self.refresh()
+        for index in (self.usercache, self.whitelist, self.ops, self.banned):
+            entry = index.find(player)
+            if entry and entry.get("uuid"):
+                return entry["uuid"]
+        return None
+
+    def last_seen(self, player):
+        """Примерное время последнего входа по usercache.json или None."""
+        self.refresh()
+        entry = self.usercache.find(player)
+        expires = parse_time(entry.get("expiresOn")) if entry else None
+        return expires - USERCACHE_TTL if expires else None
+
+    def status(self, player):
+        ban = self.ban(player)
+        uuid = self.uuid(player)
+        name = player
+        for index in (self.usercache, self.whitelist, self.ops, self.banned):
+            entry = index.find(player)
+            if entry and entry.get("name"):
+                name = entry["name"]  # имя с правильным регистром
+                break
+        return PlayerStatus(
+            name, uuid, self.is_op(player), self.op_level(player), self.is_whitelisted(player),
+            ban is not None, ban.get("reason") if ban else None, self.last_seen(player),
+        )
+
+    # --- Списки ---
+    def names(self, scope):
+        """Имена игроков для SCOPES (кроме online — их знает только процесс сервера)."""
+        self.refresh()
+        if scope == "whitelist":
+            return self.whitelist.names()
+        if scope == "ops":
+            return self.ops.names()
+        if scope == "banned":
+            return [name for name in self.banned.names() if self.is_banned(name)]
+        if scope == "known":
+            seen = {}
+            for index in (self.usercache, self.whitelist, self.ops, self.banned):
+                for name in index.names():
+                    seen.setdefault(name.lower(), name)
+            return list(seen.values())
+        return []
+
+
+def search(names, query="", limit=None):
+    """Имена, содержащие query (без учёта регистра), по алфавиту; limit — не больше стольких."""
+    query = query.strip().lower()
+    found = sorted((name for name in names if query in name.lower()), key=str.lower)
+    return found[:limit] if limit else found
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def registry_for(server_path):
+    """Общий PlayerRegistry папки сервера."""
+    with _registries_lock:
+        registry = _registries.get(server_path)
+        if registry is None:
+            registry = _registries[server_path] = PlayerRegistry(server_path)
+        return registry
+
+
+# --- Импорт и синхронизация списков ---
+NAME_PATTERN = re.compile(r"[A-Za-z0-9_]{1,16}$")  # ник Java; у Bedrock допустимы и пробелы
+UUID_PATTERN = re.compile(r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$")
+BAN_REASON = "Banned by an operator."
+LARGE_LIST = 1000  # записей; такие файлы пишутся без отступов
+
+# Списки, которые можно синхронизировать
+LISTS = {
+    "whitelist": "Белый список",
+    "banned": "Баны",
+}
+
+# Игрок из импортируемого списка; uuid — None, если в источнике его не было
+Entry = namedtuple("Entry", "name uuid")
+# Синхронизация одного сервера: entries — новое содержимое файла целиком,
+# unresolved — имена, для которых не нашлось UUID (в файл не попадают)
+SyncPlan = namedtuple("SyncPlan", "server_path list_name path stamp entries added removed unresolved reason")
+
+
+def offline_uuid(name):
+    """UUID игрока на сервере с online-mode=false — как его считает сам сервер."""
+    digest = hashlib.md5(("OfflinePlayer:" + name).encode("utf-8")).digest()
+    return str(uuidlib.UUID(bytes=digest, version=3))
+
+
+def _format_uuid(text):
+    return str(uuidlib.UUID(text)) if text and UUID_PATTERN.match(text) else None
+
+
+def parse_import(text):
+    """(игроки, замечания) из текста: json-список (whitelist.json, ops.json, баны, usercache.json),
+    CSV с колонками name/uuid или просто имена по одному в строке."""
+    text = text.lstrip("\ufeff")
+    entries = {}
+    problems = []
+
+    def add(name, uuid=None, where=""):
+        name = name.strip() if isinstance(name, str) else ""
+        if not NAME_PATTERN.match(name):
+            problems.append(f"{where}неверное имя игрока: {name!r}")
+            return
+        entries.setdefault(name.lower(), Entry(name, _format_uuid(uuid)))
+
+    if text.lstrip().startswith("["):
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            return [], [f"Не удалось прочитать JSON: {e}"]
+        for i, item in enumerate(data if isinstance(data, list) else []):
+            if isinstance(item, str):
+                add(item, where=f"запись {i + 1}: ")
+            elif isinstance(item, dict):
+                add(item.get("name"), item.get("uuid"), f"запись {i + 1}: ")
+        return list(entries.values()), problems
+
+    name_column = uuid_column = None
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [field.strip().strip('"') for field in re.split(r"[,;\t]", line)]
+        lowered = [field.lower() for field in fields]
+        if number == 1 and "name" in lowered:
+            name_column = lowered.index("name")
+            uuid_column = lowered.index("uuid") if "uuid" in lowered else None
+            continue
+        if name_column is not None:
+            name = fields[name_column] if name_column < len(fields) else ""
+            uuid = fields[uuid_column] if uuid_column is not None and uuid_column < len(fields) else None
+        else:
+            # Без заголовка: имя — первое поле, похожее на ник, UUID — поле, похожее на UUID
+            name = next((field for field in fields if NAME_PATTERN.match(field)), fields[0])
+            uuid = next((field for field in fields if UUID_PATTERN.match(field)), None)
+        add(name, uuid, f"строка {number}: ")
+    return list(entries.values()), problems
+
+
+def read_import(path):
+    """parse_import() для файла."""
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        return parse_import(f.read())
+
+
+def _list_index(registry, list_name):
+    return registry.whitelist if list_name == "whitelist" else registry.banned
+
+
+def _is_bedrock_list(index):
+    return os.path.basename(index.path) == BEDROCK_ALLOWLIST
+
+
+def known_uuids(server_paths):
+    """Имя (в нижнем регистре) -> UUID по файлам всех этих серверов."""
+    uuids = {}
+    for server_path in server_paths:
+        registry = registry_for(server_path)
+        registry.refresh(force=True)
+        for index in (registry.usercache, registry.whitelist, registry.ops, registry.banned):
+            for entry in index.entries:
+                name, uuid = entry.get("name"), entry.get("uuid")
+                if isinstance(name, str) and isinstance(uuid, str) and uuid:
+                    uuids.setdefault(name.lower(), uuid)
+    return uuids
+
+
+def plan_sync(server_paths, entries, list_name="whitelist", mode="add", reason=BAN_REASON, now=None):
+    """(планы, ошибки) синхронизации списка игроков на серверах; файлы не трогаются.
+
+    mode="add" добавляет недостающих игроков, mode="replace" делает список
+    точно таким, как entries. UUID берутся из источника, из файлов всех
+    выбранных серверов, а на серверах с online-mode=false считаются по имени.
+    Серверы, где ничего не изменится, в планы не попадают.
+    """
+    if list_name not in LISTS:
+        return [], [f"Неизвестный список: {list_name}"]
+    uuids = known_uuids(server_paths)
+    created = (now or datetime.now(timezone.utc)).astimezone().strftime("%Y-%m-%d %H:%M:%S %z")
+    wanted = {entry.name.lower(): entry for entry in entries}
+    plans = []
+    errors = []
+    for server_path in server_paths:
+        registry = registry_for(server_path)
+        index = _list_index(registry, list_name)
+        bedrock = _is_bedrock_list(index)
+        if bedrock and list_name == "banned":
+            errors.append(f"{os.path.basename(server_path)}: у Bedrock-сервера нет файла банов")
+            continue
+        offline = properties.load(server_path).get("online-mode", "true").strip().lower() == "false"
+        kept = []
+        removed = []
+        present = set()
+        for entry in index.entries:
+            name = entry.get("name")
+            key = name.lower() if isinstance(name, str) else None
+            if mode == "replace" and key not in wanted:
+                if key is not None:
+                    removed.append(name)
+                continue
+            kept.append(entry)
+            present.add(key)
+        added = []
+        unresolved = []
+        for key, player in wanted.items():
+            if key in present:
+                continue
+            if bedrock:
+                kept.append({"ignoresPlayerLimit": False, "name": player.name})
+                added.append(player.name)
+                continue
+            uuid = offline_uuid(player.name) if offline else player.uuid or uuids.get(key)
+            if not uuid:
+                unresolved.append(player.name)
+                continue
+            if list_name == "whitelist":
+                kept.append({"uuid": uuid, "name": player.name})
+            else:
+                kept.append({"uuid": uuid, "name": player.name, "created": created, "source": "Server",
+                             "expires": "forever", "reason": reason})
+            added.append(player.name)
+        if added or removed or unresolved:
+            plans.append(SyncPlan(
+                server_path, list_name, index.path, index.stamp, kept, added, removed, unresolved, reason))
+    return plans, errors
+
+
+def format_plans(plans):
+    """Предпросмотр синхронизации: сколько добавится и уберётся на каждом сервере."""
+    lines = []
+    for plan in plans:
+        line = f"{os.path.basename(plan.server_path)}: +{len(plan.added)} −{len(plan.removed)}"
+        if plan.unresolved:
+            line += f", без UUID {len(plan.unresolved)} (запущенный сервер добавит их сам, остановленный — пропустит)"
+        lines.append(line)
+        for sign, names in (("+", plan.added), ("-", plan.removed)):
+            if names:
+                shown = ", ".join(names[:10]) + (f" … и ещё {len(names) - 10}" if len(names) > 10 else "")
+                lines.append(f"  {sign} {shown}")
+    return "\n".join(lines)
+
+
+def write_plan(plan):
+    """Записывает новый список атомарно; исключение, если файл изменили после предпросмотра."""
+    try:
+        stat = os.stat(plan.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = None
+    if stamp != plan.stamp:
+        raise Exception("файл изменён после предпросмотра")
+    # Большие списки — одной строкой: сервер читает их так же, а запись в разы быстрее
+    write_json(plan.path, plan.entries, indent=2 if len(plan.entries) <= LARGE_LIST else None)
+
+
+def online_commands(plan):
+    """Команды, которые применяют план к запущенному серверу вместо записи файла.
+
+    Сервер держит списки в памяти и сам сохраняет их в файл, поэтому запись
+    файла поверх работающего сервера гонялась бы с его собственной. Игроков
+    без UUID сервер найдёт сам (он умеет искать UUID по имени).
+    """
+    if plan.list_name == "banned":
+        return ([f"ban {name} {plan.reason}" for name in plan.added + plan.unresolved]
+                + [f"pardon {name}" for name in plan.removed])
+    prefix = "allowlist" if os.path.basename(plan.path) == BEDROCK_ALLOWLIST else "whitelist"
+    return ([f"{prefix} add {name}" for name in plan.added + plan.unresolved]
+            + [f"{prefix} remove {name}" for name in plan.removed])
+
+
+def apply_sync(plan, runtime=None):
+    """Применяет план к серверу; runtime — его ServerRuntime, если он может быть запущен.
+
+    Остановленному серверу список записывается в файл, запущенному — уходит
+    командами. Возвращает CommandBatch, если серверу отправлены команды, иначе
+    None. Исключение — если файл не удалось записать или сервер запущен не
+    менеджером (команды ему не отправить, а файл он перезапишет своим).
+    """
+    if runtime is not None and runtime.status == "external":
+        raise Exception("сервер запущен не менеджером — остановите его или подключитесь к нему")
+    if runtime is None or not runtime.is_running():
+        if plan.added or plan.removed:
+            write_plan(plan)
+        return None
+    name = f"{LISTS[plan.list_name]}: +{len(plan.added) + len(plan.unresolved)} −{len(plan.removed)}"
+    return runtime.commands.submit(online_commands(plan), name)
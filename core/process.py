@@ -0,0 +1,265 @@
+"""Консоль сервера, работающего через процесс-посредник (см. core.bridge).
+
+Вывод читается и разбирается в фоновом потоке, интерфейсу отдаются готовые пакеты.
+"""
+import json
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+
+from core import bridge, log_engine
+from core.ingest import LineAssembler
+
+# События, которые нужны интерфейсу; за один кадр от каждого типа остаётся последнее.
+# Ошибки учитываются только из stderr: в stdout модов их слишком много и они безвредны.
+UI_EVENTS = (log_engine.READY, log_engine.CRASH, log_engine.TPS, log_engine.LIST)
+# События, время первого появления которых запоминается как этап загрузки
+BOOT_EVENTS = {log_engine.LOADING: "loading", log_engine.SPAWN: "spawn", log_engine.READY: "ready"}
+
+# Сколько ждать, пока посредник запустит сервер и откроет сокет
+LAUNCH_TIMEOUT = 15
+# Строк, ждущих take(); если интерфейс не забирает вывод (окно зависло, поток занят),
+# старые вытесняются — как в ConsoleBuffer, только с подсчётом пропущенных
+PENDING_MAX_LINES = 20000
+
+# dropped — сколько строк вытеснено из очереди с прошлого take()
+OutputBatch = namedtuple("OutputBatch", "lines events players returncode dropped")
+OutputBatch.__new__.__defaults__ = (0,)
+
+
+class ServerProcess:
+    """Подключение к консоли сервера с разбором вывода вне потока интерфейса.
+
+    Поток чтения собирает строки, классифицирует их и ведёт список игроков.
+    Интерфейс раз в кадр забирает готовый пакет через take(): строки для
+    консоли, сжатые события и снимок игроков, если он изменился.
+    """
+
+    def __init__(self, cwd, loader="paper"):
+        self.cwd = cwd
+        self.classifier = log_engine.get_classifier(loader)
+        self.players = set()
+        self.ready = False
+        self.stop_requested = False
+        self.started_at = None
+        self.boot = {}  # этап загрузки -> время (time.time()), отмечается в потоке чтения
+        self.returncode = None
+        self.host_pid = None
+        self._pid = None
+        self._sock = None
+        self._detached = False
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=PENDING_MAX_LINES)
+        self._dropped = 0
+        self.dropped = 0  # строк вытеснено за всё время
+        self._events = {}
+        self._players_changed = False
+        self._exited = threading.Event()
+        self._exit_reported = False
+
+    @classmethod
+    def launch(cls, args, cwd, loader="paper"):
+        """Запускает сервер через отсоединённого посредника; OSError, если запуск не удался."""
+        bridge.clear_state(cwd)
+        host = bridge.launch(cwd, args)
+        deadline = time.time() + LAUNCH_TIMEOUT
+        while True:
+            state = bridge.read_state(cwd)
+            if state and state.get("pid") == host.pid:
+                if "error" in state:
+                    raise OSError(state["error"])
+                if "port" in state:
+                    break
+            if host.poll() is not None:
+                raise OSError(f"Процесс-посредник завершился при запуске (см. {bridge.STATE_DIR}/{bridge.LOG_FILE})")
+            if time.time() > deadline:
+                host.kill()
+                raise OSError("Процесс-посредник не ответил вовремя")
+            time.sleep(0.05)
+        process = cls(cwd, loader)
+        # Сервер мог упасть сразу — тогда забираем его вывод и код выхода из хвоста
+        process._connect(state, allow_exited=True)
+        return process
+
+    @classmethod
+    def attach(cls, cwd, loader="paper"):
+        """Переподключается к уже работающему серверу; None, если его нет."""
+        state = bridge.read_state(cwd)
+        if not state or "port" not in state or "exit_code" in state:
+            return None
+        process = cls(cwd, loader)
+        try:
+            if not process._connect(state):
+                return None
+        except OSError:
+            return None
+        return process
+
+    def _connect(self, state, allow_exited=False):
+        sock = socket.create_connection(("127.0.0.1", state["port"]), timeout=2)
+        try:
+            sock.sendall(state["token"].encode("ascii") + b"\n")
+            frame = bridge.recv_frame(sock)
+        except OSError:
+            sock.close()
+            raise
+        if not frame or frame[0] != bridge.HELLO:
+            sock.close()
+            raise OSError("Не удалось подключиться к консоли сервера")
+        info = json.loads(frame[1].decode("utf-8"))
+        if info.get("exit_code") is not None and not allow_exited:
+            sock.close()
+            return False
+        sock.settimeout(None)
+        self.host_pid = info["pid"]
+        self._pid = info["child_pid"]
+        self.started_at = info["started_at"]
+        if info.get("spawned_at"):
+            self.boot["spawned"] = info["spawned_at"]
+        meta = info.get("meta") or {}
+        self.ready = meta.get("ready", False)
+        self.players = set(meta.get("players", []))
+        self._players_changed = bool(self.players)
+        self._sock = sock
+        threading.Thread(target=self._read, daemon=True).start()
+        return True
+
+    @property
+    def pid(self):
+        """PID самого сервера (java или bedrock_server)."""
+        return self._pid
+
+    def is_running(self):
+        return self._sock is not None and not self._exited.is_set()
+
+    def _send(self, kind, payload=b""):
+        if not self.is_running():
+            return False
+        with self._send_lock:
+            try:
+                bridge.send_frame(self._sock, kind, payload)
+                return True
+            except OSError:
+                return False
+
+    def write(self, text):
+        """Пишет текст в stdin сервера; возвращает False, если консоль недоступна."""
+        return self._send(bridge.INPUT, text.encode("utf-8"))
+
+    def terminate(self):
+        self._send(bridge.TERMINATE)
+
+    def kill(self):
+        self._send(bridge.KILL)
+
+    def detach(self):
+        """Отключается от консоли, не останавливая сервер."""
+        if self._sock is not None and not self._exited.is_set():
+            self._detached = True
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+
+    def wait(self, timeout=None):
+        """Ждёт завершения сервера и разбора всего его вывода."""
+        return self._exited.wait(timeout)
+
+    def reconcile_players(self, players):
+        """Заменяет список игроков, если он разошёлся с данными пинга (пропущенная строка лога)."""
+        players = set(players)
+        with self._lock:
+            if players == self.players:
+                return False
+            self.players = players
+            self._players_changed = True
+            meta = {"ready": self.ready, "players": sorted(players)}
+        self._send(bridge.META, json.dumps(meta).encode("utf-8"))
+        return True
+
+    def boot_phases(self):
+        with self._lock:
+            return dict(self.boot)
+
+    def take(self):
+        """Забирает накопленное с прошлого вызова. Выполняется в потоке интерфейса."""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+            events = list(self._events.values())
+            self._events = {}
+            players = sorted(self.players) if self._players_changed else None
+            self._players_changed = False
+            returncode = None
+            if self._exited.is_set() and not self._exit_reported and not self._detached:
+                self._exit_reported = True
+                returncode = self.returncode
+        return OutputBatch(lines, events, players, returncode, dropped)
+
+    # --- Фоновый поток ---
+    def _read(self):
+        assemblers = {bridge.STDOUT: LineAssembler(), bridge.STDERR: LineAssembler()}
+        streams = {bridge.STDOUT: "stdout", bridge.STDERR: "stderr"}
+        returncode = None
+        try:
+            while True:
+                frame = bridge.recv_frame(self._sock)
+                if frame is None:
+                    break
+                kind, payload = frame
+                if kind in assemblers:
+                    self._ingest(assemblers[kind].feed(payload), streams[kind])
+                elif kind == bridge.EXIT:
+                    returncode = int(payload)
+                    break
+        except (OSError, ValueError):
+            pass
+        for kind, assembler in assemblers.items():
+            self._ingest(assembler.flush(), streams[kind])
+        if returncode is None and not self._detached:
+            # Соединение оборвалось без кадра завершения — смотрим, что записал посредник
+            state = bridge.read_state(self.cwd) or {}
+            returncode = state.get("exit_code", -1)
+        self.returncode = returncode
+        with self._lock:
+            if self.players:
+                self.players.clear()
+                self._players_changed = True
+        self._exited.set()
+
+    def _ingest(self, lines, stream):
+        if not lines:
+            return
+        events = self.classifier.classify_lines(lines, stream)
+        now = time.time()
+        meta_changed = False
+        with self._lock:
+            overflow = len(self._lines) + len(lines) - self._lines.maxlen
+            if overflow > 0:
+                self._dropped += overflow
+                self.dropped += overflow
+            self._lines.extend(lines)
+            if "first_output" not in self.boot:
+                self.boot["first_output"] = now
+            for event in events:
+                kind = event.kind
+                if kind in BOOT_EVENTS and BOOT_EVENTS[kind] not in self.boot:
+                    self.boot[BOOT_EVENTS[kind]] = now
+                if kind == log_engine.JOIN:
+                    self.players.add(event.player)
+                    self._players_changed = meta_changed = True
+                elif kind == log_engine.LEAVE:
+                    self.players.discard(event.player)
+                    self._players_changed = meta_changed = True
+                elif kind in UI_EVENTS or (kind == log_engine.ERROR and stream == "stderr"):
+                    self._events[kind] = event
+                    if kind == log_engine.READY and not self.ready:
+                        self.ready = meta_changed = True
+            meta = {"ready": self.ready, "players": sorted(self.players)} if meta_changed else None
+        if meta:
+            # Посредник хранит это для следующего переподключения
+            self._send(bridge.META, json.dumps(meta).encode("utf-8"))
@@ -0,0 +1,415 @@
+"""Чтение и правка server.properties без потери комментариев, порядка строк и экранирования.
+
+Файл разбирается по правилам java.util.Properties (разделители «=», «:» или
+пробел, экранирование \\uXXXX, перенос строки обратной косой чертой) один раз
+на каждое его изменение: load() отдаёт разобранный файл из кэша, пока у файла
+те же время изменения и размер. При записи меняются только строки изменённых
+ключей, всё остальное (комментарии, неизвестные ключи, чужое экранирование)
+остаётся байт в байт.
+
+Известные ключи проверяются по SCHEMA; plan_changes/apply_changes правят
+сразу много серверов с предпросмотром разницы.
+"""
+import os
+import re
+import threading
+from collections import namedtuple
+
+PROPERTIES_FILE = "server.properties"
+
+# --- Схема известных ключей ---
+# kind: "bool", "int", "enum" или "str"; minimum/maximum — для int, choices — для enum
+PropertySpec = namedtuple("PropertySpec", "kind default minimum maximum choices")
+
+
+def _bool(default):
+    return PropertySpec("bool", default, None, None, None)
+
+
+def _int(default, minimum=None, maximum=None):
+    return PropertySpec("int", default, minimum, maximum, None)
+
+
+def _enum(default, *choices):
+    return PropertySpec("enum", default, None, None, choices)
+
+
+def _str(default=""):
+    return PropertySpec("str", default, None, None, None)
+
+
+SCHEMA = {
+    "server-port": _int(25565, 1, 65535),
+    "server-ip": _str(),
+    "motd": _str("A Minecraft Server"),
+    "max-players": _int(20, 0, 2 ** 31 - 1),
+    "view-distance": _int(10, 2, 32),
+    "simulation-distance": _int(10, 2, 32),
+    "difficulty": _enum("easy", "peaceful", "easy", "normal", "hard"),
+    "gamemode": _enum("survival", "survival", "creative", "adventure", "spectator"),
+    "level-name": _str("world"),
+    "level-seed": _str(),
+    "online-mode": _bool(True),
+    "pvp": _bool(True),
+    "hardcore": _bool(False),
+    "white-list": _bool(False),
+    "enforce-whitelist": _bool(False),
+    "hide-online-players": _bool(False),
+    "allow-flight": _bool(False),
+    "allow-nether": _bool(True),
+    "enable-command-block": _bool(False),
+    "spawn-protection": _int(16, 0),
+    "spawn-monsters": _bool(True),
+    "spawn-animals": _bool(True),
+    "spawn-npcs": _bool(True),
+    "generate-structures": _bool(True),
+    "force-gamemode": _bool(False),
+    "max-world-size": _int(29999984, 1, 29999984),
+    "max-tick-time": _int(60000, -1),
+    "network-compression-threshold": _int(256, -1),
+    "op-permission-level": _int(4, 0, 4),
+    "function-permission-level": _int(2, 1, 4),
+    "entity-broadcast-range-percentage": _int(100, 10, 1000),
+    "player-idle-timeout": _int(0, 0),
+    "rate-limit": _int(0, 0),
+    "sync-chunk-writes": _bool(True),
+    "enable-status": _bool(True),
+    "enable-query": _bool(False),
+    "query.port": _int(25565, 1, 65535),
+    "enable-rcon": _bool(False),
+    "rcon.port": _int(25575, 1, 65535),
+    "rcon.password": _str(),
+    "broadcast-rcon-to-ops": _bool(True),
+    "broadcast-console-to-ops": _bool(True),
+    "require-resource-pack": _bool(False),
+    "enforce-secure-profile": _bool(True),
+    "prevent-proxy-connections": _bool(False),
+    "log-ips": _bool(True),
+}
+# Старые серверы пишут сложность и режим числами
+_NUMERIC_ENUMS = {"difficulty": ("0", "1", "2", "3"), "gamemode": ("0", "1", "2", "3")}
+
+
+def validate(key, value):
+    """Сообщение об ошибке, если значение не подходит ключу, иначе None; неизвестные ключи не проверяются."""
+    spec = SCHEMA.get(key)
+    if spec is None:
+        return None
+    text = to_text(value)
+    if "\n" in text or "\r" in text:
+        return f"{key}: значение не может содержать перевод строки"
+    if spec.kind == "bool" and text not in ("true", "false"):
+        return f"{key}: ожидается true или false, а не «{text}»"
+    if spec.kind == "int":
+        if not re.fullmatch(r"-?\d+", text):
+            return f"{key}: ожидается целое число, а не «{text}»"
+        number = int(text)
+        if spec.minimum is not None and number < spec.minimum or spec.maximum is not None and number > spec.maximum:
+            low = spec.minimum if spec.minimum is not None else "…"
+            high = spec.maximum if spec.maximum is not None else "…"
+            return f"{key}: число должно быть от {low} до {high}"
+    if spec.kind == "enum" and text not in spec.choices + _NUMERIC_ENUMS.get(key, ()):
+        return f"{key}: допустимо {', '.join(spec.choices)}"
+    return None
+
+
+def to_text(value):
+    """Значение для файла: True/False -> true/false, остальное — str()."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def to_value(key, text):
+    """Значение из файла в тип по схеме; не подходящее схеме — как есть (строкой)."""
+    spec = SCHEMA.get(key)
+    if spec is None or text is None or validate(key, text):
+        return text
+    if spec.kind == "bool":
+        return text == "true"
+    if spec.kind == "int":
+        return int(text)
+    return text
+
+
+# --- Разбор и запись в формате java.util.Properties ---
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "f": "\f"}
+
+
+def _unescape(text):
+    out = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char != "\\" or i + 1 == len(text):
+            out.append(char)
+            i += 1
+            continue
+        char = text[i + 1]
+        if char == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", text[i + 2:i + 6]):
+            out.append(chr(int(text[i + 2:i + 6], 16)))
+            i += 6
+            continue
+        out.append(_ESCAPES.get(char, char))
+        i += 2
+    return "".join(out)
+
+
+def _escape(text, is_key):
+    out = []
+    for i, char in enumerate(text):
+        if char == "\\":
+            out.append("\\\\")
+        elif char in "\t\n\r\f":
+            out.append("\\" + {"\t": "t", "\n": "n", "\r": "r", "\f": "f"}[char])
+        elif char in "=:" or char in "#!" and i == 0 or char == " " and (is_key or i == 0):
+            out.append("\\" + char)
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def format_line(key, value):
+    return f"{_escape(key, True)}={_escape(to_text(value), False)}"
+
+
+def _split_entry(logical):
+    """(ключ, значение) логической строки без переносов; экранирование уже снято."""
+    text = logical.lstrip(" \t\f")
+    i = 0
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] in "=: \t\f":
+            break
+        i += 1
+    key = text[:i]
+    rest = text[i:].lstrip(" \t\f")
+    if rest[:1] in ("=", ":") and (i == len(text) or text[i] in " \t\f=:"):
+        rest = rest[1:].lstrip(" \t\f")
+    return _unescape(key), _unescape(rest)
+
+
+def _continues(line):
+    backslashes = len(line) - len(line.rstrip("\\"))
+    return backslashes % 2 == 1
+
+
+class Properties:
+    """Разобранный server.properties: строки файла как есть и значения ключей.
+
+    entries — список (исходный текст логической строки, ключ или None для
+    комментариев и пустых строк, значение).
+    """
+
+    def __init__(self, text="", stamp=None):
+        self.stamp = stamp  # (mtime_ns, размер) файла при чтении; None — файла не было
+        self.newline = "\r\n" if "\r\n" in text else "\n"
+        self.entries = []
+        self._values = {}
+        physical = text.splitlines()
+        i = 0
+        while i < len(physical):
+            raw = [physical[i]]
+            stripped = physical[i].lstrip(" \t\f")
+            if not stripped or stripped.startswith(("#", "!")):
+                self.entries.append((physical[i], None, None))
+                i += 1
+                continue
+            logical = physical[i]
+            while _continues(logical) and i + 1 < len(physical):
+                i += 1
+                raw.append(physical[i])
+                logical = logical[:-1] + physical[i].lstrip(" \t\f")
+            if _continues(logical):
+                logical = logical[:-1]
+            key, value = _split_entry(logical)
+            self.entries.append((self.newline.join(raw), key, value))
+            self._values[key] = value  # как в Java: при повторе ключа действует последний
+            i += 1
+
+    def copy(self):
+        other = Properties.__new__(Properties)
+        other.stamp = self.stamp
+        other.newline = self.newline
+        other.entries = list(self.entries)
+        other._values = dict(self._values)
+        return other
+
+    # --- Чтение ---
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def typed(self, key, default=None):
+        """Значение в типе схемы (bool, int, str); нет ключа — default или значение по схеме."""
+        if key not in self._values:
+            if default is None and key in SCHEMA:
+                return SCHEMA[key].default
+            return default
+        return to_value(key, self._values[key])
+
+    def as_dict(self):
+        return dict(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def problems(self):
+        """Ошибки значений известных ключей в файле."""
+        return [error for error in (validate(key, value) for key, value in self._values.items()) if error]
+
+    # --- Правка ---
+    def set(self, key, value):
+        """Меняет строку ключа на месте (повторы ключа убираются), новый ключ дописывает в конец."""
+        text = to_text(value)
+        line = format_line(key, text)
+        positions = [i for i, entry in enumerate(self.entries) if entry[1] == key]
+        if positions:
+            self.entries[positions[-1]] = (line, key, text)
+            for i in reversed(positions[:-1]):
+                del self.entries[i]
+        else:
+            self.entries.append((line, key, text))
+        self._values[key] = text
+
+    def remove(self, key):
+        self.entries = [entry for entry in self.entries if entry[1] != key]
+        self._values.pop(key, None)
+
+    def text(self):
+        if not self.entries:
+            return ""
+        return self.newline.join(entry[0] for entry in self.entries) + self.newline
+
+
+# --- Файлы и кэш ---
+_cache = {}  # путь к файлу -> Properties
+_lock = threading.Lock()
+
+
+def properties_path(server_path):
+    return os.path.join(server_path, PROPERTIES_FILE)
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load(server_path):
+    """Разобранный server.properties сервера из кэша; перечитывается, только если файл изменился.
+
+    Объект общий — для правки берите load(...).copy().
+    """
+    path = properties_path(server_path)
+    stamp = _stamp(path)
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+    if stamp is None:
+        properties = Properties()
+    else:
+        try:
+            # surrogateescape: байты не в UTF-8 (старые файлы в Latin-1) переживают запись без изменений
+            with open(path, encoding="utf-8", errors="surrogateescape", newline="") as f:
+                properties = Properties(f.read(), stamp)
+        except OSError:
+            properties = Properties()
+    with _lock:
+        _cache[path] = properties
+    return properties
+
+
+def save(server_path, properties):
+    """Атомарно записывает файл и кладёт записанное в кэш."""
+    path = properties_path(server_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape", newline="") as f:
+        f.write(properties.text())
+    os.replace(tmp_path, path)
+    saved = properties.copy()
+    saved.stamp = _stamp(path)
+    with _lock:
+        _cache[path] = saved
+
+
+def read_properties(server_path):
+    """Словарь ключ -> значение; пустой, если файла нет."""
+    return load(server_path).as_dict()
+
+
+def update_properties(server_path, updates):
+    """Меняет значения на месте, новые ключи дописывает в конец; остальные строки не трогает."""
+    properties = load(server_path).copy()
+    for key, value in updates.items():
+        properties.set(key, value)
+    save(server_path, properties)
+
+
+# --- Правка многих серверов ---
+# old — значение в файле при планировании (None — ключа нет)
+Change = namedtuple("Change", "server_path key old new")
+
+
+def plan_changes(server_paths, updates):
+    """(изменения, ошибки) для записи updates в server.properties каждого сервера; файлы не трогаются.
+
+    Ошибки — значения, не прошедшие проверку схемы; серверы, где значение уже
+    такое, в изменения не попадают.
+    """
+    errors = [error for error in (validate(key, value) for key, value in updates.items()) if error]
+    if errors:
+        return [], errors
+    changes = []
+    for server_path in server_paths:
+        properties = load(server_path)
+        for key, value in updates.items():
+            text = to_text(value)
+            old = properties.get(key)
+            if old != text:
+                changes.append(Change(server_path, key, old, text))
+    return changes, []
+
+
+def format_diff(changes):
+    """Предпросмотр изменений по серверам в виде diff."""
+    lines = []
+    current = None
+    for change in changes:
+        if change.server_path != current:
+            current = change.server_path
+            lines.append(f"=== {os.path.basename(current)}")
+        if change.old is not None:
+            lines.append(f"- {change.key}={change.old}")
+        lines.append(f"+ {change.key}={change.new}")
+    return "\n".join(lines)
+
+
+def apply_changes(changes):
+    """Записывает изменения; словарь папка сервера -> ошибка для незаписанных.
+
+    Если файл успели поменять после предпросмотра и старое значение не
+    совпадает, сервер пропускается — чужая правка не затирается.
+    """
+    by_server = {}
+    for change in changes:
+        by_server.setdefault(change.server_path, []).append(change)
+    failed = {}
+    for server_path, server_changes in by_server.items():
+        properties = load(server_path).copy()
+        conflicts = [c.key for c in server_changes if properties.get(c.key) not in (c.old, c.new)]
+        if conflicts:
+            failed[server_path] = f"файл изменён после предпросмотра ({', '.join(conflicts)})"
+            continue
+        for change in server_changes:
+            properties.set(change.key, change.new)
+        try:
+            save(server_path, properties)
+        except OSError as e:
+            failed[server_path] = str(e)
+    return failed
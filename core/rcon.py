@@ -0,0 +1,212 @@
+"""Клиент RCON для Java-серверов: постоянное соединение и ответ на каждую команду.
+
+Протокол Source RCON: пакет — длина, id, тип и тело с двумя нулевыми байтами.
+Длинный ответ сервер режет на несколько пакетов, поэтому после первой части
+ответа отправляется пакет неизвестного серверу типа: его ответ ("Unknown
+request") приходит с тем же id после всех частей и отмечает конец ответа.
+
+Vanilla и Paper читают сокет буфером в 1460 байт и ждут в каждом чтении ровно
+один пакет — несколько пакетов, склеенных в одну запись, сервер отбрасывает.
+Поэтому каждый пакет отправляется отдельно и только после ответа на предыдущий.
+"""
+import secrets
+import socket
+import struct
+import threading
+
+from core import properties
+
+DEFAULT_PORT = 25575
+TIMEOUT = 5
+MAX_COMMAND_BYTES = 1446  # длиннее vanilla-сервер не принимает
+
+AUTH = 3
+EXEC = 2
+RESPONSE = 0
+MARKER = 200
+
+_HEADER = struct.Struct("<iii")
+
+
+class RconError(OSError):
+    pass
+
+
+def encode_packet(request_id, kind, body=""):
+    data = body.encode("utf-8") + b"\0\0"
+    return _HEADER.pack(len(data) + 8, request_id, kind) + data
+
+
+class RconClient:
+    """Одно соединение RCON; переподключается само, если сервер его закрыл."""
+
+    def __init__(self, host, port, password, timeout=TIMEOUT):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._buffer = b""
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _id(self):
+        self._next_id = self._next_id % 0x7FFFFFFF + 1
+        return self._next_id
+
+    def connect(self):
+        self.close()
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        # Пакеты маленькие и идут по одному — без Nagle каждый уходит сразу
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._buffer = b""
+        request_id = self._id()
+        try:
+            sock.sendall(encode_packet(request_id, AUTH, self.password))
+            while True:
+                response_id, _, _ = self._read_packet()
+                if response_id == -1:
+                    raise RconError("Неверный пароль RCON")
+                if response_id == request_id:
+                    break
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _read_packet(self):
+        while True:
+            if len(self._buffer) >= 4:
+                (length,) = struct.unpack_from("<i", self._buffer)
+                if length < 10 or length > 1 << 20:
+                    raise RconError("Некорректный пакет RCON")
+                if len(self._buffer) >= length + 4:
+                    _, request_id, kind = _HEADER.unpack_from(self._buffer)
+                    body = self._buffer[12:length + 2]
+                    self._buffer = self._buffer[length + 4:]
+                    return request_id, kind, body.decode("utf-8", "replace")
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionResetError("Сервер закрыл соединение RCON")
+            self._buffer += chunk
+
+    def command(self, command):
+        """Выполняет команду и возвращает ответ сервера."""
+        return self.pipeline([command])[0]
+
+    def pipeline(self, commands):
+        """Выполняет команды по очереди в одном соединении и возвращает список ответов в том же порядке."""
+        for command in commands:
+            if len(command.encode("utf-8")) > MAX_COMMAND_BYTES:
+                raise RconError(f"Команда длиннее {MAX_COMMAND_BYTES} байт")
+        with self._lock:
+            for attempt in (1, 2):
+                if self._sock is None:
+                    self.connect()
+                received = []
+                try:
+                    return self._pipeline(commands, received)
+                except socket.timeout:
+                    self.close()
+                    raise RconError("Сервер не ответил по RCON")
+                except OSError:
+                    self.close()
+                    # Соединение, оборванное до первого ответа, обычно просто устарело
+                    # (сервер перезапускался) — команды не выполнены, можно повторить
+                    if received or attempt == 2:
+                        raise
+
+    def _pipeline(self, commands, received):
+        for command in commands:
+            command_id, marker_id = self._id(), self._id()
+            self._sock.sendall(encode_packet(command_id, EXEC, command))
+            parts = [self._read_response(command_id)]
+            # Маркер — только после первой части: сервер уже пишет ответ и допишет его до маркера
+            self._sock.sendall(encode_packet(marker_id, MARKER))
+            while True:
+                response_id, _, body = self._read_packet()
+                if response_id == marker_id:
+                    break
+                if response_id == command_id:
+                    parts.append(body)
+            received.append("".join(parts))
+        return received
+
+    def _read_response(self, request_id):
+        while True:
+            response_id, _, body = self._read_packet()
+            if response_id == -1:
+                raise RconError("Сервер отклонил команду RCON (нет авторизации)")
+            if response_id == request_id:
+                return body
+
+
+class RconPool:
+    """По одному постоянному соединению на сервер; адрес и пароль берутся из server.properties."""
+
+    def __init__(self, host="127.0.0.1"):
+        self.host = host
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, server_path):
+        """RconClient сервера или None, если RCON в нём не включён."""
+        props = properties.read_properties(server_path)
+        if props.get("enable-rcon", "false").lower() != "true" or not props.get("rcon.password"):
+            return None
+        try:
+            port = int(props.get("rcon.port") or DEFAULT_PORT)
+        except ValueError:
+            return None
+        password = props["rcon.password"]
+        with self._lock:
+            client = self._clients.get(server_path)
+            if client is None or (client.port, client.password) != (port, password):
+                if client is not None:
+                    client.close()
+                client = self._clients[server_path] = RconClient(self.host, port, password)
+            return client
+
+    def close(self, server_path):
+        with self._lock:
+            client = self._clients.pop(server_path, None)
+        if client is not None:
+            client.close()
+
+    def close_all(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+
+def enable_rcon(server_path, used_ports=()):
+    """Включает RCON в server.properties (порт не из used_ports, случайный пароль); вернёт порт."""
+    props = properties.read_properties(server_path)
+    try:
+        port = int(props.get("rcon.port") or 0)
+    except ValueError:
+        port = 0
+    if not port or port in used_ports:
+        port = DEFAULT_PORT
+        while port in used_ports:
+            port += 1
+    properties.update_properties(server_path, {
+        "enable-rcon": "true",
+        "rcon.port": port,
+        "rcon.password": props.get("rcon.password") or secrets.token_urlsafe(18),
+        "broadcast-rcon-to-ops": "false",
+    })
+    return port
+
+
+def rcon_enabled(server_path):
+    return properties.read_properties(server_path).get("enable-rcon", "false").lower() == "true"
@@ -0,0 +1,141 @@
+"""Серверы в папке серверов: кэш по времени изменения папок и отслеживание изменений.
+
+Папка сервера перечитывается, только если изменилось её mtime (файл добавлен,
+удалён или переименован), поэтому повторное сканирование сотен серверов —
+это один scandir корня и по одному stat на сервер. Изменения отдаются
+списками добавленных, удалённых и изменённых серверов, чтобы интерфейс
+перерисовывал только их. Когда проверять, решает вызывающий: окно — по
+QFileSystemWatcher, daemon — периодически.
+"""
+import os
+import threading
+from collections import namedtuple
+
+BEDROCK_EXECUTABLE = "bedrock_server.exe"
+
+# kind — "java" или "bedrock"; executable — jar-файл сервера или bedrock_server.exe
+ServerInfo = namedtuple("ServerInfo", "name path kind executable mtime")
+RegistryChanges = namedtuple("RegistryChanges", "added removed changed")
+
+
+def _executable(files):
+    """Исполняемый файл сервера среди имён файлов папки или None."""
+    if BEDROCK_EXECUTABLE in files:
+        return BEDROCK_EXECUTABLE
+    jars = sorted(f for f in files if f.endswith(".jar") and not f.endswith("installer.jar"))
+    return jars[0] if jars else None
+
+
+def server_executable(server_dir):
+    """Имя исполняемого файла сервера в папке (как его видит реестр) или None."""
+    try:
+        return _executable(os.listdir(server_dir))
+    except OSError:
+        return None
+
+
+def is_server_dir(server_dir):
+    """Есть ли в папке jar-файл сервера (не installer) или bedrock_server.exe."""
+    return server_executable(server_dir) is not None
+
+
+def list_servers(servers_dir):
+    """Имена серверов без кэша; папка серверов создаётся, если её ещё нет."""
+    registry = ServerRegistry(servers_dir)
+    registry.scan()
+    return registry.names()
+
+
+def server_path(servers_dir, name):
+    return os.path.join(servers_dir, name)
+
+
+class ServerRegistry:
+    """Кэш серверов папки: имя -> ServerInfo; scan() и refresh() возвращают RegistryChanges."""
+
+    def __init__(self, servers_dir):
+        self.servers_dir = servers_dir
+        self._servers = {}
+        self._mtimes = {}  # имя папки -> mtime при последней проверке (в том числе не-серверы)
+        self._lock = threading.Lock()
+
+    def names(self):
+        with self._lock:
+            return sorted(self._servers, key=str.lower)
+
+    def get(self, name):
+        with self._lock:
+            return self._servers.get(name)
+
+    def servers(self):
+        with self._lock:
+            return [self._servers[name] for name in sorted(self._servers, key=str.lower)]
+
+    def _inspect(self, name, mtime):
+        path = server_path(self.servers_dir, name)
+        executable = server_executable(path)
+        if executable is None:
+            return None
+        kind = "bedrock" if executable == BEDROCK_EXECUTABLE else "java"
+        return ServerInfo(name, path, kind, executable, mtime)
+
+    def scan(self):
+        """Проверяет всю папку серверов; перечитываются только папки с новым mtime."""
+        if not self.servers_dir or not os.path.exists(self.servers_dir):
+            os.makedirs(self.servers_dir, exist_ok=True)
+        found = {}
+        with os.scandir(self.servers_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        found[entry.name] = entry.stat().st_mtime_ns
+                except OSError:
+                    continue
+        with self._lock:
+            old_mtimes = self._mtimes
+            old_servers = dict(self._servers)
+        servers = {}
+        for name, mtime in found.items():
+            if old_mtimes.get(name) == mtime:
+                if name in old_servers:
+                    servers[name] = old_servers[name]
+                continue
+            info = self._inspect(name, mtime)
+            if info is not None:
+                servers[name] = info
+        return self._replace(servers, found, old_servers)
+
+    def refresh(self, name):
+        """Перечитывает одну папку (её изменил наблюдатель); RegistryChanges."""
+        path = server_path(self.servers_dir, name)
+        with self._lock:
+            servers = dict(self._servers)
+            mtimes = dict(self._mtimes)
+            old_servers = dict(self._servers)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            servers.pop(name, None)
+            mtimes.pop(name, None)
+        else:
+            mtimes[name] = mtime
+            info = self._inspect(name, mtime) if os.path.isdir(path) else None
+            if info is None:
+                servers.pop(name, None)
+            else:
+                servers[name] = info
+        return self._replace(servers, mtimes, old_servers)
+
+    def _replace(self, servers, mtimes, old_servers):
+        with self._lock:
+            self._servers = servers
+            self._mtimes = mtimes
+        added = sorted(set(servers) - set(old_servers), key=str.lower)
+        removed = sorted(set(old_servers) - set(servers), key=str.lower)
+        changed = sorted(
+            (name for name in set(servers) & set(old_servers)
+             if servers[name][:4] != old_servers[name][:4]),
+            key=str.lower,
+        )
+        return RegistryChanges(added, removed, changed)
+
@@ -0,0 +1,251 @@
+"""Сессии игроков: кто, когда зашёл и вышел — в <сервер>/.msm/sessions.db.
+
+Supervisor.poll() передаёт SessionRecorder текущий список игроков каждого
+сервера, к процессу которого подключён менеджер, и пустой — когда процесс
+завершился; если список изменился, снимок ставится в очередь, а фоновый поток
+раз в FLUSH_SECONDS записывает все накопившиеся снимки одной транзакцией
+(SQLite в режиме WAL). Поток интерфейса только сравнивает множества и дописывает в
+очередь, поэтому частые входы и выходы не задерживают вывод консоли.
+
+Сессия открыта, пока игрок есть в списке; закрывается, когда его там нет.
+Если менеджер был закрыт, а сервер продолжал работать, сессии тех, кто всё
+ещё онлайн, продолжаются. Сводки (пик онлайна, тепловая карта по часам,
+самые активные игроки) считаются по сессиям за выбранный период.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+
+from core import bridge
+
+SESSIONS_FILE = "sessions.db"
+FLUSH_SECONDS = 1.0
+FLUSH_EVENTS = 500  # столько снимков в очереди — записываем, не дожидаясь FLUSH_SECONDS
+
+# left — None, пока игрок на сервере
+Session = namedtuple("Session", "player joined left")
+# total и average — секунды; peak — наибольшее число игроков одновременно, peak_time — когда впервые
+Summary = namedtuple("Summary", "sessions players total average peak peak_time")
+
+PERIODS = {
+    "Сутки": 1,
+    "Неделя": 7,
+    "Месяц": 30,
+    "Всё время": None,
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    joined REAL NOT NULL,
+    left REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_joined ON sessions(joined);
+CREATE INDEX IF NOT EXISTS sessions_open ON sessions(player) WHERE left IS NULL;
+"""
+
+
+def sessions_path(server_path):
+    return os.path.join(server_path, bridge.STATE_DIR, SESSIONS_FILE)
+
+
+def connect(server_path, create=False):
+    """Соединение с базой сессий сервера; None, если базы нет и create=False."""
+    path = sessions_path(server_path)
+    if not create and not os.path.exists(path):
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Запись идёт из потока SessionRecorder и из stop() — под его блокировкой
+    connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")  # чтение сводок не ждёт записи и наоборот
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA_SQL)
+    return connection
+
+
+class SessionRecorder:
+    """Очередь снимков списков игроков и фоновый поток, который пишет их в базы серверов."""
+
+    def __init__(self, interval=FLUSH_SECONDS):
+        self.interval = interval
+        self.writes = 0  # транзакций записано
+        self.error = None  # последняя ошибка записи
+        self._pending = deque()  # (папка сервера, frozenset игроков, время)
+        self._last = {}  # папка сервера -> последний поставленный в очередь снимок
+        self._seen = set()  # серверы, снимок которых уже записан этим процессом
+        self._connections = {}
+        self._lock = threading.Lock()  # запись в базы — из потока и из stop()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def observe(self, server_path, players, now=None):
+        """Запоминает список игроков сервера; в очередь попадают только изменения."""
+        players = frozenset(players)
+        if self._last.get(server_path) == players:
+            return
+        self._last[server_path] = players
+        self._pending.append((server_path, players, now or time.time()))
+        if len(self._pending) >= FLUSH_EVENTS:
+            self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Записывает остаток очереди и закрывает базы; открытые сессии остаются открытыми."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+        with self._lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._connections.clear()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Записывает накопившиеся снимки: по одной транзакции на сервер."""
+        with self._lock:
+            by_server = {}
+            while self._pending:
+                server_path, players, when = self._pending.popleft()
+                by_server.setdefault(server_path, []).append((players, when))
+            for server_path, snapshots in by_server.items():
+                try:
+                    connection = self._connections.get(server_path)
+                    if connection is None:
+                        connection = self._connections[server_path] = connect(server_path, create=True)
+                    with connection:
+                        for players, when in snapshots:
+                            self._apply(connection, players, when, server_path not in self._seen)
+                            self._seen.add(server_path)
+                    self.writes += 1
+                except (OSError, sqlite3.Error) as e:
+                    self.error = f"{os.path.basename(server_path)}: {e}"  # папку удалили или диск занят
+
+    @staticmethod
+    def _apply(connection, players, when, first):
+        open_sessions = dict(connection.execute("SELECT player, id FROM sessions WHERE left IS NULL"))
+        closed = [session_id for player, session_id in open_sessions.items() if player not in players]
+        if closed:
+            left = when
+            if first:
+                # Сессии, оставшиеся открытыми с прошлого раза, закончились, пока менеджер не смотрел;
+                # когда именно — неизвестно, берём последнее записанное событие сервера
+                left = connection.execute(
+                    "SELECT MAX(MAX(joined), COALESCE(MAX(left), 0)) FROM sessions").fetchone()[0] or when
+            connection.executemany("UPDATE sessions SET left = ? WHERE id = ?",
+                                   [(left, session_id) for session_id in closed])
+        joined = [(player, when) for player in players if player not in open_sessions]
+        if joined:
+            connection.executemany("INSERT INTO sessions (player, joined) VALUES (?, ?)", joined)
+
+
+# --- Чтение и сводки ---
+def read_sessions(server_path, since=None, until=None, player=None):
+    """Сессии, пересекающиеся с [since, until] (секунды time.time(); None — без границы)."""
+    connection = connect(server_path)
+    if connection is None:
+        return []
+    query = "SELECT player, joined, left FROM sessions WHERE 1"
+    params = []
+    if since is not None:
+        query += " AND (left IS NULL OR left >= ?)"
+        params.append(since)
+    if until is not None:
+        query += " AND joined <= ?"
+        params.append(until)
+    if player:
+        query += " AND player = ? COLLATE NOCASE"
+        params.append(player)
+    try:
+        return [Session(*row) for row in connection.execute(query + " ORDER BY joined", params)]
+    finally:
+        connection.close()
+
+
+def _clip(session, since, until):
+    """(начало, конец) сессии внутри периода; открытая сессия длится до until."""
+    start = session.joined if since is None else max(session.joined, since)
+    end = until if session.left is None else min(session.left, until)
+    return start, end
+
+
+def summarize(sessions, since=None, until=None):
+    """Summary по сессиям за период; until по умолчанию — сейчас."""
+    until = until or time.time()
+    total = 0.0
+    edges = []
+    for session in sessions:
+        start, end = _clip(session, since, until)
+        if end < start:
+            continue
+        total += end - start
+        edges.append((start, 1))
+        edges.append((end, -1))
+    # Выход раньше входа в ту же секунду — иначе смена игроков считалась бы пиком
+    edges.sort(key=lambda edge: (edge[0], edge[1]))
+    online = peak = 0
+    peak_time = None
+    for moment, delta in edges:
+        online += delta
+        if online > peak:
+            peak, peak_time = online, moment
+    count = len(edges) // 2
+    return Summary(count, len({session.player for session in sessions}), total,
+                   total / count if count else 0.0, peak, peak_time)
+
+
+def top_players(sessions, since=None, until=None, limit=10):
+    """[(игрок, секунд на сервере, число сессий)] по убыванию времени."""
+    until = until or time.time()
+    totals = {}
+    for session in sessions:
+        start, end = _clip(session, since, until)
+        seconds, count = totals.get(session.player, (0.0, 0))
+        totals[session.player] = (seconds + max(0.0, end - start), count + 1)
+    ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+    return [(player, seconds, count) for player, (seconds, count) in ranked[:limit]]
+
+
+def _hours(start, end):
+    """(день недели, час, секунд) для отрезка времени, разбитого по часам местного времени."""
+    moment = datetime.fromtimestamp(start)
+    end_moment = datetime.fromtimestamp(end)
+    while moment < end_moment:
+        next_hour = moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        stop = min(next_hour, end_moment)
+        yield moment.weekday(), moment.hour, (stop - moment).total_seconds()
+        moment = stop
+
+
+def heatmap(sessions, since=None, until=None):
+    """Среднее число игроков онлайн по дням недели и часам: список 7 строк (пн..вс) по 24 значения."""
+    until = until or time.time()
+    if since is None:
+        since = min((session.joined for session in sessions), default=until)
+    presence = [[0.0] * 24 for _ in range(7)]
+    for session in sessions:
+        start, end = _clip(session, since, until)
+        for day, hour, seconds in _hours(start, end):
+            presence[day][hour] += seconds
+    # Делим на то, сколько каждый час недели вообще входил в период
+    covered = [[0.0] * 24 for _ in range(7)]
+    for day, hour, seconds in _hours(since, until):
+        covered[day][hour] += seconds
+    return [[presence[day][hour] / covered[day][hour] if covered[day][hour] else 0.0 for hour in range(24)]
+            for day in range(7)]
+
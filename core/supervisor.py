@@ -0,0 +1,476 @@
+"""Одновременный запуск нескольких серверов и их состояние.
+
+Серверы работают через отсоединённых посредников (core.bridge), поэтому
+Supervisor может как запускать их, так и находить уже работающие.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+from core import boot, bridge, launch, log_engine, registry
+from core.commands import CommandQueue, DEFAULT_RATE
+from core.console import ConsoleBuffer, DEFAULT_MAX_LINES, DEFAULT_MAX_BYTES
+from core.lifecycle import Transition, STOP_GRACE_SECONDS, TERMINATE_GRACE_SECONDS
+from core.process import ServerProcess
+from core.rcon import RconPool
+from core.watchdog import Watchdog, PROBE_INTERVAL_SECONDS, PROBE_TIMEOUT_SECONDS
+
+# Сколько последних остановок/перезапусков помнить с разбивкой по фазам
+TRANSITION_HISTORY = 20
+
+# Что изменилось у сервера за кадр — интерфейс перерисовывает только это
+RuntimeUpdate = namedtuple("RuntimeUpdate", "lines status_changed players_changed tps exited crashed ping")
+RuntimeUpdate.__new__.__defaults__ = (None,)
+
+
+def build_launch_args(server_path, java_path="java", max_ram_gb=5, launch_settings=None, profile="default"):
+    """Команда запуска сервера; для java учитывается профиль запуска из .msm/settings.json."""
+    executable = registry.server_executable(server_path)
+    if not executable:
+        raise Exception(f"Не найден файл сервера в папке {os.path.basename(server_path)}")
+    if executable == registry.BEDROCK_EXECUTABLE:
+        return [os.path.join(server_path, executable)]  # Используем полный путь!
+    if launch_settings is None:
+        launch_settings = launch.load_launch(server_path)
+    return launch.java_command(launch_settings, executable, java_path, max_ram_gb, profile)
+
+
+class ServerRuntime:
+    """Всё, что относится к одному серверу: процесс, консоль, игроки, статус."""
+
+    def __init__(self, name, path, console_max_lines=DEFAULT_MAX_LINES, console_max_bytes=DEFAULT_MAX_BYTES,
+                 rcon_pool=None, command_rate=DEFAULT_RATE):
+        self.name = name
+        self.path = path
+        self.console = ConsoleBuffer(console_max_lines, console_max_bytes)
+        self.players = set()
+        self.status = "stopped"
+        self.started_at = None
+        self.process = None
+        self.args = None
+        self.last_boot = None
+        self.ping = None  # последний PingResult
+        self._launched_at = None  # время запуска, пока этапы загрузки ещё не записаны
+        self.watchdog = Watchdog(self)
+        self.stop_grace = STOP_GRACE_SECONDS
+        self.terminate_grace = TERMINATE_GRACE_SECONDS
+        self.transition = None
+        self.transitions = deque(maxlen=TRANSITION_HISTORY)
+        self.rcon_pool = rcon_pool or RconPool()
+        self._jobs = None  # очередь команд для RCON, поток создаётся при первой команде
+        self._rcon_lock = threading.Lock()
+        self._rcon_lines = []
+        self.commands = CommandQueue(self, command_rate)
+
+    def is_running(self):
+        return self.process is not None and self.process.is_running()
+
+    def start(self, args, clear_console=True):
+        """Запускает сервер; OSError пробрасывается, если не удалось создать процесс."""
+        if self.is_running():
+            return
+        launched_at = time.time()
+        process = ServerProcess.launch(args, self.path, log_engine.detect_loader(self.path))
+        self.process = process
+        self._launched_at = launched_at
+        self.args = list(args)
+        self.watchdog.on_start()
+        if clear_console:
+            self.console.clear()
+        self.console.append("[Менеджер] Запуск: " + launch.format_command(args))
+        self.players = set()
+        self.status = "starting"
+        self.started_at = process.started_at
+
+    def attach(self):
+        """Подключается к серверу, запущенному раньше (в том числе прошлым экземпляром менеджера)."""
+        if self.is_running():
+            return True
+        process = ServerProcess.attach(self.path, log_engine.detect_loader(self.path))
+        if process is None:
+            return False
+        self.process = process
+        self._launched_at = None
+        self.args = (bridge.read_state(self.path) or {}).get("args")
+        self.watchdog.on_start()
+        self.console.clear()
+        self.players = set(process.players)
+        self.status = "running" if process.ready else "starting"
+        self.started_at = process.started_at
+        return True
+
+    def detach(self):
+        """Отключается от консоли; сервер продолжает работать."""
+        self.watchdog.release()
+        if self.process is not None:
+            self.process.detach()
+            self.process = None
+
+    def stop(self):
+        """Останавливает сервер командой stop, при зависании — terminate, затем kill."""
+        self.watchdog.cancel()
+        if self.is_running() and self.transition is None:
+            self._begin(Transition(self, None, self.stop_grace, self.terminate_grace))
+
+    def restart(self, args):
+        """Останавливает сервер и запускает его сразу после выхода процесса."""
+        if self.transition is not None:
+            return
+        self._begin(Transition(self, args, self.stop_grace, self.terminate_grace))
+
+    def apply_ping(self, result, port_owned=False):
+        """Сверяет статус и игроков с ответом на пинг; возвращает (статус изменился, игроки изменились).
+
+        Сервер, запущенный не менеджером, но отвечающий на пинг, получает статус
+        external — если только его порт не занят другим сервером менеджера
+        (port_owned): тогда отвечает тот, а этот остаётся остановленным. У
+        работающего сервера полный список из пинга (все игроки попали в выборку)
+        заменяет список из лога; неполный только дополняет его.
+        """
+        self.ping = result
+        old_status = self.status
+        old_players = set(self.players)
+        if self.process is None:
+            if port_owned:
+                # Несколько серверов часто делят 25565 — ответ принадлежит работающему соседу
+                if self.status == "external":
+                    self.status = "stopped"
+                    self.players = set()
+            elif result.ok and self.status in ("stopped", "external"):
+                self.status = "external"
+                self.players = set(result.players or [])
+            elif not result.ok and self.status == "external":
+                self.status = "stopped"
+                self.players = set()
+        elif result.ok and self.status == "running" and result.online is not None:
+            sample = set(result.players or [])
+            if result.online == 0:
+                players = set()
+            elif result.players is not None and len(sample) == result.online:
+                players = sample
+            else:
+                players = self.players | sample
+            if self.process.reconcile_players(players):
+                self.players = players
+        return self.status != old_status, self.players != old_players
+
+    def _record_boot(self, process):
+        record = boot.make_record(self._launched_at, process.boot_phases(), self.args)
+        self._launched_at = None
+        self.last_boot = record
+        boot.append_record(self.path, record)
+        self.console.append("[Менеджер] Время запуска: " + boot.format_record(record))
+
+    def _begin(self, transition):
+        self.transition = transition
+        if transition.begin():
+            self._finish_transition()
+
+    def _finish_transition(self):
+        transition, self.transition = self.transition, None
+        self.transitions.append(transition.record())
+        self.console.append("[Менеджер] " + transition.summary())
+
+    def send(self, command):
+        if not self.is_running():
+            return False
+        return self.process.write(command + "\n")
+
+    def rcon_client(self):
+        """Клиент RCON, если сервер готов и RCON в нём включён, иначе None."""
+        return self.rcon_pool.client(self.path) if self.status == "running" else None
+
+    def execute(self, commands, callback=None):
+        """Выполняет команды в фоне: через RCON, если он включён, иначе пишет их в консоль.
+
+        По RCON команды уходят по одному соединению, ответы попадают в консоль, а callback
+        (если задан) получает их списком — из фонового потока. Без RCON ответов нет
+        и callback получает None. Возвращает True, если команды пошли через RCON.
+        """
+        commands = list(commands)
+        client = self.rcon_client()
+        if client is None:
+            for command in commands:
+                self.send(command)
+            if callback:
+                callback(None)
+            return False
+        if self._jobs is None:
+            self._jobs = queue.Queue()
+            threading.Thread(target=self._run_jobs, daemon=True).start()
+        self._jobs.put((client, commands, callback))
+        return True
+
+    def _run_jobs(self):
+        while True:
+            client, commands, callback = self._jobs.get()
+            lines = []
+            try:
+                results = client.pipeline(commands)
+                for command, result in zip(commands, results):
+                    lines.append(f"[RCON] > {command}")
+                    lines.extend(result.splitlines())
+            except OSError as e:
+                results = None
+                lines.append(f"[RCON] Ошибка: {e}")
+            with self._rcon_lock:
+                self._rcon_lines.extend(lines)
+            if callback:
+                callback(results)
+
+    def uptime(self):
+        return time.time() - self.started_at if self.is_running() and self.started_at else 0
+
+    def poll(self):
+        """Забирает вывод процесса и применяет его к состоянию; возвращает RuntimeUpdate или None."""
+        process = self.process
+        batch = process.take() if process is not None else None
+        if batch is not None and not (batch.lines or batch.events or batch.players is not None
+                                      or batch.returncode is not None):
+            batch = None
+        with self._rcon_lock:
+            rcon_lines, self._rcon_lines = self._rcon_lines, []
+        if (batch is None and self.transition is None and not rcon_lines and not self.watchdog.is_active()
+                and not self.commands.is_active()):
+            return None
+        old_status = self.status
+        old_total = self.console.total
+        tps = None
+        exited = crashed = False
+        if batch is not None:
+            self.watchdog.observe(batch.events, batch.lines)
+            if batch.dropped:
+                self.console.append(f"[Менеджер] Вывод шёл быстрее, чем его забирал интерфейс: "
+                                    f"пропущено строк: {batch.dropped}")
+            if batch.lines:
+                self.console.extend(batch.lines)
+            events = {event.kind: event for event in batch.events}
+            if log_engine.READY in events:
+                self.status = "running"
+            if log_engine.CRASH in events:
+                self.status = "crashed"
+            elif log_engine.ERROR in events:
+                self.status = "error"
+            if log_engine.TPS in events:
+                tps = events[log_engine.TPS].value
+            if batch.players is not None:
+                self.players = set(batch.players)
+            if batch.returncode is not None:
+                exited = True
+                crashed = batch.returncode != 0 and not process.stop_requested
+                uptime = time.time() - process.started_at if process.started_at else 0
+                self.console.append("")
+                self.console.append("Сервер завершил работу.")
+                if crashed:
+                    self.console.append("Сервер завершил работу с ошибкой (краш).")
+                self.status = "error" if crashed else "stopped"
+                self.process = None
+                note = self.watchdog.on_exit(crashed, batch.returncode, uptime)
+                if note:
+                    self.console.append(note)
+            if self._launched_at is not None and (log_engine.READY in events or exited):
+                self._record_boot(process)
+        if rcon_lines:
+            self.console.extend(rcon_lines)
+        note = self.commands.tick()
+        if note:
+            self.console.append(note)
+        # Переход продвигается после разбора вывода: он видит выход процесса и строку готовности
+        if self.transition is not None and self.transition.advance(exited):
+            self._finish_transition()
+        note = self.watchdog.tick()
+        if note:
+            self.console.append(note)
+        lines = self.console.total != old_total
+        status_changed = self.status != old_status
+        players_changed = batch is not None and batch.players is not None
+        if not (lines or status_changed or players_changed or tps is not None or exited):
+            return None
+        return RuntimeUpdate(lines, status_changed, players_changed, tps, exited, crashed)
+
+
+class Supervisor:
+    """Держит по одному ServerRuntime на сервер; серверы работают одновременно."""
+
+    def __init__(self, console_max_lines=DEFAULT_MAX_LINES, console_max_bytes=DEFAULT_MAX_BYTES):
+        self.console_max_lines = console_max_lines
+        self.console_max_bytes = console_max_bytes
+        self.stop_grace = STOP_GRACE_SECONDS
+        self.terminate_grace = TERMINATE_GRACE_SECONDS
+        self.auto_restart = True
+        self.probe_interval = PROBE_INTERVAL_SECONDS
+        self.probe_timeout = PROBE_TIMEOUT_SECONDS
+        self.command_rate = DEFAULT_RATE
+        self.rcon = RconPool()
+        self.prober = None
+        self.sessions = None  # SessionRecorder, если сессии игроков записываются
+        self.runtimes = {}
+
+    def runtime(self, name, path):
+        """Возвращает состояние сервера, создавая его при первом обращении."""
+        runtime = self.runtimes.get(name)
+        if runtime is None or (runtime.path != path and not runtime.is_running()):
+            runtime = ServerRuntime(name, path, self.console_max_lines, self.console_max_bytes, self.rcon,
+                                    self.command_rate)
+            runtime.stop_grace = self.stop_grace
+            runtime.terminate_grace = self.terminate_grace
+            self._configure_watchdog(runtime.watchdog)
+            self.runtimes[name] = runtime
+            if self.prober is not None:
+                self.prober.set_servers({name: runtime.path for name, runtime in self.runtimes.items()})
+        return runtime
+
+    def get(self, name):
+        return self.runtimes.get(name)
+
+    def status(self, name):
+        runtime = self.runtimes.get(name)
+        return runtime.status if runtime else "stopped"
+
+    def running(self):
+        return [runtime for runtime in self.runtimes.values() if runtime.is_running()]
+
+    def process_targets(self):
+        """Работающие серверы для замеров ресурсов: имя -> (pid процесса сервера, папка)."""
+        return {
+            runtime.name: (runtime.process.pid, runtime.path)
+            for runtime in self.running() if runtime.process.pid
+        }
+
+    def set_console_limits(self, max_lines, max_bytes):
+        self.console_max_lines = max_lines
+        self.console_max_bytes = max_bytes
+        for runtime in self.runtimes.values():
+            runtime.console.set_limits(max_lines, max_bytes)
+
+    def set_stop_timeouts(self, stop_grace, terminate_grace):
+        """Сколько ждать выхода после stop и после terminate, прежде чем эскалировать."""
+        self.stop_grace = stop_grace
+        self.terminate_grace = terminate_grace
+        for runtime in self.runtimes.values():
+            runtime.stop_grace = stop_grace
+            runtime.terminate_grace = terminate_grace
+
+    def set_command_rate(self, rate):
+        """Сколько команд в секунду очередь отправляет каждому серверу."""
+        self.command_rate = rate
+        for runtime in self.runtimes.values():
+            runtime.commands.rate = rate
+
+    def set_watchdog(self, auto_restart, probe_interval, probe_timeout):
+        """Автоперезапуск после краша и проба на зависание (probe_interval=0 отключает пробу)."""
+        self.auto_restart = auto_restart
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        for runtime in self.runtimes.values():
+            self._configure_watchdog(runtime.watchdog)
+
+    def _configure_watchdog(self, watchdog):
+        watchdog.auto_restart = self.auto_restart
+        watchdog.probe_interval = self.probe_interval
+        watchdog.probe_timeout = self.probe_timeout
+
+    def configure(self, config):
+        """Применяет настройки из config.json: лимиты консоли, таймауты остановки, сторож, очередь команд."""
+        self.set_console_limits(
+            config.get("console_max_lines", DEFAULT_MAX_LINES),
+            config.get("console_max_bytes", DEFAULT_MAX_BYTES),
+        )
+        self.set_stop_timeouts(
+            config.get("stop_grace_seconds", STOP_GRACE_SECONDS),
+            config.get("terminate_grace_seconds", TERMINATE_GRACE_SECONDS),
+        )
+        self.set_watchdog(
+            config.get("auto_restart", True),
+            config.get("hang_probe_interval_seconds", PROBE_INTERVAL_SECONDS),
+            config.get("hang_probe_timeout_seconds", PROBE_TIMEOUT_SECONDS),
+        )
+        # Очередь команд: не больше command_rate команд в секунду на сервер
+        self.set_command_rate(max(1, config.get("command_rate", DEFAULT_RATE)))
+
+    def start_probing(self, interval=None):
+        """Запускает фоновый пинг всех серверов; interval=None — по умолчанию, 0 — не пинговать."""
+        # asyncio заметно замедляет запуск, поэтому модуль пинга загружается только здесь
+        from core.ping import ServerProber, PING_INTERVAL
+        if self.prober is not None:
+            self.prober.stop()
+            self.prober = None
+        if interval is None:
+            interval = PING_INTERVAL
+        if interval:
+            self.prober = ServerProber(interval)
+            self.prober.set_servers({name: runtime.path for name, runtime in self.runtimes.items()})
+            self.prober.start()
+
+    def start_sessions(self):
+        """Записывать входы и выходы игроков в .msm/sessions.db серверов (фоновый поток)."""
+        from core.sessions import SessionRecorder
+        if self.sessions is None:
+            self.sessions = SessionRecorder()
+            self.sessions.start()
+
+    def poll(self):
+        """Опрашивает все серверы; возвращает список (runtime, RuntimeUpdate) с изменениями."""
+        pings = self.prober.take() if self.prober is not None else {}
+        owned = self._owned_targets() if pings else set()
+        updates = []
+        for runtime in list(self.runtimes.values()):
+            update = runtime.poll()
+            result = pings.get(runtime.name)
+            if result is not None:
+                port_owned = runtime.process is None and self._target(runtime.path) in owned
+                status_changed, players_changed = runtime.apply_ping(result, port_owned)
+                if update is None:
+                    update = RuntimeUpdate(False, False, False, None, False, False)
+                update = update._replace(
+                    status_changed=update.status_changed or status_changed,
+                    players_changed=update.players_changed or players_changed,
+                    ping=result,
+                )
+            if update:
+                updates.append((runtime, update))
+            if self.sessions is not None:
+                # Без изменений это только сравнение множеств — запись идёт в потоке SessionRecorder.
+                # Пока менеджер не подключён к процессу (сервер внешний или ещё не найден), о сессиях
+                # ничего не известно: пустой список закрыл бы их и открыл заново с разрывом
+                if runtime.process is not None:
+                    self.sessions.observe(runtime.path, runtime.players)
+                elif update and update.exited:
+                    self.sessions.observe(runtime.path, ())
+        return updates
+
+    @staticmethod
+    def _target(server_path):
+        from core.ping import ping_target
+        kind, host, port = ping_target(server_path)
+        return kind, port
+
+    def _owned_targets(self):
+        """(вид, порт) серверов, процесс которых менеджер запустил или к которому подключился."""
+        return {self._target(runtime.path) for runtime in self.runtimes.values() if runtime.process is not None}
+
+    def discover(self, servers):
+        """Находит среди (имя, путь) уже работающие серверы и подключается к их консолям."""
+        attached = []
+        for name, path in servers:
+            runtime = self.runtime(name, path)
+            if not runtime.is_running() and os.path.exists(bridge.state_path(path)) and runtime.attach():
+                attached.append(runtime)
+        return attached
+
+    def detach_all(self):
+        for runtime in self.runtimes.values():
+            runtime.detach()
+        self.rcon.close_all()
+        if self.prober is not None:
+            self.prober.stop()
+        if self.sessions is not None:
+            self.sessions.stop()
+            self.sessions = None
+
+    def stop_all(self):
+        """Отправляет всем серверам stop; дожидаться выхода нужно через poll()."""
+        for runtime in self.running():
+            runtime.stop()
@@ -0,0 +1,265 @@
+"""Сторож сервера: автоперезапуск после краша и обнаружение зависаний.
+
+Перезапуск идёт с нарастающей паузой (5, 10, 20 с ... до 5 мин); если сервер
+падает слишком часто, сторож сдаётся. Зависание определяется пробой: раз в
+минуту серверу отправляется list, и если ответ не пришёл вовремя, процесс
+считается зависшим и убивается — дальше это обычный краш. Без автоперезапуска
+процесс не трогается: пробы продолжаются, и когда сервер снова ответит,
+отметка о зависании снимается. Как и Transition, сторож продвигается из
+ServerRuntime.poll().
+
+К одному серверу могут быть подключены и окно, и daemon (`python -m core`).
+Перезапускает сервер после краша только тот, кто держит блокировку
+<сервер>/.msm/restart.lock (RestartLock); другой лишь сообщает о краше.
+"""
+import os
+import time
+from collections import deque
+
+from core import bridge, log_engine
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 300
+CRASH_LOOP_LIMIT = 5  # столько крашей...
+CRASH_LOOP_WINDOW = 600  # ...за столько секунд — и автоперезапуск прекращается
+STABLE_SECONDS = 600  # проработав столько, сервер снова перезапускается без паузы
+PROBE_COMMAND = "list"
+PROBE_INTERVAL_SECONDS = 60
+PROBE_TIMEOUT_SECONDS = 30
+FAILURE_HISTORY = 50
+RESTART_LOCK_FILE = "restart.lock"
+# Статусы, в которых работающий процесс пробуется: error — в логе была ошибка, но процесс жив
+# (тот же статус остаётся и после краша — тогда процесса нет и пробовать некого).
+# starting не пробуется (загрузка мира бывает долгой), crashed — процесс сейчас завершится сам
+PROBED_STATUSES = ("running", "error")
+
+
+class RestartLock:
+    """Право автоперезапуска сервера: блокировка файла, которую ОС снимает сама, если процесс завершился."""
+
+    def __init__(self, server_path):
+        self.path = os.path.join(server_path, bridge.STATE_DIR, RESTART_LOCK_FILE)
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """True, если блокировка у этого процесса (взята сейчас или раньше)."""
+        if self._file is not None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            f = open(self.path, "a+b")
+        except OSError:
+            return True  # файл не создать — делить перезапуск не с кем
+        try:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+
+
+class Watchdog:
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self.restart_lock = RestartLock(runtime.path)
+        self.auto_restart = True
+        self.probe_interval = PROBE_INTERVAL_SECONDS
+        self.probe_timeout = PROBE_TIMEOUT_SECONDS
+        self.restarts = 0
+        self.failures = deque(maxlen=FAILURE_HISTORY)  # (время, сколько проработал, причина)
+        self.last_reason = None
+        self.probe_latency = None
+        self.gave_up = False
+        self.restart_at = None
+        self._consecutive = 0
+        self._loop_since = 0  # краши раньше этого момента не считаются циклом
+        self._restarting = False
+        self._operating = 0.0  # суммарное время работы завершившихся запусков
+        self._error_line = None
+        self._hang_reason = None
+        self._recovered = False
+        self._killed = False
+        self._probe_sent = None
+        self._last_probe = time.monotonic()
+
+    def is_active(self):
+        """Нужно ли продвигать сторожа, даже если от процесса ничего не пришло."""
+        return self.restart_at is not None or self._probing()
+
+    def _probing(self):
+        runtime = self.runtime
+        return runtime.status in PROBED_STATUSES and runtime.transition is None and runtime.is_running()
+
+    def on_start(self):
+        """Сервер запущен (вручную или сторожем): отменяем ожидающий перезапуск."""
+        if not self._restarting:
+            # Ручной запуск начинает отсчёт крашей заново
+            self._consecutive = 0
+            self._loop_since = time.time()
+        self._restarting = False
+        self.restart_at = None
+        self.gave_up = False
+        if self.auto_restart:
+            self.restart_lock.acquire()  # первый подключившийся и перезапускает
+        self._error_line = None
+        self._hang_reason = None
+        self._recovered = False
+        self._killed = False
+        self._probe_sent = None
+        self._last_probe = time.monotonic()
+
+    def cancel(self):
+        self.restart_at = None
+
+    def release(self):
+        """Менеджер отключается от сервера: право перезапуска переходит другому."""
+        self.restart_at = None
+        self.restart_lock.release()
+
+    def observe(self, events, lines):
+        """Разбирает события кадра; ответ на пробу убирается из строк консоли."""
+        for event in events:
+            if event.kind == log_engine.LIST:
+                if self._hang_reason and not self._killed:
+                    # Ответил — пусть и на запоздавшую пробу: сервер снова работает
+                    self._hang_reason = None
+                    self._recovered = True
+                if self._probe_sent is None:
+                    continue
+                now = time.monotonic()
+                self.probe_latency = now - self._probe_sent
+                self._probe_sent = None
+                self._last_probe = now
+                if event.line in lines:
+                    lines.remove(event.line)
+            elif event.kind in (log_engine.CRASH, log_engine.ERROR):
+                self._error_line = event.line
+
+    def on_exit(self, crashed, returncode, uptime):
+        """Сервер завершился; при краше планирует перезапуск. Возвращает строку для консоли или None."""
+        self._operating += uptime
+        self._probe_sent = None
+        hang_reason, self._hang_reason = self._hang_reason, None
+        self._recovered = self._killed = False
+        if not crashed:
+            return None
+        reason = hang_reason or self._error_line or f"код выхода {returncode}"
+        now = time.time()
+        self.last_reason = reason
+        self.failures.append((now, uptime, reason))
+        self._consecutive = 1 if uptime >= STABLE_SECONDS else self._consecutive + 1
+        since = max(now - CRASH_LOOP_WINDOW, self._loop_since)
+        recent = sum(1 for at, _, _ in self.failures if at >= since)
+        if not self.auto_restart or not self.runtime.args:
+            return None
+        if not self.restart_lock.acquire():
+            return "[Менеджер] Сервер перезапустит другой подключённый к нему менеджер."
+        if recent >= CRASH_LOOP_LIMIT:
+            self.gave_up = True
+            return (f"[Менеджер] Сервер упал {recent} раз за {CRASH_LOOP_WINDOW // 60} мин, "
+                    "автоперезапуск остановлен.")
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (self._consecutive - 1), BACKOFF_MAX_SECONDS)
+        self.restart_at = time.monotonic() + delay
+        return f"[Менеджер] Автоперезапуск через {delay} с (причина: {reason})"
+
+    def tick(self):
+        """Проверяет пробу и срок перезапуска; возвращает строку для консоли или None."""
+        now = time.monotonic()
+        runtime = self.runtime
+        if self.restart_at is not None:
+            if now >= self.restart_at and not runtime.is_running():
+                self.restart_at = None
+                self.restarts += 1
+                self._restarting = True
+                runtime.restart(runtime.args)
+                self._restarting = False
+            return None
+        if not self._probing():
+            return None
+        if self._recovered:
+            self._recovered = False
+            return f"[Менеджер] Сервер снова отвечает на {PROBE_COMMAND}"
+        if self._killed:
+            return None  # процесс уже убит, ждём его выхода
+        if self._probe_sent is None:
+            if self.probe_interval and now - self._last_probe >= self.probe_interval:
+                self._probe_sent = now
+                runtime.send(PROBE_COMMAND)
+            return None
+        if now - self._probe_sent < self.probe_timeout:
+            return None
+        self._probe_sent = None
+        self._last_probe = now
+        if self._hang_reason:
+            return None  # о зависании уже сообщили — пробуем дальше, пока не ответит
+        self._hang_reason = f"не ответил на {PROBE_COMMAND} за {self.probe_timeout} с (завис)"
+        if not self.auto_restart:
+            self.last_reason = self._hang_reason
+            return f"[Менеджер] Сервер {self._hang_reason}"
+        self._killed = True
+        process = runtime.process
+        if process is not None:
+            process.kill()
+        return f"[Менеджер] Сервер {self._hang_reason}, процесс будет перезапущен"
+
+    def mtbf(self):
+        """Среднее время работы между крашами в секундах или None, если крашей не было."""
+        if not self.failures:
+            return None
+        return (self._operating + self.runtime.uptime()) / len(self.failures)
+
+    def describe(self):
+        """Сводка для подсказки в списке серверов."""
+        lines = [f"Автоперезапусков: {self.restarts}"]
+        if self.last_reason:
+            lines.append(f"Последний сбой: {self.last_reason}")
+        mtbf = self.mtbf()
+        if mtbf is not None:
+            lines.append(f"Среднее время между сбоями: {format_duration(mtbf)}")
+        if self.restart_at is not None:
+            lines.append(f"Перезапуск через {max(0, int(self.restart_at - time.monotonic()))} с")
+        if self.gave_up:
+            lines.append("Автоперезапуск остановлен: сервер падает слишком часто")
+        if self.probe_latency is not None:
+            lines.append(f"Ответ на {PROBE_COMMAND}: {self.probe_latency * 1000:.0f} мс")
+        return "\n".join(lines)
+
+
+def format_duration(seconds):
+    """«2 ч 5 мин», «3 мин 12 с» или «40 с» — длительности во всём интерфейсе и в командной строке."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours} ч {minutes} мин"
+    if minutes:
+        return f"{minutes} мин {seconds} с"
+    return f"{seconds} с"
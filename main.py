@@ -1,8 +1,21 @@
-import os, sys, re, json, subprocess, socket, psutil
-import urllib.request
-from PyQt6 import QtWidgets, QtGui, QtCore, QtNetwork
-from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest
+import os, sys, re, json, threading, time
+
+# --- Собранный exe запускает сам себя как процесс-посредник сервера (см. core/bridge.py) ---
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "--bridge":
+    from core.bridge import main as bridge_main
+    sys.exit(bridge_main(sys.argv[2:]))
+# --- Без окна: python main.py --cli ... (то же, что python -m core), Qt не загружается ---
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "--cli":
+    from core.__main__ import main as cli_main
+    sys.exit(cli_main(sys.argv[2:]))
+
+from PyQt6 import QtWidgets, QtGui, QtCore
 from PyQt6.QtWidgets import QCompleter
+from core.console import ConsoleBuffer
+from core.ingest import FLUSH_INTERVAL_MS
+from core.supervisor import Supervisor, build_launch_args
+from core import boot, commands, launch, log_engine, network, players, properties, rcon, registry, sessions, watchdog
+from core.config import app_path, config_path, load_config
 
 COMMANDS = [
     "say", "stop", "whitelist on", "whitelist off", "whitelist add", "whitelist remove",
@@ -14,63 +27,438 @@ COMMANDS = [
     "tick freeze", "tick unfreeze",
 ]
 
-def load_config():
-    if os.path.exists(config_path):
-        with open(config_path, encoding="utf-8") as f:
-            return json.load(f)
-    return {"servers_dir": os.path.abspath("servers")}
-
-def save_config(config):
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
-
-def list_servers():
-    global SERVERS_DIR
-    if not SERVERS_DIR or not os.path.exists(SERVERS_DIR):
-        os.makedirs(SERVERS_DIR, exist_ok=True)
-        return []
-    servers = []
-    for name in os.listdir(SERVERS_DIR):
-        server_dir = os.path.join(SERVERS_DIR, name)
-        if not os.path.isdir(server_dir):
-            continue
-        # Ищем jar-файл сервера или bedrock_server.exe
-        has_jar = any(
-            f.endswith(".jar") and not f.endswith("installer.jar")
-            for f in os.listdir(server_dir)
-        )
-        has_bedrock = "bedrock_server.exe" in os.listdir(server_dir)
-        if has_jar or has_bedrock:
-            servers.append(name)
-    return servers
-
-def get_latest_bedrock_url():
-    url = "https://www.minecraft.net/en-us/download/server/bedrock"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req) as resp:
-        html = resp.read().decode("utf-8")
-    # Универсальный паттерн для поиска .zip
-    match = re.search(
-        r'https://[^\s"\']*bedrock-server-[\d\.]+\.zip', html
-    )
-    if match:
-        return match.group(0)
-    raise Exception("Не удалось найти актуальную ссылку на Bedrock Dedicated Server")
-
-# Защита при запуске из exe
-def resource_path(relative_path):
-    """Возвращает абсолютный путь к ресурсу, работает и для PyInstaller, и для обычного запуска."""
-    if hasattr(sys, '_MEIPASS'):
-        # Если запущено из exe
-        base_path = os.path.dirname(sys.executable)
-    else:
-        # Если запущено из исходников
-        base_path = os.path.abspath(os.path.dirname(__file__))
-    return os.path.join(base_path, relative_path)
-
-config_path = resource_path("config.json")
 SERVERS_DIR = None
+
+class ConsoleView(QtWidgets.QAbstractScrollArea):
+    """Консоль сервера: рисует только видимые строки из ConsoleBuffer."""
+
+    def __init__(self, buffer=None, parent=None):
+        super().__init__(parent)
+        self._buffer = buffer if buffer is not None else ConsoleBuffer()
+        self._follow = True
+        self._top = 0  # абсолютный номер верхней видимой строки
+        self._selection = None  # [якорь, текущая] в абсолютных номерах строк
+        self.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.SystemFont.FixedFont))
+        self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
+        self.viewport().setCursor(QtCore.Qt.CursorShape.IBeamCursor)
+        self.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_context_menu)
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.horizontalScrollBar().valueChanged.connect(lambda _: self.viewport().update())
+
+    def buffer(self):
+        return self._buffer
+
+    def set_buffer(self, buffer):
+        self._buffer = buffer
+        self._follow = True
+        self._selection = None
+        self.refresh()
+
+    def set_limits(self, max_lines, max_bytes):
+        self._buffer.set_limits(max_lines, max_bytes)
+        self.refresh()
+
+    def append(self, text):
+        for line in text.splitlines() or [""]:
+            self._buffer.append(line)
+        self.refresh()
+
+    def append_lines(self, lines):
+        self._buffer.extend(lines)
+        self.refresh()
+
+    def clear(self):
+        self._buffer.clear()
+        self._selection = None
+        self._follow = True
+        self.refresh()
+
+    def _line_height(self):
+        return max(1, self.fontMetrics().lineSpacing())
+
+    def _page_rows(self):
+        return max(1, self.viewport().height() // self._line_height())
+
+    def refresh(self):
+        """Пересчитывает полосы прокрутки; если консоль прокручена до конца — следует за выводом."""
+        page = self._page_rows()
+        first = self._buffer.first_index
+        maximum = max(0, len(self._buffer) - page)
+        value = maximum if self._follow else min(max(0, self._top - first), maximum)
+        bar = self.verticalScrollBar()
+        bar.blockSignals(True)
+        bar.setRange(0, maximum)
+        bar.setPageStep(page)
+        bar.setValue(value)
+        bar.blockSignals(False)
+        self._top = first + value
+        self._update_horizontal()
+        self.viewport().update()
+
+    def _update_horizontal(self):
+        metrics = self.fontMetrics()
+        lines = self._buffer.lines(self._top - self._buffer.first_index, self._page_rows() + 1)
+        widest = max((metrics.horizontalAdvance(line) for line in lines), default=0)
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, widest + 8 - self.viewport().width()))
+        hbar.setPageStep(self.viewport().width())
+
+    def _on_scroll(self, value):
+        self._follow = value >= self.verticalScrollBar().maximum()
+        self._top = self._buffer.first_index + value
+        self._update_horizontal()
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.refresh()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        line_height = self._line_height()
+        palette = self.palette()
+        selection = self._selected_range()
+        x = 4 - self.horizontalScrollBar().value()
+        lines = self._buffer.lines(self._top - self._buffer.first_index, self._page_rows() + 1)
+        for row, line in enumerate(lines):
+            y = row * line_height
+            if selection and selection[0] <= self._top + row <= selection[1]:
+                painter.fillRect(0, y, self.viewport().width(), line_height, palette.highlight())
+                painter.setPen(palette.highlightedText().color())
+            else:
+                painter.setPen(palette.text().color())
+            painter.drawText(x, y + metrics.ascent(), line)
+        painter.end()
+
+    # --- Выделение и копирование строк ---
+    def _row_at(self, pos):
+        row = self._top + max(0, pos.y()) // self._line_height()
+        return min(row, max(self._buffer.first_index, self._buffer.total - 1))
+
+    def _selected_range(self):
+        if not self._selection:
+            return None
+        return min(self._selection), max(self._selection)
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.MouseButton.LeftButton:
+            row = self._row_at(event.position().toPoint())
+            self._selection = [row, row]
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._selection and event.buttons() & QtCore.Qt.MouseButton.LeftButton:
+            self._selection[1] = self._row_at(event.position().toPoint())
+            self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def selected_text(self):
+        selection = self._selected_range()
+        if not selection:
+            return ""
+        first = self._buffer.first_index
+        start = max(selection[0], first)
+        return "\n".join(self._buffer.lines(start - first, selection[1] - start + 1))
+
+    def keyPressEvent(self, event):
+        if event.matches(QtGui.QKeySequence.StandardKey.Copy):
+            self.copy()
+            return
+        if event.matches(QtGui.QKeySequence.StandardKey.SelectAll):
+            self._selection = [self._buffer.first_index, self._buffer.total - 1]
+            self.viewport().update()
+            return
+        super().keyPressEvent(event)
+
+    def copy(self):
+        text = self.selected_text()
+        if text:
+            QtWidgets.QApplication.clipboard().setText(text)
+
+    def _show_context_menu(self, pos):
+        menu = QtWidgets.QMenu(self)
+        copy_action = menu.addAction("Копировать")
+        copy_action.setEnabled(self._selection is not None)
+        copy_all_action = menu.addAction("Копировать всё")
+        clear_action = menu.addAction("Очистить")
+        action = menu.exec(self.viewport().mapToGlobal(pos))
+        if action == copy_action:
+            self.copy()
+        elif action == copy_all_action:
+            QtWidgets.QApplication.clipboard().setText("\n".join(self._buffer))
+        elif action == clear_action:
+            self.clear()
+
+
+# --- Статусы сервера: название и цвет (значок в списке, строка статуса) ---
+STATUS_STYLES = {
+    "running": ("Работает", "#4caf50"),
+    "starting": ("Запуск...", "#5da130"),
+    "stopping": ("Остановка...", "#ff9800"),
+    "external": ("Работает (запущен не менеджером)", "#03a9f4"),
+    "error": ("Ошибка запуска", "#f44336"),
+    "crashed": ("Краш", "#ff2400"),
+    "stopped": ("Остановлен", "#888"),
+}
+
+_status_icons = {}
+
+
+def status_icon(status):
+    """Кружок цвета статуса; значки рисуются один раз и берутся из кэша."""
+    icon = _status_icons.get(status)
+    if icon is None:
+        color = STATUS_STYLES.get(status, (status, "#bdbdbd"))[1]
+        if status == "stopped":
+            color = "#bdbdbd"
+        pixmap = QtGui.QPixmap(16, 16)
+        pixmap.fill(QtCore.Qt.GlobalColor.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.setBrush(QtGui.QBrush(QtGui.QColor(color)))
+        painter.setPen(QtCore.Qt.PenStyle.NoPen)
+        painter.drawEllipse(2, 2, 12, 12)
+        painter.end()
+        icon = _status_icons[status] = QtGui.QIcon(pixmap)
+    return icon
+
+
+def make_sparkline(samples, width=64, height=16):
+    """Мини-график: CPU (зелёный) и память (синий) за последние замеры."""
+    pixmap = QtGui.QPixmap(width, height)
+    pixmap.fill(QtCore.Qt.GlobalColor.transparent)
+    samples = samples[-width:]
+    if len(samples) < 2:
+        return pixmap
+    painter = QtGui.QPainter(pixmap)
+    painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+    step = (width - 1) / (len(samples) - 1)
+    max_rss = max(s.rss for s in samples) or 1
+    for values, top, color in (
+        ([s.rss for s in samples], max_rss, "#2196f3"),
+        ([s.cpu for s in samples], 100, "#4caf50"),
+    ):
+        points = [
+            QtCore.QPointF(i * step, height - 1 - min(value / top, 1) * (height - 2))
+            for i, value in enumerate(values)
+        ]
+        painter.setPen(QtGui.QPen(QtGui.QColor(color), 1))
+        painter.drawPolyline(QtGui.QPolygonF(points))
+    painter.end()
+    return pixmap
+
+
+class ServerListModel(QtCore.QAbstractTableModel):
+    """Строка на сервер: статус, игроки, CPU, память и мини-график.
+
+    Данные берутся из Supervisor и замеров при отрисовке видимых строк, поэтому
+    смена статуса — это dataChanged одной строки, а не пересоздание списка.
+    """
+
+    NAME, STATUS, PLAYERS, CPU, RAM, GRAPH = range(6)
+    HEADERS = ("Сервер", "Статус", "Игроки", "CPU", "ОЗУ", "")
+    METRIC_COLUMNS = (CPU, RAM, GRAPH)
+
+    def __init__(self, supervisor, parent=None):
+        super().__init__(parent)
+        self.supervisor = supervisor
+        self.sampler = None  # появляется после показа окна
+        self._names = []
+        self._rows = {}
+        self._sparklines = {}  # имя -> QPixmap, перерисовывается при новых замерах
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def name(self, row):
+        return self._names[row] if 0 <= row < len(self._names) else None
+
+    def row(self, name):
+        return self._rows.get(name, -1)
+
+    def names(self):
+        return list(self._names)
+
+    def _latest(self, name):
+        if self.sampler is None:
+            return None
+        samples = self.sampler.history(name)
+        return samples[-1] if samples else None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self._names[index.row()]
+        column = index.column()
+        runtime = self.supervisor.get(name)
+        status = runtime.status if runtime else "stopped"
+        roles = QtCore.Qt.ItemDataRole
+        if role == roles.DisplayRole:
+            if column == self.NAME:
+                return name
+            if column == self.STATUS:
+                title = STATUS_STYLES.get(status, (status, ""))[0]
+                if runtime and runtime.watchdog.restarts:
+                    title += f" ↻{runtime.watchdog.restarts}"
+                return title
+            running = runtime is not None and runtime.is_running()
+            if column == self.PLAYERS:
+                return str(len(runtime.players)) if running else ""
+            sample = self._latest(name) if running else None
+            if column == self.CPU:
+                return f"{sample.cpu:.0f}%" if sample else ""
+            if column == self.RAM:
+                return f"{sample.rss / 1024 ** 3:.1f} ГБ" if sample else ""
+            return None
+        if role == roles.DecorationRole:
+            if column == self.NAME:
+                return status_icon(status)
+            if column == self.GRAPH:
+                return self._sparklines.get(name)
+            return None
+        if role == roles.ForegroundRole and column == self.STATUS:
+            if runtime and (runtime.watchdog.failures or runtime.watchdog.restarts):
+                return QtGui.QColor("#ff9800")
+            return None
+        if role == roles.ToolTipRole:
+            if column in self.METRIC_COLUMNS:
+                return self._metrics_tooltip(name)
+            if runtime and (runtime.watchdog.failures or runtime.watchdog.restarts):
+                return runtime.watchdog.describe()
+            return None
+        if role == roles.TextAlignmentRole and column in (self.PLAYERS, self.CPU, self.RAM):
+            return int(QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def _metrics_tooltip(self, name):
+        last = self._latest(name)
+        if last is None:
+            return None
+        return (
+            f"CPU: {last.cpu:.1f}%\n"
+            f"Память: {last.rss / 1024 ** 2:.0f} МБ\n"
+            f"Потоков: {last.threads}, дескрипторов: {last.handles}\n"
+            f"Диск: чтение {last.read_rate / 1024:.0f} КБ/с, запись {last.write_rate / 1024:.0f} КБ/с\n"
+            f"Замеры занимают {self.sampler.overhead():.2f}% CPU"
+        )
+
+    # --- Изменения ---
+    def set_servers(self, names):
+        """Приводит строки к списку имён: удаляет и вставляет только разницу."""
+        names = list(names)
+        new = set(names)
+        old = set(self._names)
+        if len(new ^ old) > 100 or [n for n in self._names if n in new] != [n for n in names if n in old]:
+            # Смена папки или другой порядок — дешевле перестроить целиком
+            self.beginResetModel()
+            self._names = names
+            self._sparklines = {name: pixmap for name, pixmap in self._sparklines.items() if name in new}
+            self._rows = {name: row for row, name in enumerate(self._names)}
+            self.endResetModel()
+            return
+        root = QtCore.QModelIndex()
+        for row in reversed(range(len(self._names))):
+            if self._names[row] not in new:
+                self.beginRemoveRows(root, row, row)
+                self._sparklines.pop(self._names.pop(row), None)
+                self.endRemoveRows()
+        for row, name in enumerate(names):
+            if name not in old:
+                self.beginInsertRows(root, row, row)
+                self._names.insert(row, name)
+                self.endInsertRows()
+        self._rows = {name: row for row, name in enumerate(self._names)}
+
+    def update_server(self, name):
+        """Перерисовать строку одного сервера (статус, игроки, счётчик перезапусков)."""
+        row = self._rows.get(name)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def update_all(self):
+        if self._names:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._names) - 1, len(self.HEADERS) - 1))
+
+    def update_metrics(self):
+        """Новые замеры: перерисовываются графики и ячейки CPU/ОЗУ только серверов с замерами."""
+        for name, row in self._rows.items():
+            samples = self.sampler.history(name)
+            if not samples and name not in self._sparklines:
+                continue
+            self._sparklines[name] = make_sparkline(samples)
+            self.dataChanged.emit(self.index(row, self.CPU), self.index(row, self.GRAPH))
+
+
+class PlayerListModel(QtCore.QAbstractListModel):
+    """Имена игроков для списка; оператор — жирным, забаненный — красным, подробности — в подсказке.
+
+    Статус считается при отрисовке видимых строк по индексам PlayerRegistry,
+    поэтому и белый список на десятки тысяч имён прокручивается без задержек.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.registry = None
+        self.version = None  # registry.version, по которой построен список
+        self.online = set()
+        self._names = []
+
+    def set_players(self, names, registry, online):
+        self.beginResetModel()
+        self._names = names
+        self.registry = registry
+        self.version = registry.version if registry is not None else None
+        self.online = online
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def name(self, row):
+        return self._names[row] if 0 <= row < len(self._names) else None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self._names[index.row()]
+        roles = QtCore.Qt.ItemDataRole
+        if role == roles.DisplayRole:
+            return name
+        if self.registry is None:
+            return None
+        if role == roles.FontRole and self.registry.is_op(name):
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+        if role == roles.ForegroundRole and self.registry.is_banned(name):
+            return QtGui.QColor("#f44336")
+        if role == roles.ToolTipRole:
+            status = self.registry.status(name)
+            lines = [status.name + (" (онлайн)" if name in self.online else "")]
+            if status.uuid:
+                lines.append(f"UUID: {status.uuid}")
+            if status.op:
+                lines.append(f"Оператор, уровень {status.op_level}")
+            lines.append("В белом списке" if status.whitelisted else "Не в белом списке")
+            if status.banned:
+                lines.append(f"Забанен: {status.ban_reason or 'без причины'}")
+            if status.last_seen:
+                lines.append(f"Заходил: {status.last_seen.astimezone():%d.%m.%Y %H:%M}")
+            return "\n".join(lines)
+        return None
+
+
 class ServerManager(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
@@ -82,10 +470,13 @@ class ServerManager(QtWidgets.QWidget):
         self._ip_always_visible = False
 
         # --- Иконка окна ---
-        icon_path = resource_path("icon.ico")
+        icon_path = app_path("icon.ico")
         if os.path.exists(icon_path):
             self.setWindowIcon(QtGui.QIcon(icon_path))
 
+        # Supervisor нужен уже модели списка серверов — создаём его раньше виджетов
+        self.supervisor = Supervisor()
+
         # --- Основной layout ---
         main_layout = QtWidgets.QHBoxLayout(self)
 
@@ -97,27 +488,68 @@ class ServerManager(QtWidgets.QWidget):
         server_group = QtWidgets.QGroupBox("Серверы")
         server_group_layout = QtWidgets.QVBoxLayout(server_group)
         
-        self.server_list_widget = QtWidgets.QWidget()
-        self.server_list_layout = QtWidgets.QVBoxLayout(self.server_list_widget)
-        self.server_list_layout.setContentsMargins(0, 0, 0, 0)
-        self.server_list_layout.setSpacing(2)
-        self.server_list_items = []
+        # Модель отдаёт данные только видимым строкам; смена статуса — перерисовка одной строки
+        self.server_model = ServerListModel(self.supervisor)
+        self._syncing_selection = False  # выделение строки из кода, а не кликом
+        self.server_list_view = QtWidgets.QTreeView()
+        self.server_list_view.setModel(self.server_model)
+        self.server_list_view.setRootIsDecorated(False)
+        self.server_list_view.setUniformRowHeights(True)
+        self.server_list_view.setAllColumnsShowFocus(True)
+        self.server_list_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.server_list_view.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.server_list_view.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.server_list_view.setIconSize(QtCore.QSize(64, 16))
+        header = self.server_list_view.header()
+        header.setStretchLastSection(False)
+        header.setSectionResizeMode(ServerListModel.NAME, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        for column, width in ((ServerListModel.STATUS, 90), (ServerListModel.PLAYERS, 50),
+                              (ServerListModel.CPU, 45), (ServerListModel.RAM, 60), (ServerListModel.GRAPH, 72)):
+            header.setSectionResizeMode(column, QtWidgets.QHeaderView.ResizeMode.Interactive)
+            header.resizeSection(column, width)
+        self.server_list_view.selectionModel().currentRowChanged.connect(self.on_server_row_changed)
+        self.server_list_view.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+        self.server_list_view.customContextMenuRequested.connect(self.on_server_list_menu)
 
         # --- Кнопка создания сервера ---
         self.create_server_button = QtWidgets.QPushButton("Создать сервер")
         self.create_server_button.clicked.connect(self.show_create_server_dialog)
         server_group_layout.addWidget(self.create_server_button)
-        server_group_layout.addWidget(self.server_list_widget)
+        server_group_layout.addWidget(self.server_list_view)
         
         left_panel.addWidget(server_group, stretch=1)
 
         # --- Список игроков ---
         players_group = QtWidgets.QGroupBox("Игроки")
         players_group_layout = QtWidgets.QVBoxLayout(players_group)
-        self.players_list = QtWidgets.QListWidget()
+        players_filter_layout = QtWidgets.QHBoxLayout()
+        self.players_scope = QtWidgets.QComboBox()
+        for scope, title in players.SCOPES.items():
+            self.players_scope.addItem(title, scope)
+        self.players_scope.currentIndexChanged.connect(lambda index: self.update_players_list())
+        self.players_search = QtWidgets.QLineEdit()
+        self.players_search.setPlaceholderText("Поиск игрока")
+        self.players_search.setClearButtonEnabled(True)
+        self.players_search.textChanged.connect(lambda text: self.update_players_list())
+        players_filter_layout.addWidget(self.players_scope)
+        players_filter_layout.addWidget(self.players_search, stretch=1)
+        players_group_layout.addLayout(players_filter_layout)
+        self.players_model = PlayerListModel(self)
+        self.players_list = QtWidgets.QListView()
+        self.players_list.setModel(self.players_model)
+        self.players_list.setUniformItemSizes(True)
+        self.players_list.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         players_group_layout.addWidget(self.players_list)
+        self.players_count_label = QtWidgets.QLabel("")
+        self.players_count_label.setStyleSheet("color: #888;")
+        players_group_layout.addWidget(self.players_count_label)
         self.players_list.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
         self.players_list.customContextMenuRequested.connect(self.show_player_menu)
+        # Файлы игроков (ops.json, whitelist.json, баны) выбранного сервера меняет сам сервер — проверяем их изредка
+        self._players_timer = QtCore.QTimer(self)
+        self._players_timer.setInterval(2000)
+        self._players_timer.timeout.connect(self.check_player_files)
+        self._players_timer.start()
         
         left_panel.addWidget(players_group, stretch=1)
 
@@ -179,7 +611,11 @@ class ServerManager(QtWidgets.QWidget):
         self.action_restart = self.quick_actions_menu.addAction("Перезапустить сервер")
         self.action_reload = self.quick_actions_menu.addAction("Команда reload")
         self.action_tickfreeze = self.quick_actions_menu.addAction("Заморозить время (tick freeze)")
+        self.action_broadcast = self.quick_actions_menu.addAction("Объявление на всех серверах...")
+        self.action_batch = self.quick_actions_menu.addAction("Пакет команд...")
         self.quick_actions_button.setMenu(self.quick_actions_menu)
+        self.action_batch.triggered.connect(self.show_batch_dialog)
+        self.action_broadcast.triggered.connect(self.broadcast_message)
         self.action_whitelist.triggered.connect(self.toggle_whitelist)
         self.action_restart.triggered.connect(self.restart_server)
         self.action_reload.triggered.connect(self.reload_server)
@@ -207,8 +643,7 @@ class ServerManager(QtWidgets.QWidget):
         # --- Лог консоли ---
         console_group = QtWidgets.QGroupBox("Консоль")
         console_layout = QtWidgets.QVBoxLayout(console_group)
-        self.log_output = QtWidgets.QTextEdit()
-        self.log_output.setReadOnly(True)
+        self.log_output = ConsoleView()
         console_layout.addWidget(self.log_output)
         right_panel.addWidget(console_group, stretch=1)
 
@@ -222,7 +657,10 @@ class ServerManager(QtWidgets.QWidget):
         self.command_input.setPlaceholderText("Введите команду для сервера")
         self.send_command_button = QtWidgets.QPushButton("Отправить")
         self.send_command_button.setEnabled(False)
+        self.queue_label = QtWidgets.QLabel("")  # прогресс очереди команд выбранного сервера
+        self.queue_label.setStyleSheet("color: #888;")
         cmd_layout.addWidget(self.command_input)
+        cmd_layout.addWidget(self.queue_label)
         cmd_layout.addWidget(self.send_command_button)
         right_panel.addWidget(cmd_group)
         completer = QCompleter(COMMANDS, self.command_input)
@@ -243,30 +681,149 @@ class ServerManager(QtWidgets.QWidget):
         self.stop_button.clicked.connect(self.stop_server)
         self.send_command_button.clicked.connect(self.send_command)
 
-        # --- Загрузка конфигурации и установка папки серверов ---
-        global SERVERS_DIR
-        if not os.path.exists(config_path):
-            self.config = load_config()
-            self.first_config()
-        else:
-            self.config = load_config()
-        SERVERS_DIR = self.config.get("servers_dir", os.path.abspath("servers"))
-
         # --- Переменные состояния ---
-        self.process = None
         self.selected_server = None
-        self.server_status = {}
-        self.online_players = set()
-        # --- Инициализация интерфейса ---
-        self.load_servers()
+        self.sampler = None  # замеры ресурсов и пинг запускаются после показа окна
+        self.network = network.NetworkService()  # адреса компьютера, опрашиваются в фоне
+        self._startup_scan = None
+        # --- Наблюдение за папкой серверов: перечитываются только изменившиеся папки ---
+        self.registry = None
+        self.fs_watcher = QtCore.QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self.on_directory_changed)
+        self._changed_dirs = set()
+        self._registry_timer = QtCore.QTimer(self)
+        self._registry_timer.setSingleShot(True)
+        self._registry_timer.setInterval(300)  # записи в папку приходят пачками
+        self._registry_timer.timeout.connect(self.refresh_registry)
+
+        # --- Загрузка конфигурации и установка папки серверов ---
+        # Один ConfigStore на всё окно: изменения сохраняются в фоне, пачками и атомарно
+        self.config = load_config(config_path)
+        if not self.config.exists:
+            self.first_config()
+        if self.registry is None:
+            self.set_servers_dir(self.config.get("servers_dir", os.path.abspath("servers")))
+        self.supervisor.configure(self.config)
+
+        # --- Пакетная выдача вывода сервера в консоль (~30 раз в секунду) ---
+        self._flush_timer = QtCore.QTimer(self)
+        self._flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush_output)
+        self._flush_timer.start()
+        # --- Инициализация интерфейса: список серверов с прошлого запуска, поиск — в фоне ---
+        self.load_servers(self.config.get("known_servers", []), discover=False)
         self.update_top_buttons()
         self.update_ip_label()
         self.update_selected_server_label()
+        QtCore.QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Всё, что не нужно для первого кадра: сканирование папки, сети, замеры и пинг."""
+        def scan():
+            result["changes"] = self.registry.scan()
+            self.network.refresh()
+
+        result = {}
+        self._startup_scan = (threading.Thread(target=scan, daemon=True), result)
+        self._startup_scan[0].start()
+        # --- Замеры ресурсов серверов (фоновый поток, интерфейс только рисует) ---
+        from core.metrics import ResourceSampler, SAMPLE_INTERVAL
+        self.sampler = ResourceSampler(write_history=self.config.get("metrics_history", False))
+        self.sampler.start()
+        self.server_model.sampler = self.sampler
+        self._metrics_timer = QtCore.QTimer(self)
+        self._metrics_timer.setInterval(int(SAMPLE_INTERVAL * 1000))
+        self._metrics_timer.timeout.connect(self.update_metrics)
+        self._metrics_timer.start()
+        # Пинг портов серверов: задержка, онлайн и серверы, запущенные не менеджером
+        self.supervisor.start_probing(self.config.get("ping_interval_seconds"))
+        # Входы и выходы игроков — в .msm/sessions.db серверов
+        if self.config.get("player_sessions"):
+            self.supervisor.start_sessions()
+        self.network.start()
+
+    def apply_startup_scan(self):
+        thread, result = self._startup_scan
+        if thread.is_alive():
+            return
+        self._startup_scan = None
+        if "changes" not in result:
+            self.registry.scan()  # сканирование в фоне упало — повторяем здесь, чтобы увидеть ошибку
+        self.load_servers(self.registry.names())
+        self.autostart_servers()
+        self.update_top_buttons()
+        self.update_ip_label()
+        if self.config.problems:
+            QtWidgets.QMessageBox.warning(self, "Настройки", "Исправлено при загрузке настроек:\n" + "\n".join(self.config.problems))
+
+    def autostart_servers(self):
+        """Запускает серверы с автозапуском, которые ещё не работают (в том числе отдельно от менеджера)."""
+        for name in self.config.autostart():
+            if name not in self.registry.names():
+                continue
+            runtime = self.supervisor.runtime(name, os.path.join(SERVERS_DIR, name))
+            if runtime.is_running():
+                continue
+            args = self.launch_args(runtime)
+            if args is None:
+                continue
+            try:
+                runtime.start(args)
+            except OSError as e:
+                runtime.console.append(f"[Менеджер] Автозапуск не удался: {e}")
+            self.refresh_server_row(name)
+
+    # --- Папка серверов ---
+    def set_servers_dir(self, servers_dir):
+        """Переключает папку серверов: новый реестр и наблюдение за новой папкой."""
+        global SERVERS_DIR
+        SERVERS_DIR = servers_dir
+        self.registry = registry.ServerRegistry(servers_dir)
+        if self.fs_watcher.directories():
+            self.fs_watcher.removePaths(self.fs_watcher.directories())
+        self._changed_dirs.clear()
+
+    def watch_servers(self):
+        """Наблюдать за папкой серверов и папками известных серверов."""
+        wanted = {os.path.normpath(SERVERS_DIR)} | {os.path.normpath(info.path) for info in self.registry.servers()}
+        watched = {os.path.normpath(path) for path in self.fs_watcher.directories()}
+        if watched - wanted:
+            self.fs_watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.fs_watcher.addPaths(list(wanted - watched))
+
+    def on_directory_changed(self, path):
+        self._changed_dirs.add(os.path.normpath(path))
+        self._registry_timer.start()
+
+    def refresh_registry(self):
+        dirs, self._changed_dirs = self._changed_dirs, set()
+        if os.path.normpath(SERVERS_DIR) in dirs:
+            changes = self.registry.scan()
+        else:
+            added, removed, changed = set(), set(), set()
+            for path in dirs:
+                result = self.registry.refresh(os.path.basename(path))
+                added.update(result.added)
+                removed.update(result.removed)
+                changed.update(result.changed)
+            changes = registry.RegistryChanges(sorted(added), sorted(removed), sorted(changed))
+        self.apply_registry_changes(changes)
+
+    def apply_registry_changes(self, changes):
+        """Список перестраивается только если серверы появились, пропали или сменили тип."""
+        if not (changes.added or changes.removed or changes.changed):
+            return
+        # Новая папка может быть сервером, запущенным в другом месте и перенесённым сюда
+        self.supervisor.discover([(name, os.path.join(SERVERS_DIR, name)) for name in changes.added])
+        self.load_servers(self.registry.names(), discover=False)
 
     def update_top_buttons(self):
-        status = self.get_server_status(self.get_selected_server())
+        runtime = self.current_runtime()
+        running = runtime is not None and runtime.is_running()
         server_selected = self.get_selected_server() is not None
-        if status == "running":
+        self.send_command_button.setEnabled(running)
+        if running:
             self.top_startstop_button.setText("Стоп")
             self.top_startstop_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
             self.quick_actions_button.setEnabled(True)
@@ -293,7 +850,7 @@ class ServerManager(QtWidgets.QWidget):
         layout = QtWidgets.QFormLayout(dialog)
 
         # --- Директория по умолчанию ---
-        default_dir = resource_path("servers")
+        default_dir = app_path("servers")
         dir_edit = QtWidgets.QLineEdit(default_dir)
         browse_btn = QtWidgets.QPushButton("Обзор...")
 
@@ -310,16 +867,8 @@ class ServerManager(QtWidgets.QWidget):
 
         # --- Список сетей ---
         net_combo = QtWidgets.QComboBox()
-        networks = []
-        net_map = {}
-        for iface, addrs in psutil.net_if_addrs().items():
-            ip_list = [addr.address for addr in addrs if addr.family == socket.AF_INET and not addr.address.startswith("127.")]
-            if ip_list:
-                networks.append(iface)
-                net_map[iface] = ip_list
-        if not networks:
-            networks = ["localhost"]
-            net_map["localhost"] = ["127.0.0.1"]
+        net_map = self.network.interface_addresses()
+        networks = list(net_map)
 
         net_combo.addItems(networks)
         layout.addRow("Сеть для отображения:", net_combo)
@@ -349,6 +898,7 @@ class ServerManager(QtWidgets.QWidget):
         adv_layout.addRow("Путь к java:", java_layout)
 
         # --- Ползунок выбора максимальной оперативки ---
+        import psutil
         total_gb = max(1, int(psutil.virtual_memory().total // (1024 ** 3)))
         ram_slider = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal)
         ram_slider.setMinimum(1)
@@ -408,9 +958,7 @@ class ServerManager(QtWidgets.QWidget):
                 self.config["java_path"] = "java"
                 self.config["max_ram_gb"] = 5
                 self.config["advanced_option"] = False
-            save_config(self.config)
-            global SERVERS_DIR
-            SERVERS_DIR = new_dir
+            self.set_servers_dir(new_dir)
             self.update_ip_label()
             self.load_servers()
             dialog.accept()
@@ -419,14 +967,14 @@ class ServerManager(QtWidgets.QWidget):
         dialog.exec()
 
     def get_server_status(self, server_name):
-        if hasattr(self, 'selected_server') and self.selected_server == server_name and self.process:
-            if self.process.state() == QtCore.QProcess.ProcessState.Running:
-                return "running"
-            elif self.process.exitStatus() == QtCore.QProcess.ExitStatus.CrashExit:
-                return "error"
-            else:
-                return "stopped"
-        return self.server_status.get(server_name, "stopped")
+        return self.supervisor.status(server_name)
+
+    def current_runtime(self):
+        """Состояние выбранного сервера (процесс, консоль, игроки) или None."""
+        name = self.get_selected_server()
+        if not name:
+            return None
+        return self.supervisor.runtime(name, os.path.join(SERVERS_DIR, name))
 
     def show_settings_dialog(self):
         dialog = QtWidgets.QDialog(self)
@@ -449,16 +997,8 @@ class ServerManager(QtWidgets.QWidget):
 
         # --- Список сетей ---
         net_combo = QtWidgets.QComboBox()
-        networks = []
-        net_map = {}  # network name -> list of IPs
-        for iface, addrs in psutil.net_if_addrs().items():
-            ip_list = [addr.address for addr in addrs if addr.family == socket.AF_INET and not addr.address.startswith("127.")]
-            if ip_list:
-                networks.append(iface)
-                net_map[iface] = ip_list
-        if not networks:
-            networks = ["localhost"]
-            net_map["localhost"] = ["127.0.0.1"]
+        net_map = self.network.interface_addresses()  # network name -> list of IPs
+        networks = list(net_map)
 
         net_combo.addItems(networks)
         selected_net = self.config.get("selected_network")
@@ -494,6 +1034,7 @@ class ServerManager(QtWidgets.QWidget):
         adv_layout.addRow("Путь к java:", java_layout)
 
         # --- Ползунок выбора максимальной оперативки ---
+        import psutil
         total_gb = max(1, int(psutil.virtual_memory().total // (1024 ** 3)))
         max_ram_gb = self.config.get("max_ram_gb", min(5, total_gb))
         ram_slider = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal)
@@ -553,9 +1094,7 @@ class ServerManager(QtWidgets.QWidget):
             else:
                 self.config["java_path"] = "java"
                 self.config["max_ram_gb"] = 5
-            save_config(self.config)
-            global SERVERS_DIR
-            SERVERS_DIR = new_dir
+            self.set_servers_dir(new_dir)
             self.update_ip_label()
             self.load_servers()
             dialog.accept()
@@ -564,96 +1103,75 @@ class ServerManager(QtWidgets.QWidget):
         btn_box.rejected.connect(dialog.reject)
         dialog.exec()
 
-    def set_server_status(self, server_name, status):
-        self.server_status[server_name] = status
-        self.load_servers()
-
-    def make_status_icon(self, status):
-
-        color = {
-            "running": "#4caf50",
-            "error": "#f44336",
-            "stopped": "#bdbdbd"
-        }.get(status, "#bdbdbd")
-
-        pixmap = QtGui.QPixmap(16, 16)
-        pixmap.fill(QtCore.Qt.GlobalColor.transparent)
-        painter = QtGui.QPainter(pixmap)
-        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
-        painter.setBrush(QtGui.QBrush(QtGui.QColor(color)))
-        painter.setPen(QtCore.Qt.PenStyle.NoPen)
-        painter.drawEllipse(2, 2, 12, 12)
-        painter.end()
-
-        return QtGui.QIcon(pixmap)
-    
+    def update_metrics(self):
+        self.sampler.set_targets(self.supervisor.process_targets())
+        self.server_model.update_metrics()
+
+    def refresh_server_row(self, name=None):
+        """Перерисовывает строку сервера (по умолчанию выбранного) после смены статуса."""
+        self.server_model.update_server(name or self.get_selected_server())
+
+    def refresh_server_list(self):
+        """Перерисовывает все строки — без обращения к папке серверов."""
+        self.server_model.update_all()
+
+    def load_servers(self, servers=None, discover=True):
+        """Обновляет список серверов; servers=None — заново проверить папку (через кэш реестра).
+
+        В модели меняются только добавленные и удалённые строки, выбор сохраняется.
+        """
+        if servers is None:
+            self.registry.scan()
+            servers = self.registry.names()
+        self.watch_servers()
+        if servers != self.config.get("known_servers", []) and self._startup_scan is None:
+            # Список для мгновенного показа при следующем запуске
+            self.config["known_servers"] = list(servers)
+        if discover:
+            # Серверы переживают перезапуск менеджера — подключаемся к уже работающим
+            self.supervisor.discover([(name, os.path.join(SERVERS_DIR, name)) for name in servers])
+        self.server_model.set_servers(servers)
+        self.sync_server_selection()
+
+    def sync_server_selection(self):
+        """Выделяет в списке выбранный сервер (после перестройки модели выделение теряется)."""
+        row = self.server_model.row(self.get_selected_server())
+        view = self.server_list_view
+        if row < 0 or view.currentIndex().row() == row:
+            return
+        self._syncing_selection = True
+        try:
+            view.setCurrentIndex(self.server_model.index(row, 0))
+        finally:
+            self._syncing_selection = False
 
-    def load_servers(self):
-        for i in reversed(range(self.server_list_layout.count())):
-            item = self.server_list_layout.takeAt(i)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-        self.server_list_items.clear()
-        servers = list_servers()
-
-        for server_name in servers:
-            row_widget = QtWidgets.QWidget()
-            row_layout = QtWidgets.QHBoxLayout(row_widget)
-            
-            row_layout.setContentsMargins(2, 0, 2, 0)
-            row_layout.setSpacing(4)
-            status = self.get_server_status(server_name)
-            icon_label = QtWidgets.QLabel()
-            icon_label.setPixmap(self.make_status_icon(status).pixmap(16, 16))
-            row_layout.addWidget(icon_label)
-            label = QtWidgets.QLabel(server_name)
-            label.setMinimumHeight(20)
-            label.setStyleSheet("padding-left: 4px;")
-            label.mousePressEvent = lambda event, name=server_name: self.select_server_by_name(name)
-            row_widget.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
-
-            row_widget.customContextMenuRequested.connect(
-                lambda pos, name=server_name, widget=row_widget: self.show_server_menu(pos, name, widget)
-            )
+    def on_server_row_changed(self, current, previous):
+        if self._syncing_selection:
+            return
+        name = self.server_model.name(current.row())
+        if name and name != self.get_selected_server():
+            self.select_server_by_name(name)
 
-            row_layout.addWidget(label)
-            row_layout.addStretch(1)
-            self.server_list_layout.addWidget(row_widget)
-            self.server_list_items.append((server_name, row_widget, label, icon_label))
+    def on_server_list_menu(self, pos):
+        index = self.server_list_view.indexAt(pos)
+        name = self.server_model.name(index.row()) if index.isValid() else None
+        if name:
+            self.show_server_menu(pos, name, self.server_list_view.viewport())
 
-        self.players_list.clear()
-        
     def update_ip_label(self):
+        """Адрес для игроков: IP из кэша сетей и порт выбранного сервера (файл читается, только если изменился)."""
         server_name = self.get_selected_server()
-        ip = None
-        port = "*****"
+        port = None
         if server_name:
-            props_path = os.path.join(SERVERS_DIR, server_name, "server.properties")
-            if os.path.exists(props_path):
-                try:
-                    with open(props_path, encoding="utf-8") as f:
-                        for line in f:
-                            if line.startswith("server-port="):
-                                port = line.strip().split("=", 1)[1] or "*****"
-                except Exception:
-                    pass
-
-        # Получаем список всех IP-адресов пользователя
-        ip_list = []
-        for iface, addrs in psutil.net_if_addrs().items():
-            for addr in addrs:
-                if addr.family == socket.AF_INET and not addr.address.startswith("127."):
-                    ip_list.append(addr.address)
-        if not ip_list:
-            ip_list = ["127.0.0.1"]
-        # Сохраняем выбранный IP в настройках, если есть
-        selected_ip = self.config.get("selected_ip")
-        if selected_ip not in ip_list:
-            selected_ip = ip_list[0]
-            self.config["selected_ip"] = selected_ip
-            save_config(self.config)
-        ip = selected_ip
+            port = network.server_port(os.path.join(SERVERS_DIR, server_name))
+        port = str(port) if port else "*****"
+
+        # Адреса компьютера собираются в фоне при запуске; до этого показываем сохранённый
+        ip = self.config.get("selected_ip") or "127.0.0.1"
+        if self.network.ready:
+            addresses = self.network.addresses()
+            if ip not in addresses:
+                ip = addresses[0]
 
         self._real_ip = f"{ip}:{port}"
         if self._ip_visible or self._ip_always_visible:
@@ -661,6 +1179,14 @@ class ServerManager(QtWidgets.QWidget):
         else:
             self.ip_label.setText("*" * len(ip) + ":" + "*" * len(port))
 
+    def on_network_changed(self):
+        """Адреса компьютера изменились: сохранённый IP пропал — берём первый из выбранной сети."""
+        net_map = self.network.interface_addresses()
+        if self.config.get("selected_ip") not in self.network.addresses():
+            ip_list = net_map.get(self.config.get("selected_network")) or self.network.addresses()
+            self.config["selected_ip"] = ip_list[0]
+        self.update_ip_label()
+
     def show_ip_temporarily(self, event):
         if event.button() == QtCore.Qt.MouseButton.LeftButton:
             if not self._ip_always_visible:
@@ -676,12 +1202,41 @@ class ServerManager(QtWidgets.QWidget):
         menu = QtWidgets.QMenu(self)
         show_always = menu.addAction("Показать всегда")
         copy_action = menu.addAction("Скопировать")
+        # Остальные адреса компьютера (в том числе IPv6) — из кэша сетей
+        addresses_menu = menu.addMenu("Другие адреса")
+        copy_actions = {}
+        for iface in self.network.interfaces().values():
+            for ip in iface.ipv4 + iface.ipv6:
+                copy_actions[addresses_menu.addAction(f"{ip} ({iface.name})")] = ip
+        addresses_menu.setEnabled(bool(copy_actions))
+        check_action = menu.addAction("Проверить порт")
+        check_action.setEnabled(self.get_selected_server() is not None)
         action = menu.exec(self.ip_label.mapToGlobal(pos))
         if action == show_always:
             self._ip_always_visible = True
             self.update_ip_label()
         elif action == copy_action:
             QtWidgets.QApplication.clipboard().setText(self._real_ip)
+        elif action in copy_actions:
+            ip = copy_actions[action]
+            port = self._real_ip.rsplit(":", 1)[1]
+            QtWidgets.QApplication.clipboard().setText(f"[{ip}]:{port}" if ":" in ip else f"{ip}:{port}")
+        elif action == check_action:
+            self.check_server_port(self.get_selected_server())
+
+    def check_server_port(self, server_name):
+        """Проверка порта сервера: занят ли он и отвечает ли по адресам компьютера."""
+        server_path = os.path.join(SERVERS_DIR, server_name)
+        if registry.server_executable(server_path) == registry.BEDROCK_EXECUTABLE:
+            QtWidgets.QMessageBox.information(self, "Проверка порта", "Bedrock-сервер работает по UDP — проверка недоступна.")
+            return
+        port = network.server_port(server_path, 25565)
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.CursorShape.WaitCursor)
+        try:
+            test = network.self_test(port, self.network.addresses() + self.network.addresses(ipv6=True))
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        QtWidgets.QMessageBox.information(self, f"Проверка порта: {server_name}", network.describe_test(test))
             
     def show_server_config_dialog(self):
         dialog = QtWidgets.QDialog(self)
@@ -693,20 +1248,9 @@ class ServerManager(QtWidgets.QWidget):
         if not server_name:
             return
             
-        properties_path = os.path.join(SERVERS_DIR, server_name, "server.properties")
-        properties = {}
-        
-        # Read server.properties
-        if os.path.exists(properties_path):
-            with open(properties_path, encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        try:
-                            key, value = line.split('=', 1)
-                            properties[key.strip()] = value.strip()
-                        except:
-                            continue
+        server_path = os.path.join(SERVERS_DIR, server_name)
+        # Разобранный файл из кэша; значения уже в типах схемы
+        props = properties.load(server_path)
 
         # Helper function to create clickable label with tooltip
         def create_labeled_field(param_name, tooltip):
@@ -718,21 +1262,25 @@ class ServerManager(QtWidgets.QWidget):
 
         # MOTD field
         motd_label = create_labeled_field("MOTD:", "Это описание сервера, которое видят игроки в списке серверов")
-        motd_input = QtWidgets.QLineEdit(properties.get('motd', ''))
+        motd_input = QtWidgets.QLineEdit(props.get('motd', ''))
         layout.addRow(motd_label, motd_input)
 
         # Server port field
         port_label = create_labeled_field("Порт сервера:", "Порт, на котором будет работать сервер")
         port_input = QtWidgets.QSpinBox()
         port_input.setRange(1, 65535)
-        port_input.setValue(int(properties.get('server-port', '25565')))
+        port = props.typed('server-port')
+        port_input.setValue(port if isinstance(port, int) else 25565)
         layout.addRow(port_label, port_input)
 
         # View distance slider
-        view_label = create_labeled_field("Дальность прорисовки:", "Дальность прорисовки в чанках (8-48)")
+        view_spec = properties.SCHEMA['view-distance']
+        view_label = create_labeled_field(
+            "Дальность прорисовки:", f"Дальность прорисовки в чанках ({view_spec.minimum}-{view_spec.maximum})")
         view_slider = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal)
-        view_slider.setRange(8, 48)
-        view_slider.setValue(int(properties.get('view-distance', '10')))
+        view_slider.setRange(view_spec.minimum, view_spec.maximum)
+        view = props.typed('view-distance')
+        view_slider.setValue(view if isinstance(view, int) else view_spec.default)
         view_value = QtWidgets.QLabel(str(view_slider.value()))
         view_slider.valueChanged.connect(lambda v: view_value.setText(str(v)))
         view_layout = QtWidgets.QHBoxLayout()
@@ -743,32 +1291,32 @@ class ServerManager(QtWidgets.QWidget):
         # Online mode checkbox
         online_mode = QtWidgets.QCheckBox()
         online_label = create_labeled_field("Онлайн режим", "Если включено - на сервер могут зайти только лицензионные аккаунты\nЕсли выключено - смогут зайти и пиратские клиенты")
-        online_mode.setChecked(properties.get('online-mode', 'true').lower() == 'true')
+        online_mode.setChecked(props.typed('online-mode') is True)
         layout.addRow(online_label, online_mode)
 
         # Hide online players checkbox
         hide_players = QtWidgets.QCheckBox()
         hide_label = create_labeled_field("Скрыть список игроков", "Если включено - список игроков не будет виден в меню паузы")
-        hide_players.setChecked(properties.get('hide-online-players', 'false').lower() == 'true')
+        hide_players.setChecked(props.typed('hide-online-players') is True)
         layout.addRow(hide_label, hide_players)
 
         # PvP checkbox 
         pvp = QtWidgets.QCheckBox()
         pvp_label = create_labeled_field("PVP", "Разрешает или запрещает PvP между игроками")
-        pvp.setChecked(properties.get('pvp', 'true').lower() == 'true')
+        pvp.setChecked(props.typed('pvp') is True)
         layout.addRow(pvp_label, pvp)
 
         # Difficulty dropdown
         difficulty = QtWidgets.QComboBox()
         difficulty.addItems(['peaceful', 'easy', 'normal', 'hard'])
-        difficulty.setCurrentText(properties.get('difficulty', 'easy'))
+        difficulty.setCurrentText(props.get('difficulty', 'easy'))
         diff_label = create_labeled_field("Сложность:", "Уровень сложности игры:\npeaceful - монстры не появляются\neasy - легкая сложность\nnormal - средняя сложность\nhard - сложная игра")
         layout.addRow(diff_label, difficulty)
 
         # Gamemode dropdown 
         gamemode = QtWidgets.QComboBox()
         gamemode.addItems(['survival', 'creative', 'adventure', 'spectator'])
-        gamemode.setCurrentText(properties.get('gamemode', 'survival'))
+        gamemode.setCurrentText(props.get('gamemode', 'survival'))
         mode_label = create_labeled_field("Режим игры:", "Режим игры по умолчанию:\nsurvival - выживание\ncreative - творческий режим\nadventure - приключение\nspectator - наблюдатель") 
         layout.addRow(mode_label, gamemode)
 
@@ -779,19 +1327,23 @@ class ServerManager(QtWidgets.QWidget):
         )
 
         def save_properties():
-            properties['motd'] = motd_input.text()
-            properties['server-port'] = str(port_input.value())
-            properties['view-distance'] = str(view_slider.value())
-            properties['online-mode'] = str(online_mode.isChecked()).lower()
-            properties['hide-online-players'] = str(hide_players.isChecked()).lower()
-            properties['pvp'] = str(pvp.isChecked()).lower()
-            properties['difficulty'] = difficulty.currentText()
-            properties['gamemode'] = gamemode.currentText()
-
+            updates = {
+                'motd': motd_input.text(),
+                'server-port': port_input.value(),
+                'view-distance': view_slider.value(),
+                'online-mode': online_mode.isChecked(),
+                'hide-online-players': hide_players.isChecked(),
+                'pvp': pvp.isChecked(),
+                'difficulty': difficulty.currentText(),
+                'gamemode': gamemode.currentText(),
+            }
+            errors = [error for error in (properties.validate(k, v) for k, v in updates.items()) if error]
+            if errors:
+                QtWidgets.QMessageBox.warning(dialog, "Ошибка", "\n".join(errors))
+                return
             try:
-                with open(properties_path, 'w', encoding='utf-8') as f:
-                    for key, value in properties.items():
-                        f.write(f"{key}={value}\n")
+                # Остальные строки файла (комментарии, rcon.*, экранирование) остаются как были
+                properties.update_properties(server_path, updates)
                 dialog.accept()
             except Exception as e:
                 QtWidgets.QMessageBox.critical(dialog, "Ошибка", f"Не удалось сохранить настройки:\n{str(e)}")
@@ -803,71 +1355,76 @@ class ServerManager(QtWidgets.QWidget):
         dialog.exec()
 
     def toggle_whitelist(self):
-        self.command_input.setText("whitelist on")
-        self.send_command()
+        self.run_commands(commands.MACROS["Включить белый список"])
 
     def restart_server(self):
-        self.stop_server()
-        QtCore.QTimer.singleShot(1500, self.start_server)
+        """Перезапуск без фиксированной паузы: запуск сразу после выхода процесса."""
+        runtime = self.current_runtime()
+        if not runtime:
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Выберите сервер для перезапуска.")
+            return
+        args = self.launch_args(runtime)
+        if args is None:
+            return
+        runtime.restart(args)
+        self.status_label.setToolTip("")
+        self.log_output.refresh()
+        self.update_status_label()
+        self.refresh_server_row()
+        self.update_top_buttons()
 
     def reload_server(self):
-        self.command_input.setText("reload")
-        self.send_command()
+        self.run_commands(commands.MACROS["Перезагрузка датапаков"])
 
     def tick_freeze(self):
-        self.command_input.setText("tick freeze")
-        self.send_command()
+        self.run_commands(commands.MACROS["Заморозить время"])
 
     def select_server_by_name(self, name):
         self.selected_server = name
         self.update_top_buttons()
         self.update_ip_label()
         self.update_selected_server_label()  # <--- добавлено
-        for server_name, _, label, _ in self.server_list_items:
-            if server_name == name:
-                label.setStyleSheet("padding-left: 4px; background: #cceeff;")
-            else:
-                label.setStyleSheet("padding-left: 4px;")
+        self.sync_server_selection()
         self.on_server_selected()
 
     def get_selected_server(self):
         return getattr(self, 'selected_server', None)
 
     def on_server_selected(self):
+        # Каждый сервер работает независимо — переключаем только то, что показываем
+        runtime = self.current_runtime()
+        self.log_output.set_buffer(runtime.console)
+        self.status_label.setToolTip("")
+        self.update_status_label()
         self.update_players_list()
         # Здесь можно добавить загрузку игроков для выбранного сервера, если нужно
     
+    def player_registry(self):
+        """Операторы, белый список и баны выбранного сервера или None."""
+        server_name = self.get_selected_server()
+        return players.registry_for(os.path.join(SERVERS_DIR, server_name)) if server_name else None
+
+    def check_player_files(self):
+        # Сравниваем версию, а не результат refresh(): файлы могли перечитаться при отрисовке подсказок
+        registry = self.player_registry()
+        if registry is not None:
+            registry.refresh()
+            if registry.version != self.players_model.version:
+                self.update_players_list()
+
     def show_player_menu(self, pos):
-        item = self.players_list.itemAt(pos)
-        if not item:
+        player_name = self.players_model.name(self.players_list.indexAt(pos).row())
+        registry = self.player_registry()
+        if not player_name or registry is None:
             return
-        player_name = item.text()
+        # Ответы из индексов реестра — файлы читаются только после их изменения
+        is_op = registry.is_op(player_name)
+        is_whitelisted = registry.is_whitelisted(player_name)
+        is_banned = registry.is_banned(player_name)
         menu = QtWidgets.QMenu(self)
         kick_action = menu.addAction("Кикнуть")
-        ban_action = menu.addAction("Забанить")
-        server_name = self.get_selected_server()
-        is_op = False
-        is_whitelisted = False
-
-        if server_name:
-            ops_path = os.path.join(SERVERS_DIR, server_name, "ops.json")
-            whitelist_path = os.path.join(SERVERS_DIR, server_name, "whitelist.json")
-            # Проверка OP
-            if os.path.exists(ops_path):
-                try:
-                    with open(ops_path, encoding="utf-8") as f:
-                        ops_content = f.read()
-                        is_op = re.search(rf'"name"\s*:\s*"{re.escape(player_name)}"', ops_content) is not None
-                except Exception:
-                    pass
-            # Проверка whitelist
-            if os.path.exists(whitelist_path):
-                try:
-                    with open(whitelist_path, encoding="utf-8") as f:
-                        whitelist = json.load(f)
-                        is_whitelisted = any(entry.get("name") == player_name for entry in whitelist)
-                except Exception:
-                    pass
+        kick_action.setEnabled(player_name in self.players_model.online)
+        ban_action = menu.addAction("Разбанить" if is_banned else "Забанить")
 
         if is_op:
             op_action = menu.addAction("Забрать права администратора")
@@ -882,42 +1439,422 @@ class ServerManager(QtWidgets.QWidget):
         action = menu.exec(self.players_list.mapToGlobal(pos))
 
         if action == kick_action:
-            self.command_input.setText(f"kick {player_name}")
-            self.send_command()
+            self.run_commands([f"kick {player_name}"])
 
         elif action == ban_action:
-            self.command_input.setText(f"ban {player_name}")
-            self.send_command()
+            self.run_commands([f"pardon {player_name}" if is_banned else f"ban {player_name}"])
 
         elif action == op_action:
-            if is_op:
-                self.command_input.setText(f"deop {player_name}")
-            else:
-                self.command_input.setText(f"op {player_name}")
-            self.send_command()
+            self.run_commands([f"deop {player_name}" if is_op else f"op {player_name}"])
 
         elif action == whitelist_action:
             if is_whitelisted:
-                self.command_input.setText(f"whitelist remove {player_name}")
+                self.run_commands([f"whitelist remove {player_name}"])
             else:
-                self.command_input.setText(f"whitelist add {player_name}")
-            self.send_command()
+                self.run_commands([f"whitelist add {player_name}"])
 
     def show_server_menu(self, pos, server_name, widget):
         menu = QtWidgets.QMenu(self)
         info_action = menu.addAction("Информация о сервере")
+        stats_action = menu.addAction("Статистика игроков")
+        launch_action = menu.addAction("Параметры запуска")
+        rcon_action = None
+        server_path = os.path.join(SERVERS_DIR, server_name)
+        if (registry.server_executable(server_path) != registry.BEDROCK_EXECUTABLE
+                and not rcon.rcon_enabled(server_path)):
+            rcon_action = menu.addAction("Включить RCON")
+        autostart_action = menu.addAction("Запускать вместе с менеджером")
+        autostart_action.setCheckable(True)
+        autostart_action.setChecked(self.config.server(server_name)["autostart"])
+        port_action = menu.addAction("Проверить порт")
+        bulk_action = menu.addAction("server.properties нескольких серверов...")
+        sync_action = menu.addAction("Белый список и баны нескольких серверов...")
         folder_action = menu.addAction("Открыть папку сервера")
         archive_action = menu.addAction("Заархивировать сервер")
         action = menu.exec(widget.mapToGlobal(pos))
         if action == info_action:
             self.show_server_info(server_name)
+        elif action == stats_action:
+            self.show_player_stats(server_name)
+        elif action == launch_action:
+            self.show_launch_dialog(server_name)
+        elif rcon_action is not None and action == rcon_action:
+            self.enable_server_rcon(server_name)
+        elif action == autostart_action:
+            self.config.set_server(server_name, autostart=autostart_action.isChecked())
+        elif action == port_action:
+            self.check_server_port(server_name)
+        elif action == bulk_action:
+            self.show_bulk_properties_dialog([server_name])
+        elif action == sync_action:
+            self.show_player_sync_dialog([server_name])
         elif action == folder_action:
             self.open_server_folder(server_name)
         elif action == archive_action:
             self.archive_server(server_name)
 
+    def show_launch_dialog(self, server_name):
+        """Профиль JVM и параметры запуска сервера с предпросмотром командной строки."""
+        server_path = os.path.join(SERVERS_DIR, server_name)
+        if registry.server_executable(server_path) == registry.BEDROCK_EXECUTABLE:
+            QtWidgets.QMessageBox.information(self, "Параметры запуска", "У Bedrock-сервера нет параметров JVM.")
+            return
+        settings = launch.load_launch(server_path)
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle(f"Параметры запуска: {server_name}")
+        dialog.setMinimumWidth(560)
+        layout = QtWidgets.QFormLayout(dialog)
+
+        java_default, ram_default, profile_default = self.config.launch_defaults(server_name)
+        profile_combo = QtWidgets.QComboBox()
+        profile_combo.addItem(f"как в настройках ({launch.PROFILES.get(profile_default, launch.PROFILES['default'])[0]})", "")
+        for name, (title, _) in launch.PROFILES.items():
+            profile_combo.addItem(title, name)
+        index = profile_combo.findData(settings["profile"])
+        profile_combo.setCurrentIndex(max(index, 0))
+        layout.addRow("Профиль JVM:", profile_combo)
+
+        import psutil
+        total_gb = max(1, int(psutil.virtual_memory().total // (1024 ** 3)))
+        ram_spin = QtWidgets.QSpinBox()
+        ram_spin.setRange(0, total_gb)
+        ram_spin.setSuffix(" ГБ")
+        ram_spin.setSpecialValueText(f"как в настройках ({ram_default} ГБ)")
+        ram_spin.setValue(settings["ram_gb"] or 0)
+        layout.addRow("Память:", ram_spin)
+
+        java_edit = QtWidgets.QLineEdit(settings["java_path"])
+        java_edit.setPlaceholderText(java_default)
+        layout.addRow("Путь к java:", java_edit)
+
+        large_pages_check = QtWidgets.QCheckBox("Large pages (-XX:+UseLargePages)")
+        large_pages_check.setChecked(bool(settings["large_pages"]))
+        layout.addRow("", large_pages_check)
+
+        cpu_spin = QtWidgets.QSpinBox()
+        cpu_spin.setRange(0, os.cpu_count() or 64)
+        cpu_spin.setSpecialValueText("все")
+        cpu_spin.setValue(settings["active_processor_count"] or 0)
+        layout.addRow("Ядер для JVM:", cpu_spin)
+
+        extra_edit = QtWidgets.QLineEdit(settings["extra_args"])
+        extra_edit.setPlaceholderText("-Dfile.encoding=UTF-8 ...")
+        layout.addRow("Доп. аргументы:", extra_edit)
+
+        preview = QtWidgets.QPlainTextEdit()
+        preview.setReadOnly(True)
+        preview.setFixedHeight(110)
+        layout.addRow("Команда:", preview)
+
+        def current():
+            return {
+                "profile": profile_combo.currentData(),
+                "ram_gb": ram_spin.value(),
+                "java_path": java_edit.text().strip(),
+                "large_pages": large_pages_check.isChecked(),
+                "active_processor_count": cpu_spin.value(),
+                "extra_args": extra_edit.text().strip(),
+            }
+
+        def update_preview():
+            try:
+                args = build_launch_args(server_path, java_default, ram_default, current(), profile_default)
+                preview.setPlainText(launch.format_command(args))
+            except Exception as e:
+                preview.setPlainText(str(e))
+
+        profile_combo.currentIndexChanged.connect(update_preview)
+        ram_spin.valueChanged.connect(update_preview)
+        java_edit.textChanged.connect(update_preview)
+        large_pages_check.toggled.connect(update_preview)
+        cpu_spin.valueChanged.connect(update_preview)
+        extra_edit.textChanged.connect(update_preview)
+        update_preview()
+
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel
+        )
+        layout.addRow(btn_box)
+
+        def on_accept():
+            try:
+                launch.save_launch(server_path, current())
+            except OSError as e:
+                QtWidgets.QMessageBox.critical(dialog, "Ошибка", f"Не удалось сохранить параметры:\n{e}")
+                return
+            dialog.accept()
+
+        btn_box.accepted.connect(on_accept)
+        btn_box.rejected.connect(dialog.reject)
+        dialog.exec()
+
+    def show_bulk_properties_dialog(self, selected=()):
+        """Одна правка server.properties на многих серверах: проверка по схеме и предпросмотр разницы."""
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle("server.properties нескольких серверов")
+        dialog.resize(640, 520)
+        layout = QtWidgets.QVBoxLayout(dialog)
+
+        servers_list = QtWidgets.QListWidget()
+        for name in self.registry.names():
+            item = QtWidgets.QListWidgetItem(name)
+            item.setFlags(item.flags() | QtCore.Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.CheckState.Checked if name in selected else QtCore.Qt.CheckState.Unchecked)
+            servers_list.addItem(item)
+        select_all = QtWidgets.QCheckBox("Все серверы")
+        layout.addWidget(select_all)
+        layout.addWidget(servers_list, stretch=1)
+
+        form = QtWidgets.QFormLayout()
+        key_combo = QtWidgets.QComboBox()
+        key_combo.setEditable(True)  # можно вписать и ключ, которого нет в схеме
+        key_combo.addItems(sorted(properties.SCHEMA))
+        key_combo.setCurrentText("view-distance")
+        value_edit = QtWidgets.QLineEdit()
+        form.addRow("Параметр:", key_combo)
+        form.addRow("Значение:", value_edit)
+        layout.addLayout(form)
+
+        preview = QtWidgets.QPlainTextEdit()
+        preview.setReadOnly(True)
+        preview.setFont(QtGui.QFont("Consolas", 9))
+        layout.addWidget(preview, stretch=1)
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Apply | QtWidgets.QDialogButtonBox.StandardButton.Close)
+        apply_button = btn_box.button(QtWidgets.QDialogButtonBox.StandardButton.Apply)
+        layout.addWidget(btn_box)
+        planned = []
+
+        def checked_paths():
+            return [
+                os.path.join(SERVERS_DIR, servers_list.item(i).text()) for i in range(servers_list.count())
+                if servers_list.item(i).checkState() == QtCore.Qt.CheckState.Checked
+            ]
+
+        def update_preview():
+            key = key_combo.currentText().strip()
+            spec = properties.SCHEMA.get(key)
+            value_edit.setPlaceholderText(
+                f"{spec.kind}, по умолчанию {properties.to_text(spec.default)}"
+                + (f" ({', '.join(spec.choices)})" if spec.choices else "") if spec else "")
+            planned.clear()
+            paths = checked_paths()
+            if not key or not paths:
+                preview.setPlainText("Выберите серверы и параметр.")
+            else:
+                changes, errors = properties.plan_changes(paths, {key: value_edit.text().strip()})
+                planned.extend(changes)
+                if errors:
+                    preview.setPlainText("\n".join(errors))
+                elif not changes:
+                    preview.setPlainText("Ничего не изменится: значение уже такое.")
+                else:
+                    servers = len({change.server_path for change in changes})
+                    preview.setPlainText(f"Изменится серверов: {servers}\n\n" + properties.format_diff(changes))
+            apply_button.setEnabled(bool(planned))
+
+        def on_select_all(checked):
+            state = QtCore.Qt.CheckState.Checked if checked else QtCore.Qt.CheckState.Unchecked
+            servers_list.blockSignals(True)
+            for i in range(servers_list.count()):
+                servers_list.item(i).setCheckState(state)
+            servers_list.blockSignals(False)
+            update_preview()
+
+        def on_apply():
+            failed = properties.apply_changes(planned)
+            changed = {change.server_path for change in planned} - set(failed)
+            running = [runtime.name for runtime in self.supervisor.running()
+                       if os.path.join(SERVERS_DIR, runtime.name) in changed]
+            message = f"Изменено серверов: {len(changed)}."
+            if failed:
+                message += "\n\nНе изменены:\n" + "\n".join(
+                    f"{os.path.basename(path)}: {error}" for path, error in failed.items())
+            if running:
+                message += "\n\nВступит в силу после перезапуска: " + ", ".join(sorted(running))
+            QtWidgets.QMessageBox.information(dialog, "server.properties", message)
+            self.update_ip_label()
+            update_preview()
+
+        select_all.toggled.connect(on_select_all)
+        servers_list.itemChanged.connect(lambda item: update_preview())
+        key_combo.currentTextChanged.connect(lambda text: update_preview())
+        value_edit.textChanged.connect(lambda text: update_preview())
+        apply_button.clicked.connect(on_apply)
+        btn_box.rejected.connect(dialog.reject)
+        update_preview()
+        dialog.exec()
+
+    def show_player_sync_dialog(self, selected=()):
+        """Импорт списка игроков и синхронизация белого списка или банов на многих серверах."""
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle("Белый список и баны нескольких серверов")
+        dialog.resize(680, 620)
+        layout = QtWidgets.QVBoxLayout(dialog)
+
+        servers_list = QtWidgets.QListWidget()
+        for name in self.registry.names():
+            item = QtWidgets.QListWidgetItem(name)
+            item.setFlags(item.flags() | QtCore.Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.CheckState.Checked if name in selected else QtCore.Qt.CheckState.Unchecked)
+            servers_list.addItem(item)
+        select_all = QtWidgets.QCheckBox("Все серверы")
+        layout.addWidget(select_all)
+        layout.addWidget(servers_list, stretch=1)
+
+        form = QtWidgets.QFormLayout()
+        list_combo = QtWidgets.QComboBox()
+        for list_name, title in players.LISTS.items():
+            list_combo.addItem(title, list_name)
+        mode_combo = QtWidgets.QComboBox()
+        mode_combo.addItem("Добавить недостающих", "add")
+        mode_combo.addItem("Сделать точно таким (лишних убрать)", "replace")
+        reason_edit = QtWidgets.QLineEdit()
+        reason_edit.setPlaceholderText(players.BAN_REASON)
+        form.addRow("Список:", list_combo)
+        form.addRow("Как:", mode_combo)
+        form.addRow("Причина бана:", reason_edit)
+        layout.addLayout(form)
+
+        source_layout = QtWidgets.QHBoxLayout()
+        file_button = QtWidgets.QPushButton("Из файла...")
+        server_source = QtWidgets.QComboBox()
+        server_source.addItem("Взять с сервера...", None)
+        for name in self.registry.names():
+            server_source.addItem(name, name)
+        source_layout.addWidget(file_button)
+        source_layout.addWidget(server_source, stretch=1)
+        layout.addLayout(source_layout)
+        names_edit = QtWidgets.QPlainTextEdit()
+        names_edit.setPlaceholderText("Имена игроков по одному в строке, CSV (name,uuid) или JSON-список")
+        layout.addWidget(names_edit, stretch=1)
+
+        preview = QtWidgets.QPlainTextEdit()
+        preview.setReadOnly(True)
+        preview.setFont(QtGui.QFont("Consolas", 9))
+        layout.addWidget(preview, stretch=1)
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Apply | QtWidgets.QDialogButtonBox.StandardButton.Close)
+        apply_button = btn_box.button(QtWidgets.QDialogButtonBox.StandardButton.Apply)
+        layout.addWidget(btn_box)
+        planned = []
+        # Список на десятки тысяч имён не пересчитываем на каждую нажатую клавишу
+        preview_timer = QtCore.QTimer(dialog)
+        preview_timer.setSingleShot(True)
+        preview_timer.setInterval(300)
+
+        def checked_paths():
+            return [
+                os.path.join(SERVERS_DIR, servers_list.item(i).text()) for i in range(servers_list.count())
+                if servers_list.item(i).checkState() == QtCore.Qt.CheckState.Checked
+            ]
+
+        def update_preview():
+            list_name = list_combo.currentData()
+            reason_edit.setEnabled(list_name == "banned")
+            planned.clear()
+            entries, problems = players.parse_import(names_edit.toPlainText())
+            paths = checked_paths()
+            mode = mode_combo.currentData()
+            if not paths or (not entries and mode == "add"):
+                preview.setPlainText("Выберите серверы и список игроков.")
+            else:
+                plans, errors = players.plan_sync(
+                    paths, entries, list_name, mode, reason_edit.text().strip() or players.BAN_REASON)
+                planned.extend(plans)
+                text = f"Игроков в списке: {len(entries)}\n"
+                if problems or errors:
+                    shown = errors + problems[:20]
+                    more = len(problems) - 20
+                    text += "\n".join(shown) + (f"\n… и ещё {more} замечаний" if more > 0 else "") + "\n"
+                text += "\n" + (players.format_plans(plans) if plans else "Ничего не изменится.")
+                preview.setPlainText(text)
+            apply_button.setEnabled(bool(planned))
+
+        def on_select_all(checked):
+            state = QtCore.Qt.CheckState.Checked if checked else QtCore.Qt.CheckState.Unchecked
+            servers_list.blockSignals(True)
+            for i in range(servers_list.count()):
+                servers_list.item(i).setCheckState(state)
+            servers_list.blockSignals(False)
+            update_preview()
+
+        def load_file():
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                dialog, "Список игроков", "", "Списки игроков (*.txt *.csv *.json);;Все файлы (*)")
+            if path:
+                try:
+                    with open(path, encoding="utf-8-sig", errors="replace") as f:
+                        names_edit.setPlainText(f.read())
+                except OSError as e:
+                    QtWidgets.QMessageBox.warning(dialog, "Ошибка", f"Не удалось прочитать файл: {e}")
+
+        def load_server(index):
+            server_name = server_source.itemData(index)
+            if not server_name:
+                return
+            registry = players.registry_for(os.path.join(SERVERS_DIR, server_name))
+            registry.refresh(force=True)
+            source = registry.whitelist if list_combo.currentData() == "whitelist" else registry.banned
+            names_edit.setPlainText(json.dumps(source.entries, ensure_ascii=False))
+            server_source.setCurrentIndex(0)
+
+        def on_apply():
+            failed = {}
+            queued = []
+            for plan in planned:
+                server_name = os.path.basename(plan.server_path)
+                try:
+                    if players.apply_sync(plan, self.supervisor.get(server_name)) is not None:
+                        queued.append(server_name)
+                except Exception as e:
+                    failed[server_name] = str(e)
+            self.update_queue_label()
+            self.update_players_list()
+            message = f"Обновлено серверов: {len(planned) - len(failed)}."
+            if queued:
+                message += "\n\nЗапущенным серверам отправлены команды: " + ", ".join(sorted(queued))
+            if failed:
+                message += "\n\nНе обновлены:\n" + "\n".join(f"{name}: {error}" for name, error in failed.items())
+            QtWidgets.QMessageBox.information(dialog, "Списки игроков", message)
+            update_preview()
+
+        select_all.toggled.connect(on_select_all)
+        servers_list.itemChanged.connect(lambda item: preview_timer.start())
+        list_combo.currentIndexChanged.connect(lambda index: preview_timer.start())
+        mode_combo.currentIndexChanged.connect(lambda index: preview_timer.start())
+        reason_edit.textChanged.connect(lambda text: preview_timer.start())
+        names_edit.textChanged.connect(preview_timer.start)
+        preview_timer.timeout.connect(update_preview)
+        file_button.clicked.connect(load_file)
+        server_source.activated.connect(load_server)
+        apply_button.clicked.connect(on_apply)
+        btn_box.rejected.connect(dialog.reject)
+        update_preview()
+        dialog.exec()
+
+    def enable_server_rcon(self, server_name):
+        """Включает RCON в server.properties; порт выбирается так, чтобы не совпасть с другими серверами."""
+        used_ports = set()
+        for other in self.registry.names():
+            if other != server_name:
+                props = properties.read_properties(os.path.join(SERVERS_DIR, other))
+                if props.get("rcon.port", "").isdigit():
+                    used_ports.add(int(props["rcon.port"]))
+        try:
+            port = rcon.enable_rcon(os.path.join(SERVERS_DIR, server_name), used_ports)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось изменить server.properties:\n{e}")
+            return
+        message = f"RCON включён на порту {port}."
+        runtime = self.supervisor.get(server_name)
+        if runtime and runtime.is_running():
+            message += "\nИзменение вступит в силу после перезапуска сервера."
+        QtWidgets.QMessageBox.information(self, "RCON", message)
+
     def archive_server(self, server_name):
-        if self.process and self.process.state() == QtCore.QProcess.ProcessState.Running:
+        runtime = self.supervisor.get(server_name)
+        if runtime and runtime.is_running():
             QtWidgets.QMessageBox.warning(self, "Ошибка", "Нельзя архивировать запущенный сервер. Сначала остановите его.")
             return
         archive_dir = os.path.join(SERVERS_DIR, "Архив")
@@ -958,65 +1895,104 @@ class ServerManager(QtWidgets.QWidget):
                         loader_info = f"Fabric {fabric_version_str}"
                     else:
                         loader_info = f"Fabric {fabric_version}"
-        QtWidgets.QMessageBox.information(
-            self,
-            "Информация о сервере",
-            f"Название сборки: {server_name}\nЗагрузчик: {loader_info}"
-        )
-
-    def open_server_folder(self, server_name):
+        text = f"Название сборки: {server_name}\nЗагрузчик: {loader_info}"
+        records = boot.read_records(server_path)
+        if records:
+            text += f"\n\nПоследний запуск: {boot.format_record(records[-1])}"
+            summary = boot.summarize(records)
+            if "ready" in summary:
+                median, p95, count = summary["ready"]
+                text += f"\nВремя до готовности: медиана {median:.1f} с, p95 {p95:.1f} с (запусков: {count})"
+        QtWidgets.QMessageBox.information(self, "Информация о сервере", text)
+
+    def show_player_stats(self, server_name):
+        """Сессии игроков сервера за период: сводка, самые активные и онлайн по часам недели."""
         server_path = os.path.join(SERVERS_DIR, server_name)
-        QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(server_path))
-
-    def show_create_server_dialog(self):
         dialog = QtWidgets.QDialog(self)
-        dialog.setWindowTitle("Создать сервер")
+        dialog.setWindowTitle(f"Статистика игроков — {server_name}")
+        dialog.resize(760, 560)
         layout = QtWidgets.QVBoxLayout(dialog)
 
-        # Create tab widget
-        tab_widget = QtWidgets.QTabWidget()
-        java_tab = QtWidgets.QWidget()
-        bedrock_tab = QtWidgets.QWidget()
-        
-        # Java tab layout
-        java_layout = QtWidgets.QFormLayout(java_tab)
-        java_name_edit = QtWidgets.QLineEdit()
-        java_layout.addRow("Название сервера:", java_name_edit)
-        
-        java_loader_combo = QtWidgets.QComboBox()
-        java_loader_combo.addItems(["Forge", "Fabric", "Paper"])
-        java_layout.addRow("Загрузчик:", java_loader_combo)
-        
-        java_version_combo = QtWidgets.QComboBox()
-        java_version_combo.setEditable(True)
-        java_version_combo.setPlaceholderText("например, 1.20.4")
-        java_versions = ["1.20.4", "1.20.1", "1.19.4", "1.18.2", "1.17.1", "1.16.5", "1.12.2", "1.8.9"]
-        java_version_combo.addItems(java_versions)
-        java_layout.addRow("Версия Minecraft:", java_version_combo)
-
-        # Bedrock tab layout
-        bedrock_layout = QtWidgets.QFormLayout(bedrock_tab)
-        bedrock_name_edit = QtWidgets.QLineEdit()
-        bedrock_layout.addRow("Название сервера:", bedrock_name_edit)
-        
-        # Add tabs
-        tab_widget.addTab(java_tab, "Java Edition")
-        tab_widget.addTab(bedrock_tab, "Bedrock")
-        layout.addWidget(tab_widget)
-
-        # Buttons
-        btn_box = QtWidgets.QDialogButtonBox(
-            QtWidgets.QDialogButtonBox.StandardButton.Ok | 
-            QtWidgets.QDialogButtonBox.StandardButton.Cancel
-        )
+        filter_layout = QtWidgets.QHBoxLayout()
+        period_combo = QtWidgets.QComboBox()
+        for title, days in sessions.PERIODS.items():
+            period_combo.addItem(title, days)
+        period_combo.setCurrentIndex(1)
+        player_edit = QtWidgets.QLineEdit()
+        player_edit.setPlaceholderText("Игрок (пусто — все)")
+        player_edit.setClearButtonEnabled(True)
+        filter_layout.addWidget(period_combo)
+        filter_layout.addWidget(player_edit, stretch=1)
+        layout.addLayout(filter_layout)
+
+        summary_label = QtWidgets.QLabel()
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        top_table = QtWidgets.QTableWidget(0, 3)
+        top_table.setHorizontalHeaderLabels(["Игрок", "Время на сервере", "Сессий"])
+        top_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        top_table.verticalHeader().setVisible(False)
+        top_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(top_table, stretch=1)
+
+        layout.addWidget(QtWidgets.QLabel("Среднее число игроков онлайн по часам:"))
+        heat_table = QtWidgets.QTableWidget(7, 24)
+        heat_table.setVerticalHeaderLabels(["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"])
+        heat_table.setHorizontalHeaderLabels([str(hour) for hour in range(24)])
+        heat_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
+        heat_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(heat_table, stretch=1)
+
+        btn_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Close)
+        btn_box.rejected.connect(dialog.reject)
         layout.addWidget(btn_box)
 
-        def write_start_bat(folder, jar_file):
-            with open(os.path.join(folder, "start.bat"), "w", encoding="utf-8") as f:
-                f.write(f'java -Xmx5G -jar {jar_file} nogui\npause\n')
+        def update_stats():
+            days = period_combo.currentData()
+            until = time.time()
+            since = until - days * 86400 if days else None
+            found = sessions.read_sessions(server_path, since, until, player_edit.text().strip() or None)
+            summary = sessions.summarize(found, since, until)
+            if not found:
+                summary_label.setText("Сессий за этот период нет." if self.supervisor.sessions is not None else
+                                      "Сессий нет. Запись включается ключом \"player_sessions\" в config.json.")
+            else:
+                peak_time = time.strftime("%d.%m.%Y %H:%M", time.localtime(summary.peak_time))
+                summary_label.setText(
+                    f"Сессий: {summary.sessions}, игроков: {summary.players}, "
+                    f"всего {watchdog.format_duration(summary.total)}, "
+                    f"в среднем {watchdog.format_duration(summary.average)} за сессию. "
+                    f"Пик онлайна: {summary.peak} ({peak_time})")
+            top = sessions.top_players(found, since, until, limit=50)
+            top_table.setRowCount(len(top))
+            for row, (name, seconds, count) in enumerate(top):
+                top_table.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
+                top_table.setItem(row, 1, QtWidgets.QTableWidgetItem(watchdog.format_duration(seconds)))
+                top_table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(count)))
+            grid = sessions.heatmap(found, since, until)
+            highest = max(max(row) for row in grid) or 1
+            for day in range(7):
+                for hour in range(24):
+                    value = grid[day][hour]
+                    item = QtWidgets.QTableWidgetItem(f"{value:.1f}" if value else "")
+                    item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+                    color = QtGui.QColor("#4caf50")
+                    color.setAlphaF(value / highest)
+                    item.setBackground(color)
+                    heat_table.setItem(day, hour, item)
+
+        period_combo.currentIndexChanged.connect(lambda index: update_stats())
+        player_edit.editingFinished.connect(update_stats)
+        update_stats()
+        dialog.exec()
+
+    def open_server_folder(self, server_name):
+        server_path = os.path.join(SERVERS_DIR, server_name)
+        QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(server_path))
 
-        
     def show_create_server_dialog(self):
+        from core import installer  # urllib и zipfile нужны только при установке
         dialog = QtWidgets.QDialog(self)
         dialog.setWindowTitle("Создать сервер")
         layout = QtWidgets.QVBoxLayout(dialog)
@@ -1038,8 +2014,7 @@ class ServerManager(QtWidgets.QWidget):
         java_version_combo = QtWidgets.QComboBox()
         java_version_combo.setEditable(True)
         java_version_combo.setPlaceholderText("например, 1.20.4")
-        java_versions = ["1.21.1", "1.20.4", "1.20.1", "1.19.4", "1.18.2", "1.17.1", "1.16.5", "1.14.4", "1.12.2", "1.10.2", "1.8.9"]
-        java_version_combo.addItems(java_versions)
+        java_version_combo.addItems(installer.JAVA_VERSIONS)
         java_layout.addRow("Версия Minecraft:", java_version_combo)
 
         # Bedrock tab layout
@@ -1059,10 +2034,6 @@ class ServerManager(QtWidgets.QWidget):
         )
         layout.addWidget(btn_box)
 
-        #def write_start_bat(folder, jar_file):
-        #    with open(os.path.join(folder, "start.bat"), "w", encoding="utf-8") as f:
-        #        f.write(f'java -Xmx5G -jar {jar_file} nogui\npause\n')
-
         def on_accept():
             is_java = tab_widget.currentIndex() == 0
             
@@ -1075,213 +2046,81 @@ class ServerManager(QtWidgets.QWidget):
                 loader = "Bedrock"
                 version = "latest"  # For Bedrock we'll always get latest
 
-            if not name:
-                QtWidgets.QMessageBox.warning(dialog, "Ошибка", "Введите название сервера.")
+            error = installer.check_new_server(SERVERS_DIR, name)
+            if not error and is_java and not version:
+                error = "Введите версию сервера."
+            if error:
+                QtWidgets.QMessageBox.warning(dialog, "Ошибка", error)
                 return
 
-            if is_java and not version:
-                QtWidgets.QMessageBox.warning(dialog, "Ошибка", "Введите версию сервера.")
-                return
+            # Окно хода установки; сама установка — в core/installer.py
+            status_dialog = QtWidgets.QDialog(dialog)
+            status_dialog.setWindowTitle("Установка сервера")
+            status_layout = QtWidgets.QVBoxLayout(status_dialog)
 
-            server_path = os.path.join(SERVERS_DIR, name)
-            if os.path.exists(server_path):
-                QtWidgets.QMessageBox.warning(dialog, "Ошибка", "Сервер с таким именем уже существует.")
-                return
+            status_label = QtWidgets.QLabel("Начало установки...")
+            status_label.setWordWrap(True)
+            status_layout.addWidget(status_label)
 
-            tmp_server_path = server_path + "_tmp"
-            if os.path.exists(tmp_server_path):
-                QtWidgets.QMessageBox.warning(dialog, "Ошибка", "Временная папка для установки уже существует. Удалите её вручную.")
-                return
+            progress_bar = QtWidgets.QProgressBar()
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(0)
+            status_layout.addWidget(progress_bar)
 
-            try:
-                os.makedirs(tmp_server_path, exist_ok=False)
-                jar_file = None
-
-                # Create status dialog
-                status_dialog = QtWidgets.QDialog(dialog)
-                status_dialog.setWindowTitle("Установка сервера")
-                status_layout = QtWidgets.QVBoxLayout(status_dialog)
-
-                status_label = QtWidgets.QLabel("Начало установки...")
-                status_label.setWordWrap(True)
-                status_layout.addWidget(status_label)
-
-                progress_bar = QtWidgets.QProgressBar()
-                progress_bar.setRange(0, 100)
-                progress_bar.setValue(0)
-                status_layout.addWidget(progress_bar)
-
-                status_dialog.setModal(True)
-                status_dialog.resize(400, 120)
-                status_dialog.show()
-
-
-                def update_status(text, progress=None):
-                    status_label.setText(text)
-                    if progress is not None:
-                        progress_bar.setValue(progress)
-                    QtWidgets.QApplication.processEvents()
-
-                if loader == "Paper":
-                    update_status("Получение информации о версиях Paper...")
-                    api_url = f"https://api.papermc.io/v2/projects/paper/versions/{version}"
-                    with urllib.request.urlopen(api_url) as resp:
-                        data = json.load(resp)
-                    builds = data.get("builds", [])
-                    if not builds:
-                        raise Exception("Не найдены билды Paper для этой версии")
-                    build = builds[-1]
-                    jar_url = f"https://api.papermc.io/v2/projects/paper/versions/{version}/builds/{build}/downloads/paper-{version}-{build}.jar"
-                    jar_file = "server.jar"
-                    jar_path = os.path.join(tmp_server_path, jar_file)
-                    
-                    update_status("Скачивание Paper сервера...", 50)
-                    urllib.request.urlretrieve(jar_url, jar_path)
-                    update_status("Скачивание Paper сервера...", 100)
-
-                elif loader == "Fabric":
-                    update_status("Получение информации о Fabric версиях...")
-                    fabric_installer_url = "https://maven.fabricmc.net/net/fabricmc/fabric-installer/0.11.2/fabric-installer-0.11.2.jar"
-                    installer_path = os.path.join(tmp_server_path, "fabric-installer.jar")
-                    urllib.request.urlretrieve(fabric_installer_url, installer_path)
-                    if not os.path.exists(installer_path):
-                        raise Exception(f"Не удалось скачать fabric-installer.jar")
-                    
-                    update_status("Установка зависимостей...", 30)
-                    subprocess.check_call([sys.executable, "-m", "pip", "install", "requests"])
-                    
-                    update_status("Установка Fabric...", 50)
-                    result = subprocess.run([
-                        "java", "-jar", installer_path, "server", "-mcversion", version, "-downloadMinecraft"
-                    ], cwd=tmp_server_path, capture_output=True, text=True)
-
-                    if result.returncode != 0:
-                        raise Exception(f"Ошибка при установке Fabric:\n{result.stderr}\n{result.stdout}")
-                    jar_file = "fabric-server-launch.jar"
-                    update_status("Установка Fabric...", 100)
-
-                elif loader == "Forge":
-                    update_status("Получение информации о Forge версиях...", 0)
-                    forge_meta_url = "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
-                    installer_path = os.path.join(tmp_server_path, "forge-installer.jar")
-                    req = urllib.request.Request(forge_meta_url, headers={"User-Agent": "Mozilla/5.0"})
-                    with urllib.request.urlopen(req) as resp:
-                        meta = json.load(resp)
-                    
-                    key = f"{version}-latest"
-                    if key not in meta["promos"]:
-                        raise Exception(f"Forge не найден для версии {version}")
-                    
-                    forge_version = meta["promos"][key]
-                    full_version = f"{version}-{forge_version}"
-                    installer_url = f"https://maven.minecraftforge.net/net/minecraftforge/forge/{full_version}/forge-{full_version}-installer.jar"
-                    update_status("Скачивание Forge установщика...", 30)
-
-                    req = urllib.request.Request(installer_url, headers={"User-Agent": "Mozilla/5.0"})
-                    with urllib.request.urlopen(req) as resp, open(installer_path, "wb") as out_file:
-                        out_file.write(resp.read())
-
-                    update_status("Устанвовка Forge", 60)
-                    subprocess.check_call(["java", "-jar", installer_path, "--installServer"], cwd=tmp_server_path)
-                    
-                    jar_candidates = [f for f in os.listdir(tmp_server_path) 
-                                    if f.startswith("forge-") and f.endswith(".jar") 
-                                    and "installer" not in f]
-                    if jar_candidates:
-                        jar_file = jar_candidates[0]
-                    else:
-                        print("Ошибка: не найден forge-jar после установки")
-                        raise Exception("Не найден forge-jar после установки")
-                    update_status("Ошибка...", 100)
-
-                # Check if user cancelled
-                #if progress.wasCanceled():
-                #    shutil.rmtree(tmp_server_path, ignore_errors=True)
-                #    return
-
-                elif loader == "Bedrock":
-                   import zipfile
-                   update_status("Скачивание Bedrock Server...", 0)
-                
-                   bedrock_url = get_latest_bedrock_url()
-                   zip_path = os.path.join(tmp_server_path, "bedrock-server.zip")
-                
-                   manager = QNetworkAccessManager()
-                   request = QNetworkRequest(QtCore.QUrl(bedrock_url))
-                
-                   output_file = QtCore.QFile(zip_path)
-                   output_file.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
-                
-                   def handle_finished():
-                       output_file.close()
-                       extract_files()
-                
-                   def handle_progress(bytes_received, bytes_total):
-                       if bytes_total > 0:
-                           percent = int(bytes_received * 100 / bytes_total)
-                           update_status(f"Скачивание Bedrock Server... ({percent}%)", percent)
-                
-                   def handle_ready_read():
-                       output_file.write(reply.readAll())
-                
-                   def extract_files():
-                       update_status("Распаковка файлов сервера...", 0)
-                       QtWidgets.QApplication.processEvents()
-                
-                       with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                           files = zip_ref.namelist()
-                           total_files = len(files)
-                           for i, file in enumerate(files):
-                               if status_dialog is None or not status_dialog.isVisible():
-                                   raise Exception("Распаковка отменена пользователем")
-                               percent = int((i / total_files) * 100)
-                               update_status(f"Распаковка: {file}", percent)
-                               zip_ref.extract(file, tmp_server_path)
-                               QtWidgets.QApplication.processEvents()
-                
-                       os.remove(zip_path)
-                       update_status("Установка завершена", 100)
-                       finish_installation()
-                
-                   def finish_installation():
-                       os.rename(tmp_server_path, server_path)
-                       status_dialog.close()
-                       dialog.accept()
-                       self.load_servers()
-                
-                   reply = manager.get(request)
-                   reply.finished.connect(handle_finished)
-                   reply.downloadProgress.connect(handle_progress)
-                   reply.readyRead.connect(handle_ready_read)
-                
-                   dialog.reply = reply
-                   dialog.manager = manager
-                
-                   return  # Установка завершится позже, асинхронно
-
-                os.rename(tmp_server_path, server_path)
-                dialog.accept()
-                self.load_servers()
-                status_dialog.close()
+            cancel_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Cancel)
+            cancel_box.rejected.connect(status_dialog.reject)
+            status_layout.addWidget(cancel_box)
 
-            except Exception as e:
-                import shutil
-                shutil.rmtree(tmp_server_path, ignore_errors=True)
-                status_dialog.close()
-                QtWidgets.QMessageBox.critical(dialog, "Ошибка", f"Ошибка при создании сервера: {str(e)}")
+            status_dialog.setModal(True)
+            status_dialog.resize(400, 120)
+
+            # Установка идёт в фоновом потоке; окно раз в 100 мс забирает её последнее сообщение
+            state = {"text": "Начало установки...", "percent": 0, "cancel": False, "done": False, "error": None}
+
+            def report(text, percent=None):
+                if state["cancel"]:
+                    raise Exception("Установка отменена пользователем")
+                state["text"] = text
+                if percent is not None:
+                    state["percent"] = percent
+
+            def install():
+                try:
+                    installer.install_server(
+                        SERVERS_DIR, name, loader, version, self.config.get("java_path", "java"), report
+                    )
+                except Exception as e:
+                    state["error"] = e
+                state["done"] = True
+
+            def update_status():
+                status_label.setText(state["text"])
+                progress_bar.setValue(state["percent"])
+                if state["done"]:
+                    status_dialog.accept()
+
+            status_timer = QtCore.QTimer(status_dialog)
+            status_timer.setInterval(100)
+            status_timer.timeout.connect(update_status)
+            status_timer.start()
+            threading.Thread(target=install, daemon=True).start()
+            if not status_dialog.exec():
+                # Загрузка прервётся сразу, установщик Forge/Fabric — после своего завершения
+                state["cancel"] = True
+                return
+            if state["error"] is not None:
+                QtWidgets.QMessageBox.critical(dialog, "Ошибка", f"Ошибка при создании сервера: {state['error']}")
                 return
+            dialog.accept()
+            self.load_servers()
 
         btn_box.accepted.connect(on_accept)
         btn_box.rejected.connect(dialog.reject)
         dialog.exec()
 
-
-
-   
-
     def toggle_server(self):
-        status = self.get_server_status(self.get_selected_server())
-        if status == "running":
+        runtime = self.current_runtime()
+        if runtime and runtime.is_running():
             self.stop_server()
         else:
             self.start_server()
@@ -1291,152 +2130,221 @@ class ServerManager(QtWidgets.QWidget):
         if not server_name:
             QtWidgets.QMessageBox.warning(self, "Ошибка", "Выберите сервер для запуска.")
             return
-        server_path = os.path.join(SERVERS_DIR, server_name)
-        # Найти jar-файл сервера (исключая installer)
-        jar_files = [
-            f for f in os.listdir(server_path)
-            if (f.endswith(".jar") and not f.endswith("installer.jar")) or f == "bedrock_server.exe"
-        ]
-        if not jar_files:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не найден файл сервера в папке {server_name}")
+        runtime = self.current_runtime()
+        args = self.launch_args(runtime)
+        if args is None:
+            return
+        try:
+            runtime.start(args)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось запустить сервер:\n{e}")
             return
-        jar_file = jar_files[0]
-        jar_path = os.path.join(server_path, jar_file)
-        if self.process:
-            self.process.kill()
-            self.process = None
-
-        self.log_output.clear()
-        self.process = QtCore.QProcess(self)
-        self.process.setWorkingDirectory(server_path)
-        self.process.readyReadStandardOutput.connect(self.handle_stdout)
-        self.process.readyReadStandardError.connect(self.handle_stderr)
-        self.process.finished.connect(self.process_finished)
-
-        if jar_file == "bedrock_server.exe":
-            self.process.start(jar_path)  # Используем полный путь!
-        else:
-            java_path = self.config.get("java_path", "java")
-            max_ram_gb = self.config.get("max_ram_gb", 5)
-            xms = f"-Xms{max_ram_gb}G"
-            xmx = f"-Xmx{max_ram_gb}G"
-            self.process.start(java_path, [xms, xmx, "-jar", jar_file, "nogui"])
-        
-
 
-        self.send_command_button.setEnabled(True)
-        self.update_status_label("starting")
-        self.set_server_status(server_name, "running")
+        self.status_label.setToolTip("")
+        self.log_output.set_buffer(runtime.console)
+        self.update_status_label()
+        self.refresh_server_row()
         self.update_top_buttons()
 
+    def launch_args(self, runtime):
+        """Команда запуска: параметры из папки сервера, затем раздел сервера в config.json, затем общие."""
+        java_path, max_ram_gb, profile = self.config.launch_defaults(runtime.name)
+        try:
+            return build_launch_args(runtime.path, java_path, max_ram_gb, profile=profile)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
+            return None
+
     def stop_server(self):
-        if self.process and self.process.state() == QtCore.QProcess.ProcessState.Running:
-            try:
-                self.process.write(b"stop\n")
-                self.process.waitForBytesWritten(1000)
-            except Exception:
-                pass
-            self.process.kill()
-            self.process = None
-            self.send_command_button.setEnabled(False)
-            if self.selected_server:
-                self.set_server_status(self.selected_server, "stopped")
-                self.update_status_label("stopped")
+        runtime = self.current_runtime()
+        if runtime:
+            # Заодно отменяет ожидающий автоперезапуск
+            runtime.stop()
+            self.log_output.refresh()
+            self.update_status_label()
+            self.refresh_server_row()
             self.update_top_buttons()
 
-    def process_finished(self):
-        self.log_output.append("\nСервер завершил работу.")
-        self.send_command_button.setEnabled(False)
-        if self.process and self.process.exitStatus() == QtCore.QProcess.ExitStatus.CrashExit:
-            self.set_server_status(self.selected_server, "error")
-            self.log_output.append("\nСервер завершил работу с ошибкой (краш).")
-            self.update_status_label("stopped")
-            QtWidgets.QMessageBox.critical(self, "Краш сервера", "Сервер завершился с ошибкой (краш). Проверьте логи!")
-        else:
-            self.set_server_status(self.selected_server, "stopped")
-            self.update_status_label("stopped")
-        self.update_top_buttons()
-
-    def handle_stdout(self):
-        if self.process:
-            data = self.process.readAllStandardOutput().data().decode("utf-8", errors="ignore")
-            self.log_output.append(data)
-            # Проверка на успешный запуск сервера
-            if "Done (" in data or "For help, type \"help\"" in data:
-                self.update_status_label("running")
-                self.set_server_status(self.get_selected_server(), "running")
-            # --- Новый код для подсчёта игроков ---
-            for line in data.splitlines():
-                # For Java Edition
-                join_match = re.search(r": (\w+) joined the game", line)
-                left_match = re.search(r": (\w+) left the game", line)
-                # For Bedrock Edition
-                bedrock_join = re.search(r"Player connected: (\w+)", line)
-                bedrock_left = re.search(r"Player disconnected: (\w+)", line) 
-                if join_match:
-                    player = join_match.group(1)
-                    self.online_players.add(player)
-                    self.update_players_list()
-                elif left_match:
-                    player = left_match.group(1)
-                    self.online_players.discard(player)
-                    self.update_players_list()
-                elif bedrock_join:
-                    player = bedrock_join.group(1)
-                    self.online_players.add(player)
-                    self.update_players_list()
-                elif bedrock_left:
-                    player = bedrock_left.group(1)
-                    self.online_players.discard(player)
-                    self.update_players_list()
-
-    
-    def handle_stderr(self):
-        if self.process:
-            data = self.process.readAllStandardError().data().decode("utf-8", errors="ignore")
-            self.log_output.append(data)
-            # Проверка на ошибки запуска или краша
-            if "Exception" in data or "Error" in data or "FAILED" in data or "Caused by" in data:
-                self.update_status_label(self, "error")
-                self.set_server_status(self.get_selected_server(), "error")
+    def flush_output(self):
+        """Забирает у фоновых потоков всех серверов готовые пакеты строк и событий.
+
+        Работа за кадр ограничена: в консоль попадает не больше её ёмкости,
+        события уже сжаты, а перерисовывается только выбранный сервер.
+        """
+        if self._startup_scan is not None:
+            self.apply_startup_scan()
+        if self._startup_scan is None and self.network.take_changed():
+            self.on_network_changed()
+        updates = self.supervisor.poll()
+        self.update_queue_label()
+        if not updates:
+            return
+        selected = self.supervisor.get(self.get_selected_server())
+        crashed = []
+        for runtime, update in updates:
+            if update.status_changed or update.exited or update.players_changed:
+                self.server_model.update_server(runtime.name)
+            if update.crashed and runtime.watchdog.restart_at is None:
+                # Если сторож уже запланировал перезапуск, окно не нужно
+                crashed.append(runtime.name)
+            if runtime is not selected:
+                continue
+            if update.lines or update.exited:
+                self.log_output.refresh()
+            if update.status_changed or update.ping:
+                self.update_status_label()
+            if update.tps:
+                self.status_label.setToolTip(f"Сервер не успевает: отставание {update.tps} мс")
+            if update.players_changed:
+                self.update_players_list()
+            if update.exited:
+                self.update_top_buttons()
+        for name in crashed:
+            QtWidgets.QMessageBox.critical(self, "Краш сервера", f"Сервер {name} завершился с ошибкой (краш). Проверьте логи!")
 
     def update_players_list(self):
-        self.players_list.clear()
-        for player in sorted(self.online_players):
-            self.players_list.addItem(player)
+        """Список игроков выбранного сервера: онлайн или из файлов сервера, с поиском по имени."""
+        runtime = self.supervisor.get(self.get_selected_server())
+        online = set(runtime.players) if runtime and runtime.is_running() else set()
+        registry = self.player_registry()
+        scope = self.players_scope.currentData()
+        if scope == "online" or registry is None:
+            names = list(online)
+        else:
+            names = registry.names(scope)
+        found = players.search(names, self.players_search.text())
+        self.players_model.set_players(found, registry, online)
+        self.players_count_label.setText(
+            f"{len(found)} из {len(names)}" if len(found) != len(names) else f"Всего: {len(names)}")
 
     def update_status_label(self, status=None, message=None):
         if status is None:
             status = self.get_server_status(self.get_selected_server())
-        if status == "running":
-            self.status_label.setText("Статус: Работает")
-            self.status_label.setStyleSheet("font-weight: bold; color: #4caf50; padding: 4px;")
-        elif status == "error":
-            self.status_label.setText(f"Статус: Ошибка запуска{f' ({message})' if message else ''}")
-            self.status_label.setStyleSheet("font-weight: bold; color: #f44336; padding: 4px;")
-        elif status == "stopped":
-            self.status_label.setText("Статус: Остановлен")
-            self.status_label.setStyleSheet("font-weight: bold; color: #888; padding: 4px;")
-        elif status == "starting":
-            self.status_label.setText("Статус: Запуск...")
-            self.status_label.setStyleSheet("font-weight: bold; color: #5da130; padding: 4px;")
-        elif status == "crashed":
-            self.status_label.setText("Статус: Краш")
-            self.status_label.setStyleSheet("font-weight: bold; color: #ff2400; padding: 4px;")
-        else:
-            self.status_label.setText(f"Статус: {status}")
-            self.status_label.setStyleSheet("font-weight: bold; color: #888; padding: 4px;")
+        title, color = STATUS_STYLES.get(status, (status, "#888"))
+        if status == "error" and message:
+            title += f" ({message})"
+        self.status_label.setText(f"Статус: {title}")
+        self.status_label.setStyleSheet(f"font-weight: bold; color: {color}; padding: 4px;")
+        runtime = self.supervisor.get(self.get_selected_server())
+        ping = runtime.ping if runtime else None
+        if ping and ping.ok and status in ("running", "external"):
+            self.status_label.setText(
+                self.status_label.text() + f" · пинг {ping.latency:.0f} мс · игроков {ping.online}/{ping.max}"
+            )
 
     # Вызовите update_status_label в нужных местах:
     # - после выбора сервера
     # - после запуска/остановки/краша
     def send_command(self):
         cmd = self.command_input.text().strip()
-        if not cmd or not self.process or self.process.state() != QtCore.QProcess.ProcessState.Running:
+        runtime = self.current_runtime()
+        if not cmd or not runtime or not runtime.is_running():
             return
-        self.process.write((cmd + "\n").encode("utf-8"))
+        # Через RCON, если он включён: тогда ответ на команду тоже появится в консоли
+        runtime.execute([cmd])
         self.command_input.clear()
 
+    def run_commands(self, command_list, name=None, runtime=None):
+        """Ставит команды в очередь сервера (по умолчанию выбранного); возвращает CommandBatch или None."""
+        runtime = runtime or self.current_runtime()
+        if not runtime or not runtime.is_running():
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Сервер не запущен.")
+            return None
+        batch = runtime.commands.submit(command_list, name)
+        self.update_queue_label()
+        return batch
+
+    def update_queue_label(self):
+        runtime = self.supervisor.get(self.get_selected_server())
+        text = ""
+        if runtime and runtime.commands.is_active():
+            batch = runtime.commands.batches[0]
+            text = f"Пакет «{batch.name}»: {batch.progress()}"
+            if len(runtime.commands.batches) > 1:
+                text += f" (+{len(runtime.commands.batches) - 1} в очереди)"
+        if self.queue_label.text() != text:
+            self.queue_label.setText(text)
+
+    def show_batch_dialog(self):
+        """Пакет команд или макрос: выполняется в фоне с ограничением частоты."""
+        runtime = self.current_runtime()
+        if not runtime or not runtime.is_running():
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Сервер не запущен.")
+            return
+        macros = dict(commands.MACROS)
+        macros.update(self.config.get("macros", {}))
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle(f"Пакет команд — {runtime.name}")
+        dialog.resize(520, 420)
+        layout = QtWidgets.QVBoxLayout(dialog)
+        macro_combo = QtWidgets.QComboBox()
+        macro_combo.addItem("— макрос —")
+        macro_combo.addItems(list(macros))
+        layout.addWidget(macro_combo)
+        editor = QtWidgets.QPlainTextEdit()
+        editor.setPlaceholderText("По одной команде в строке; # — комментарий, wait 5 — пауза в секундах")
+        layout.addWidget(editor)
+        rate = runtime.commands.rate
+        info = QtWidgets.QLabel("")
+        layout.addWidget(info)
+
+        def on_macro(index):
+            if index > 0:
+                editor.setPlainText("\n".join(macros[macro_combo.currentText()]))
+
+        def on_text():
+            count = len(commands.expand_macro(editor.toPlainText().splitlines()))
+            info.setText(f"Команд: {count}, отправка {rate} в секунду — около {count / rate:.0f} с")
+
+        macro_combo.currentIndexChanged.connect(on_macro)
+        editor.textChanged.connect(on_text)
+        on_text()
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel)
+        btn_box.accepted.connect(dialog.accept)
+        btn_box.rejected.connect(dialog.reject)
+        layout.addWidget(btn_box)
+        if dialog.exec() != QtWidgets.QDialog.DialogCode.Accepted:
+            return
+        command_list = commands.expand_macro(editor.toPlainText().splitlines())
+        if command_list:
+            name = macro_combo.currentText() if macro_combo.currentIndex() > 0 else None
+            self.run_commands(command_list, name, runtime)
+
+    def broadcast_message(self):
+        running = [runtime for runtime in self.supervisor.running() if runtime.status == "running"]
+        if not running:
+            QtWidgets.QMessageBox.information(self, "Объявление", "Нет запущенных серверов.")
+            return
+        text, ok = QtWidgets.QInputDialog.getText(self, "Объявление", f"Сообщение для серверов ({len(running)}):")
+        text = text.strip()
+        if ok and text:
+            for runtime in running:
+                runtime.commands.submit([f"say {text}"])
+
+    def closeEvent(self, event):
+        running = self.supervisor.running()
+        if running:
+            buttons = QtWidgets.QMessageBox.StandardButton
+            reply = QtWidgets.QMessageBox.question(
+                self, "Выход",
+                f"Запущено серверов: {len(running)}. Они продолжат работать без менеджера.\n"
+                "Остановить их перед выходом?",
+                buttons.Yes | buttons.No | buttons.Cancel,
+                buttons.No,
+            )
+            if reply == buttons.Cancel:
+                event.ignore()
+                return
+            if reply == buttons.Yes:
+                self.supervisor.stop_all()
+        if self.sampler:
+            self.sampler.stop()
+        self.network.stop()
+        self.config.flush()
+        self.supervisor.detach_all()
+        event.accept()
+
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
     window = ServerManager()
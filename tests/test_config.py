@@ -0,0 +1,71 @@
+import os
+
+from core import boot, config
+
+
+def test_jsonl_keeps_second_half(tmp_path):
+    path = str(tmp_path / ".msm" / "history.jsonl")
+    for i in range(200):
+        config.append_jsonl(path, {"i": i, "text": "строка"}, max_bytes=2000)
+
+    records = config.read_jsonl(path)
+
+    assert os.path.getsize(path) <= 2000
+    assert records[-1]["i"] == 199
+    assert [r["i"] for r in records] == list(range(records[0]["i"], 200))
+    assert records[0]["text"] == "строка"
+
+
+def test_jsonl_skips_broken_lines(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"i": 1}\n{"i": \n{"i": 2}\n')
+
+    assert config.read_jsonl(path) == [{"i": 1}, {"i": 2}]
+    assert config.read_jsonl(str(tmp_path / "missing.jsonl")) == []
+
+
+def test_boot_records_round_trip(tmp_path):
+    record = boot.make_record(100.0, {"spawned": 100.5, "ready": 112.25}, ["java", "-jar", "server.jar"])
+    boot.append_record(str(tmp_path), record)
+
+    assert boot.read_records(str(tmp_path)) == [record]
+
+
+def test_get_returns_copies(tmp_path):
+    store = config.ConfigStore(str(tmp_path / "config.json"))
+    store["known_servers"] = ["alpha"]
+
+    store.get("known_servers").append("beta")
+    store["macros"] = {}
+    store["macros"]["Сохранить"] = ["save-all"]
+
+    assert store.get("known_servers") == ["alpha"]
+    assert store.get("macros") == {}
+
+
+def test_two_processes_keep_each_others_changes(tmp_path):
+    path = str(tmp_path / "config.json")
+    gui = config.ConfigStore(path)
+    daemon = config.ConfigStore(path)
+
+    gui["java_path"] = "/opt/java21/bin/java"
+    gui.set_server("alpha", autostart=True)
+    daemon["known_servers"] = ["alpha", "beta"]
+    daemon.set_server("beta", max_ram_gb=8)
+    gui.flush()
+    daemon.flush()
+
+    on_disk = config.ConfigStore(path)
+    assert on_disk.get("java_path") == "/opt/java21/bin/java"
+    assert on_disk.get("known_servers") == ["alpha", "beta"]
+    assert on_disk.server("alpha")["autostart"] is True
+    assert on_disk.server("beta")["max_ram_gb"] == 8
+    # Записавший последним подхватил изменения другого
+    assert daemon.get("java_path") == "/opt/java21/bin/java"
+    assert daemon.server("alpha")["autostart"] is True
+
+    gui.set_server("beta", max_ram_gb=None)
+    gui.flush()
+    assert config.ConfigStore(path).server("beta")["max_ram_gb"] is None
+    assert config.ConfigStore(path).get("known_servers") == ["alpha", "beta"]
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core import downloads
+from core.downloads import Download
+
+DATA = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class FileServer(ThreadingHTTPServer):
+    """HTTP-сервер с одним файлом: отдаёт части по Range, умеет обрывать ответы и отвечать 503."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FileHandler)
+        self.ranges = True
+        self.etag = '"v1"'
+        self.cut_after = None  # обрывать каждый ответ после стольких байт
+        self.unavailable = 0  # столько следующих запросов получат 503
+        self.sent = 0  # байт тела отдано
+        self.lock = threading.Lock()  # части отдаются из разных потоков
+        self.requests = []
+        self.url = f"http://127.0.0.1:{self.server_port}/server.jar"
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get("Range"))
+        if self.path != "/server.jar":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if server.unavailable:
+            server.unavailable -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = 0, len(DATA) - 1
+        requested = self.headers.get("Range")
+        if requested and server.ranges:
+            first, _, last = requested[len("bytes="):].partition("-")
+            start, end = int(first), int(last) if last else end
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", server.etag)
+        self.end_headers()
+        body = DATA[start:end + 1]
+        if server.cut_after is not None and len(body) > server.cut_after:
+            body = body[:server.cut_after]
+            self.close_connection = True
+        self.wfile.write(body)
+        with server.lock:
+            server.sent += len(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(downloads, "BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(downloads, "PARALLEL_MIN_BYTES", 1024 * 1024)
+    server = FileServer()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def download(server, path, **kwargs):
+    item = Download(server.url, str(path), **kwargs)
+    item.run()
+    return item
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_ranged_segments(server, tmp_path):
+    target = tmp_path / "server.jar"
+
+    item = download(server, target, sha256=hashlib.sha256(DATA).hexdigest())
+
+    assert item.status == "done", item.error
+    assert read(target) == DATA
+    assert len(item._parts) == downloads.SEGMENTS
+    assert not os.path.exists(item.part_path) and not os.path.exists(item.state_path)
+    assert server.sent == len(DATA) + 1  # плюс первый байт из пробного запроса
+
+
+def test_without_ranges_restarts_after_cut(server, tmp_path):
+    server.ranges = False
+    server.cut_after = len(DATA) // 2
+    target = tmp_path / "server.jar"
+
+    def heal(item):
+        # Первый полный запрос оборвётся, повтор пройдёт целиком
+        while item.retries == 0 and not item.finished:
+            item.wait(0.01)
+        server.cut_after = None
+
+    item = Download(server.url, str(target))
+    threading.Thread(target=heal, args=(item,), daemon=True).start()
+    item.run()
+
+    assert item.status == "done", item.error
+    assert read(target) == DATA
+    assert item._parts == [[0, None, len(DATA)]]
+
+
+def test_resume_after_failure(server, tmp_path, monkeypatch):
+    target = tmp_path / "server.jar"
+    server.cut_after = 256 * 1024
+    monkeypatch.setattr(downloads, "RETRIES", 0)
+
+    failed = download(server, target)
+    assert failed.status == "failed"
+    assert os.path.exists(failed.state_path)
+
+    server.cut_after = None
+    server.sent = 0
+    item = download(server, target, sha1=hashlib.sha1(DATA).hexdigest())
+
+    assert item.status == "done", item.error
+    assert read(target) == DATA
+    assert item.resumed == failed.received > 0
+    assert server.sent == len(DATA) - item.resumed + 1
+
+
+def test_changed_file_is_not_resumed(server, tmp_path, monkeypatch):
+    target = tmp_path / "server.jar"
+    server.cut_after = 256 * 1024
+    monkeypatch.setattr(downloads, "RETRIES", 0)
+    download(server, target)
+
+    server.cut_after = None
+    server.etag = '"v2"'
+    item = download(server, target)
+
+    assert item.status == "done", item.error
+    assert item.resumed == 0
+    assert read(target) == DATA
+
+
+def test_retries_server_errors(server, tmp_path):
+    server.unavailable = 2
+    target = tmp_path / "server.jar"
+
+    item = download(server, target)
+
+    assert item.status == "done", item.error
+    assert item.retries == 2
+    assert read(target) == DATA
+
+
+def test_checksum_mismatch(server, tmp_path):
+    target = tmp_path / "server.jar"
+
+    item = download(server, target, sha256="0" * 64)
+
+    assert item.status == "failed"
+    assert "контрольная сумма" in item.error
+    assert not os.path.exists(target)
+    assert not os.path.exists(item.part_path) and not os.path.exists(item.state_path)
+
+
+def test_missing_file_is_not_retried(server, tmp_path):
+    item = Download(server.url.replace("server.jar", "missing.jar"), str(tmp_path / "missing.jar"))
+    item.run()
+
+    assert item.status == "failed"
+    assert item.retries == 0
+    assert len(server.requests) == 1
+
+
+def test_fetch_and_checksum_file(server, tmp_path):
+    target = tmp_path / "server.jar"
+    reported = []
+
+    downloads.fetch(server.url, str(target), lambda text, percent=None: reported.append(percent),
+                    sha256=hashlib.sha256(DATA).hexdigest())
+
+    assert read(target) == DATA
+    assert reported[-1] == 100
+    assert downloads.read_checksum(server.url.replace("server.jar", "missing.jar")) is None
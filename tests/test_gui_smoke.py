@@ -0,0 +1,41 @@
+"""Окно менеджера создаётся и закрывается без дисплея (QT_QPA_PLATFORM=offscreen)."""
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+pytest.importorskip("psutil")
+from PyQt6 import QtCore  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_server_manager_opens(app, tmp_path, monkeypatch):
+    import main
+
+    servers = tmp_path / "servers"
+    (servers / "alpha").mkdir(parents=True)
+    (servers / "alpha" / "server.jar").write_bytes(b"")
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"servers_dir": str(servers), "ping_interval_seconds": 0}), encoding="utf-8")
+    monkeypatch.setattr(main, "config_path", str(config))
+
+    window = main.ServerManager()
+    window.show()
+    # Даём отработать отложенному запуску: сканирование папки, замеры, сеть
+    QtCore.QTimer.singleShot(1000, app.quit)
+    app.exec()
+    try:
+        assert window.server_model.names() == ["alpha"]
+        window.server_list_view.setCurrentIndex(window.server_model.index(0, 0))
+        assert window.get_selected_server() == "alpha"
+        for scope in range(window.players_scope.count()):
+            window.players_scope.setCurrentIndex(scope)
+        window.refresh_server_row("alpha")
+    finally:
+        window.close()
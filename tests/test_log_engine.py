@@ -0,0 +1,69 @@
+import pytest
+
+from core import log_engine
+from core.log_engine import CHAT, CRASH, ERROR, JOIN, LEAVE, LIST, LOADING, READY, TPS, WARN
+
+JAVA_LINES = [
+    ('[12:00:00 INFO]: Done (3.215s)! For help, type "help"', "paper", READY, None, None),
+    ("[12:00:00] [Server thread/INFO]: Steve joined the game", "fabric", JOIN, "Steve", None),
+    ("[12:00:00] [Server thread/INFO]: Steve left the game", "fabric", LEAVE, "Steve", None),
+    ("[14Jan2024 12:00:00.000] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: Alex joined the game",
+     "forge", JOIN, "Alex", None),
+    ("[12:00:00 INFO]: <Steve> hello there", "paper", CHAT, "Steve", "hello there"),
+    ("[12:00:00 INFO]: [Not Secure] <Alex> hi", "paper", CHAT, "Alex", "hi"),
+    ("[12:00:00 WARN]: Can't keep up! Is the server overloaded? Running 2500ms or 50 ticks behind",
+     "paper", TPS, None, "2500"),
+    ("[12:00:00 INFO]: There are 2 of a max of 20 players online: Steve, Alex", "paper", LIST, None, "2"),
+    ("[12:00:00] [Server thread/INFO]: There are 0/20 players online:", "fabric", LIST, None, "0"),
+    ('[12:00:00] [Server thread/INFO]: Preparing level "world"', "fabric", LOADING, None, None),
+    ("[12:00:00] [Server thread/ERROR]: Encountered an unexpected exception", "fabric", CRASH, None, None),
+    ("[12:00:00 WARN]: Something odd happened", "paper", WARN, None, None),
+    ("[12:00:00] [Server thread/ERROR]: Could not load chunk", "fabric", ERROR, None, None),
+]
+
+BEDROCK_LINES = [
+    ("[2024-01-14 12:00:00:123 INFO] Server started.", READY, None, None),
+    ("[2024-01-14 12:00:00:123 INFO] Player connected: Steve, xuid: 123", JOIN, "Steve", None),
+    ("[2024-01-14 12:00:00:123 INFO] Player disconnected: Steve Two, xuid: 123", LEAVE, "Steve Two", None),
+    ("NO LOG FILE! - [2019-08-04 12:00:00 INFO] Player connected: Alex, xuid: 456", JOIN, "Alex", None),
+    ("[2024-01-14 12:00:00:123 INFO] Level Name: Bedrock level", LOADING, None, None),
+    ("[2024-01-14 12:00:00:123 INFO] There are 1/10 players online:", LIST, None, "1"),
+    ("[2024-01-14 12:00:00:123 WARN] Something odd happened", WARN, None, None),
+    ("[2024-01-14 12:00:00:123 ERROR] Could not open file", ERROR, None, None),
+]
+
+
+@pytest.mark.parametrize("line, loader, kind, player, value", JAVA_LINES)
+def test_java_lines(line, loader, kind, player, value):
+    event = log_engine.get_classifier(loader).classify(line)
+    assert event is not None
+    assert (event.kind, event.player, event.value) == (kind, player, value)
+
+
+@pytest.mark.parametrize("line, kind, player, value", BEDROCK_LINES)
+def test_bedrock_lines(line, kind, player, value):
+    event = log_engine.get_classifier("bedrock").classify(line)
+    assert event is not None
+    assert (event.kind, event.player, event.value) == (kind, player, value)
+
+
+def test_bedrock_header_matches_real_line():
+    header = log_engine.get_classifier("bedrock")._header
+    assert header.match("[2024-01-14 12:00:00:123 INFO] Player connected: Steve, xuid: 123")
+
+
+def test_plain_lines_are_ignored():
+    assert log_engine.get_classifier("paper").classify("[12:00:00 INFO]: Loading libraries") is None
+    assert log_engine.get_classifier("bedrock").classify("[2024-01-14 12:00:00:123 INFO] Version 1.20") is None
+
+
+def test_stderr_without_header_is_error():
+    event = log_engine.get_classifier("paper").classify("java.lang.NullPointerException", "stderr")
+    assert event is not None and event.kind == ERROR
+
+
+def test_long_unmatched_line_is_fast():
+    # Строка без закрывающих скобок не должна перебираться с экспоненциальным откатом
+    line = "[" + "a" * 100000
+    assert log_engine.get_classifier("paper").classify(line) is None
+    assert log_engine.get_classifier("bedrock").classify("[" + "1" * 100000) is None
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from core import ping
+from core.ping import ServerProber, _packet, _varint, java_ping
+
+
+def serve_status(payload):
+    """Java-сервер, который на любой запрос статуса отвечает payload (готовые байты ответа)."""
+
+    async def handle(reader, writer):
+        await reader.read(1024)
+        writer.write(payload)
+        await writer.drain()
+        await reader.read(1024)
+        writer.close()
+
+    return asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def status_packet(status):
+    body = json.dumps(status).encode("utf-8")
+    return _packet(0x00, _varint(len(body)) + body)
+
+
+def run_ping(payload):
+    async def main():
+        server = await serve_status(payload)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            return await java_ping("127.0.0.1", port, timeout=2)
+
+    return asyncio.run(main())
+
+
+def test_java_ping_ok():
+    status = {"players": {"online": 1, "max": 20, "sample": [{"name": "Steve", "id": "x"}]},
+              "description": {"text": "Hi"}, "version": {"name": "1.21"}}
+    result = run_ping(status_packet(status) + _packet(0x01, b"\0" * 8))
+
+    assert result.ok
+    assert (result.online, result.max, result.players, result.motd, result.version) == (1, 20, ["Steve"], "Hi", "1.21")
+
+
+@pytest.mark.parametrize("payload", [
+    _varint(0),  # пакет нулевой длины
+    _packet(0x00, _varint(40) + b"{"),  # длина строки больше пакета
+    status_packet(["not", "an", "object"]),
+    status_packet({"players": "none"}),
+    status_packet({"players": {"sample": [1, 2]}}),
+    status_packet({"version": "1.21"}),
+])
+def test_java_ping_garbage_fails_cleanly(payload):
+    result = run_ping(payload + _packet(0x01, b"\0" * 8))
+
+    assert not result.ok
+    assert result.error
+
+
+def test_prober_survives_unexpected_errors(monkeypatch):
+    async def probe(self, server_path):
+        if server_path == "broken":
+            raise RuntimeError("boom")
+        return ping.PingResult(True, 1.0, 0, 20, [], "", "", None)
+
+    monkeypatch.setattr(ServerProber, "probe", probe)
+    prober = ServerProber(interval=0.05)
+    prober.set_servers({"good": "good", "bad": "broken"})
+    prober.start()
+    try:
+        seen = []
+        deadline = time.monotonic() + 5
+        while len(seen) < 3 and time.monotonic() < deadline:
+            results = prober.take()
+            if results:
+                seen.append(results)
+            time.sleep(0.05)
+    finally:
+        prober.stop()
+
+    assert len(seen) >= 3  # поток продолжает пинговать после исключения
+    assert seen[-1]["good"].ok
+    assert not seen[-1]["bad"].ok and seen[-1]["bad"].error == "boom"
@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from core import players
+
+STEVE = "8667ba71-b85a-4004-af54-457a9734eed7"
+ALEX = "ec561538-f3fd-461d-aff5-086b22154bce"
+
+
+class FakeCommands:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, commands, name):
+        self.submitted.append((list(commands), name))
+        return "batch"
+
+
+class FakeRuntime:
+    def __init__(self, running, status=None):
+        self.running = running
+        self.status = status or ("running" if running else "stopped")
+        self.commands = FakeCommands()
+
+    def is_running(self):
+        return self.running
+
+
+def make_server(tmp_path, whitelist):
+    path = str(tmp_path / "alpha")
+    os.makedirs(path)
+    with open(os.path.join(path, "whitelist.json"), "w", encoding="utf-8") as f:
+        json.dump(whitelist, f)
+    return path
+
+
+def read_whitelist(server_path):
+    with open(os.path.join(server_path, "whitelist.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def plan_replace(server_path):
+    plans, errors = players.plan_sync([server_path], [players.Entry("Alex", ALEX), players.Entry("Nobody", None)],
+                                      "whitelist", "replace")
+    assert errors == []
+    return plans[0]
+
+
+def test_stopped_server_gets_file(tmp_path):
+    server_path = make_server(tmp_path, [{"uuid": STEVE, "name": "Steve"}])
+    runtime = FakeRuntime(False)
+
+    assert players.apply_sync(plan_replace(server_path), runtime) is None
+
+    assert read_whitelist(server_path) == [{"uuid": ALEX, "name": "Alex"}]
+    assert runtime.commands.submitted == []
+
+
+def test_running_server_gets_commands_not_file(tmp_path):
+    whitelist = [{"uuid": STEVE, "name": "Steve"}]
+    server_path = make_server(tmp_path, whitelist)
+    runtime = FakeRuntime(True)
+
+    assert players.apply_sync(plan_replace(server_path), runtime) == "batch"
+
+    assert read_whitelist(server_path) == whitelist
+    commands, name = runtime.commands.submitted[0]
+    assert commands == ["whitelist add Alex", "whitelist add Nobody", "whitelist remove Steve"]
+    assert name == "Белый список: +2 −1"
+
+
+def test_external_server_is_refused(tmp_path):
+    whitelist = [{"uuid": STEVE, "name": "Steve"}]
+    server_path = make_server(tmp_path, whitelist)
+
+    with pytest.raises(Exception):
+        players.apply_sync(plan_replace(server_path), FakeRuntime(False, "external"))
+
+    assert read_whitelist(server_path) == whitelist
@@ -0,0 +1,22 @@
+from core import process
+from core.process import ServerProcess
+
+
+def test_pending_lines_are_capped(monkeypatch, tmp_path):
+    monkeypatch.setattr(process, "PENDING_MAX_LINES", 100)
+    server = ServerProcess(str(tmp_path))
+    lines = [f"[12:00:00 INFO]: line {i}" for i in range(130)]
+
+    server._ingest(lines[:60], "stdout")
+    server._ingest(lines[60:], "stdout")
+    batch = server.take()
+
+    assert batch.lines == lines[30:]
+    assert batch.dropped == 30
+    assert server.dropped == 30
+
+    server._ingest(lines[:5], "stdout")
+    batch = server.take()
+    assert batch.lines == lines[:5]
+    assert batch.dropped == 0
+    assert server.dropped == 30
@@ -0,0 +1,174 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+from core import rcon
+from core.rcon import RconClient, RconError, RconPool
+
+PASSWORD = "secret"
+
+
+class FakeRconServer:
+    """RCON-сервер в том же процессе, отвечающий как vanilla: длинный ответ режется по 4096 байт,
+    на пакет неизвестного типа приходит "Unknown request" с тем же id, а чтение, в котором
+    не ровно один пакет, обрывает соединение."""
+
+    def __init__(self, password=PASSWORD, chunk=4096):
+        self.password = password
+        self.chunk = chunk
+        self.commands = []
+        self.connections = 0
+        self.rejected = 0  # чтений, в которых оказался не ровно один пакет
+        self.silent = False  # принимать команды, но не отвечать
+        self._clients = []
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._clients.append(sock)
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def reply(self, command):
+        if command.startswith("long"):
+            return "x" * 10000
+        return "echo " + command
+
+    def _serve(self, sock):
+        authed = False
+        try:
+            while True:
+                # Как vanilla: одно чтение в буфер на 1460 байт — ровно один пакет, иначе обрыв
+                data = sock.recv(1460)
+                if len(data) < 14 or struct.unpack_from("<i", data)[0] + 4 != len(data):
+                    self.rejected += bool(data)
+                    return
+                request_id, kind = struct.unpack_from("<ii", data, 4)
+                body = data[12:-2].decode("utf-8")
+                if kind == rcon.AUTH:
+                    authed = body == self.password
+                    out = [rcon.encode_packet(request_id if authed else -1, 2)]
+                elif not authed:
+                    out = [rcon.encode_packet(-1, rcon.RESPONSE)]
+                elif kind == rcon.EXEC:
+                    self.commands.append(body)
+                    if self.silent:
+                        continue
+                    text = self.reply(body)
+                    out = [rcon.encode_packet(request_id, rcon.RESPONSE, text[start:start + self.chunk])
+                           for start in range(0, len(text), self.chunk)]
+                else:
+                    out = [rcon.encode_packet(request_id, rcon.RESPONSE, f"Unknown request {kind:x}")]
+                for packet in out:
+                    sock.sendall(packet)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+    def drop_connections(self):
+        """Закрывает открытые соединения — как сервер, который перезапустился."""
+        for sock in self._clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        self._clients = []
+
+    def close(self):
+        self._listener.close()
+        self.drop_connections()
+
+
+@pytest.fixture
+def server():
+    server = FakeRconServer()
+    yield server
+    server.close()
+
+
+def test_auth_failure(server):
+    client = RconClient("127.0.0.1", server.port, "wrong")
+    with pytest.raises(RconError, match="пароль"):
+        client.command("list")
+    assert server.commands == []
+
+
+def test_pipelined_replies_in_order(server):
+    client = RconClient("127.0.0.1", server.port, PASSWORD)
+
+    replies = client.pipeline(["say one", "long", "say two"])
+
+    assert replies == ["echo say one", "x" * 10000, "echo say two"]
+    assert server.commands == ["say one", "long", "say two"]
+    assert server.connections == 1
+    assert server.rejected == 0
+    client.close()
+
+
+def test_command_too_long(server):
+    client = RconClient("127.0.0.1", server.port, PASSWORD)
+    with pytest.raises(RconError):
+        client.command("say " + "x" * rcon.MAX_COMMAND_BYTES)
+    assert server.connections == 0
+
+
+def test_no_reply_times_out(server):
+    server.silent = True
+    client = RconClient("127.0.0.1", server.port, PASSWORD, timeout=0.3)
+    with pytest.raises(RconError, match="не ответил"):
+        client.command("list")
+
+
+def write_properties(server_path, port, password=PASSWORD):
+    with open(server_path / "server.properties", "w", encoding="utf-8") as f:
+        f.write(f"enable-rcon=true\nrcon.port={port}\nrcon.password={password}\n")
+
+
+def test_pool_reconnects_after_server_restart(server, tmp_path):
+    write_properties(tmp_path, server.port)
+    pool = RconPool()
+    client = pool.client(str(tmp_path))
+
+    assert client.command("list") == "echo list"
+    server.drop_connections()
+
+    assert pool.client(str(tmp_path)) is client
+    assert client.command("list") == "echo list"
+    assert server.connections == 2
+    pool.close_all()
+
+
+def test_pool_follows_properties(server, tmp_path):
+    pool = RconPool()
+    assert pool.client(str(tmp_path)) is None
+
+    write_properties(tmp_path, server.port, "old")
+    old = pool.client(str(tmp_path))
+    with pytest.raises(RconError):
+        old.command("list")
+
+    write_properties(tmp_path, server.port)
+    client = pool.client(str(tmp_path))
+    assert client is not old
+    assert client.command("list") == "echo list"
+    pool.close_all()
+
+
+def test_glued_packets_are_rejected(server):
+    sock = socket.create_connection(("127.0.0.1", server.port))
+    sock.sendall(rcon.encode_packet(1, rcon.AUTH, PASSWORD) + rcon.encode_packet(2, rcon.EXEC, "list"))
+    sock.settimeout(2)
+    assert sock.recv(100) == b""
+    sock.close()
+    assert server.rejected == 1
+    assert server.commands == []
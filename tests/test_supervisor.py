@@ -0,0 +1,171 @@
+import os
+
+from core.ping import PingResult
+from core.process import OutputBatch
+from core.supervisor import Supervisor
+
+
+class FakeProcess:
+    """Процесс, который работает и молчит — Supervisor.poll() видит только is_running()."""
+
+    def take(self):
+        return None
+
+    def is_running(self):
+        return True
+
+    def reconcile_players(self, players):
+        return True
+
+
+class FakeProber:
+    def __init__(self, results):
+        self.results = results
+
+    def take(self):
+        results, self.results = self.results, {}
+        return results
+
+
+def make_server(root, name, port=None):
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    open(os.path.join(path, "server.jar"), "w").close()
+    if port is not None:
+        with open(os.path.join(path, "server.properties"), "w", encoding="utf-8") as f:
+            f.write(f"server-port={port}\n")
+    return path
+
+
+def answer(*players):
+    return PingResult(True, 1.0, len(players), 20, list(players), "motd", "1.21", None)
+
+
+def test_shared_port_is_not_external(tmp_path):
+    supervisor = Supervisor()
+    running = supervisor.runtime("running", make_server(str(tmp_path), "running"))
+    idle = supervisor.runtime("idle", make_server(str(tmp_path), "idle", 25565))
+    running.process = FakeProcess()
+    running.status = "running"
+    supervisor.prober = FakeProber({"running": answer("Steve"), "idle": answer("Steve")})
+
+    supervisor.poll()
+
+    assert idle.status == "stopped"
+    assert idle.players == set()
+    assert running.players == {"Steve"}
+
+
+def test_external_reverts_when_managed_server_takes_port(tmp_path):
+    supervisor = Supervisor()
+    running = supervisor.runtime("running", make_server(str(tmp_path), "running"))
+    idle = supervisor.runtime("idle", make_server(str(tmp_path), "idle"))
+    supervisor.prober = FakeProber({"idle": answer("Alex")})
+    supervisor.poll()
+    assert idle.status == "external"
+    assert idle.players == {"Alex"}
+
+    running.process = FakeProcess()
+    running.status = "running"
+    supervisor.prober = FakeProber({"idle": answer("Alex")})
+    supervisor.poll()
+    assert idle.status == "stopped"
+    assert idle.players == set()
+
+
+def test_other_port_still_external(tmp_path):
+    supervisor = Supervisor()
+    running = supervisor.runtime("running", make_server(str(tmp_path), "running"))
+    idle = supervisor.runtime("idle", make_server(str(tmp_path), "idle", 25566))
+    running.process = FakeProcess()
+    running.status = "running"
+    supervisor.prober = FakeProber({"idle": answer("Alex")})
+
+    supervisor.poll()
+
+    assert idle.status == "external"
+    assert idle.players == {"Alex"}
+
+
+class FakeRecorder:
+    def __init__(self):
+        self.snapshots = []
+
+    def observe(self, server_path, players, now=None):
+        self.snapshots.append((os.path.basename(server_path), set(players)))
+
+
+class ExitedProcess(FakeProcess):
+    """Процесс, который как раз завершился: take() отдаёт код возврата."""
+
+    stop_requested = True
+    started_at = None
+
+    def take(self):
+        return OutputBatch([], [], None, 0)
+
+    def is_running(self):
+        return False
+
+
+def test_sessions_skip_servers_without_process(tmp_path):
+    supervisor = Supervisor()
+    supervisor.sessions = FakeRecorder()
+    running = supervisor.runtime("running", make_server(str(tmp_path), "running"))
+    supervisor.runtime("external", make_server(str(tmp_path), "external", 25566))
+    running.process = FakeProcess()
+    running.status = "running"
+    running.players = {"Steve"}
+    supervisor.prober = FakeProber({"external": answer("Alex")})
+
+    supervisor.poll()
+
+    assert supervisor.sessions.snapshots == [("running", {"Steve"})]
+
+
+def test_sessions_close_when_process_exits(tmp_path):
+    supervisor = Supervisor()
+    supervisor.sessions = FakeRecorder()
+    runtime = supervisor.runtime("alpha", make_server(str(tmp_path), "alpha"))
+    runtime.process = ExitedProcess()
+    runtime.status = "running"
+    runtime.players = {"Steve"}
+
+    supervisor.poll()
+    supervisor.poll()
+
+    assert runtime.status == "stopped"
+    assert supervisor.sessions.snapshots == [("alpha", set())]
+
+
+class FloodedProcess(FakeProcess):
+    def take(self):
+        return OutputBatch(["[12:00:00 INFO]: last"], [], None, None, 500)
+
+
+def test_dropped_lines_are_noted(tmp_path):
+    supervisor = Supervisor()
+    runtime = supervisor.runtime("alpha", make_server(str(tmp_path), "alpha"))
+    runtime.process = FloodedProcess()
+    runtime.status = "running"
+
+    supervisor.poll()
+
+    assert "пропущено строк: 500" in runtime.console[-2]
+    assert runtime.console[-1] == "[12:00:00 INFO]: last"
+
+
+def test_launch_uses_registry_executable(tmp_path):
+    from core import registry
+    from core.supervisor import build_launch_args
+    path = make_server(str(tmp_path), "alpha")
+    for name in ("zeta.jar", "forge-installer.jar", "paper.jar"):
+        open(os.path.join(path, name), "w").close()
+    servers = registry.ServerRegistry(str(tmp_path))
+    servers.scan()
+
+    executable = servers.get("alpha").executable
+
+    assert executable == "paper.jar"
+    assert registry.server_executable(path) == executable
+    assert executable in build_launch_args(path)
@@ -0,0 +1,172 @@
+import tempfile
+
+import pytest
+
+from core import log_engine, watchdog
+from core.log_engine import LogEvent
+from core.watchdog import Watchdog
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcess:
+    def __init__(self):
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+
+class FakeRuntime:
+    def __init__(self, status="running", path=None):
+        self.path = path or tempfile.mkdtemp()
+        self.status = status
+        self.transition = None
+        self.args = ["java", "-jar", "server.jar"]
+        self.process = FakeProcess()
+        self.sent = []
+
+    def send(self, command):
+        self.sent.append(command)
+        return True
+
+    def is_running(self):
+        return self.process is not None
+
+    def uptime(self):
+        return 0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watchdog.time, "monotonic", clock)
+    return clock
+
+
+def make_watchdog(runtime, auto_restart):
+    dog = Watchdog(runtime)
+    dog.auto_restart = auto_restart
+    dog.probe_interval = 60
+    dog.probe_timeout = 30
+    dog.on_start()
+    return dog
+
+
+def answer(dog):
+    line = "[12:00:00 INFO]: There are 0 of a max of 20 players online:"
+    dog.observe([LogEvent(log_engine.LIST, line, None, "0")], [line])
+
+
+def hang(dog, clock):
+    clock.now += 60
+    assert dog.tick() is None  # проба отправлена
+    clock.now += 30
+    return dog.tick()
+
+
+def test_hang_without_auto_restart_recovers(clock):
+    runtime = FakeRuntime()
+    dog = make_watchdog(runtime, auto_restart=False)
+
+    assert "завис" in hang(dog, clock)
+    assert not runtime.process.killed
+
+    # Пробы продолжаются, повторно о зависании не сообщается
+    assert hang(dog, clock) is None
+    assert runtime.sent == ["list", "list"]
+
+    answer(dog)
+    assert "снова отвечает" in dog.tick()
+    assert dog._hang_reason is None
+    clock.now += 60
+    dog.tick()
+    assert runtime.sent == ["list", "list", "list"]
+
+
+def test_hang_with_auto_restart_kills_once(clock):
+    runtime = FakeRuntime()
+    dog = make_watchdog(runtime, auto_restart=True)
+
+    assert "будет перезапущен" in hang(dog, clock)
+    assert runtime.process.killed
+    clock.now += 120
+    assert dog.tick() is None
+    assert runtime.sent == ["list"]
+
+    assert "завис" in dog.on_exit(True, -9, 100)
+    assert dog._hang_reason is None
+
+
+def test_exit_clears_hang(clock):
+    runtime = FakeRuntime()
+    dog = make_watchdog(runtime, auto_restart=False)
+    hang(dog, clock)
+
+    assert dog.on_exit(False, 0, 100) is None
+    assert dog._hang_reason is None
+
+
+@pytest.mark.parametrize("status, probed", [
+    ("running", True), ("error", True), ("starting", False), ("crashed", False), ("stopped", False),
+])
+def test_probed_statuses(clock, status, probed):
+    runtime = FakeRuntime(status)
+    dog = make_watchdog(runtime, auto_restart=True)
+
+    clock.now += 60
+    dog.tick()
+
+    assert dog.is_active() == probed
+    assert runtime.sent == (["list"] if probed else [])
+
+
+@pytest.mark.parametrize("auto_restart", [True, False])
+def test_exited_server_in_error_is_not_probed(clock, auto_restart):
+    runtime = FakeRuntime()
+    dog = make_watchdog(runtime, auto_restart)
+    clock.now += 60
+    dog.tick()
+    assert runtime.sent == ["list"]
+
+    # Процесс упал, не ответив: ServerRuntime.poll() оставляет статус error без процесса
+    runtime.process = None
+    runtime.status = "error"
+    dog.last_reason = "код выхода 1"
+    for _ in range(3):
+        clock.now += 60
+        assert dog.tick() is None
+
+    assert not dog.is_active()
+    assert runtime.sent == ["list"]
+    assert dog.last_reason == "код выхода 1"
+
+
+@pytest.mark.parametrize("seconds, text", [(40.7, "40 с"), (192, "3 мин 12 с"), (7500, "2 ч 5 мин")])
+def test_format_duration(seconds, text):
+    assert watchdog.format_duration(seconds) == text
+
+
+def test_only_one_manager_restarts(clock, tmp_path):
+    # Окно и daemon подключены к одному серверу: у каждого свой Watchdog
+    gui = FakeRuntime(path=str(tmp_path))
+    daemon = FakeRuntime(path=str(tmp_path))
+    gui_dog = make_watchdog(gui, auto_restart=True)
+    daemon_dog = make_watchdog(daemon, auto_restart=True)
+
+    assert "Автоперезапуск" in gui_dog.on_exit(True, 1, 100)
+    assert "другой" in daemon_dog.on_exit(True, 1, 100)
+    assert gui_dog.restart_at is not None
+    assert daemon_dog.restart_at is None
+
+    # Окно закрылось — перезапуск достаётся daemon
+    gui_dog.release()
+    daemon_dog.on_start()
+    assert "Автоперезапуск" in daemon_dog.on_exit(True, 1, 100)
+    daemon_dog.release()